@@ -0,0 +1,113 @@
+"""
+Reading `interaction_log` back out.
+
+Pages are keyset-paginated on (created_at, id): the cursor is the last row's
+pair, so every page is an indexed range scan no matter how deep the client
+pages, and rows inserted meanwhile never shift a page. `fields` projects
+columns so callers can skip the heavy `context_used` blob.
+"""
+
+import base64
+import json
+
+LOG_COLUMNS = (
+    "id",
+    "org_id",
+    "intent",
+    "raw_message",
+    "context_used",
+    "enriched_output",
+    "verdict",
+    "confidence",
+    "created_at",
+)
+# Always selected: the cursor is built from them
+KEY_COLUMNS = ("created_at", "id")
+
+
+def parse_fields(fields: str = None) -> list:
+    """Comma-separated column names -> validated column list (all if empty)"""
+    if not fields:
+        return list(LOG_COLUMNS)
+    columns = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [c for c in columns if c not in LOG_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown log fields: {', '.join(unknown)}")
+    return columns + [c for c in KEY_COLUMNS if c not in columns]
+
+
+def encode_cursor(row: dict) -> str:
+    raw = json.dumps([row["created_at"], row["id"]], default=str)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    return created_at, row_id
+
+
+def _quote(value) -> str:
+    """PostgREST logic-tree value; quoted so ':' and '.' in timestamps survive"""
+    return '"' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+async def fetch_page(
+    db,
+    org_id: str,
+    columns: list,
+    limit: int = 20,
+    cursor: str = None,
+    since: str = None,
+    until: str = None,
+    descending: bool = True,
+):
+    """One page of an org's logs; returns (rows, next_cursor or None)"""
+    query = (
+        db.table("interaction_log")
+        .select(", ".join(columns))
+        .eq("org_id", org_id)
+    )
+    if since:
+        query = query.gte("created_at", since)
+    if until:
+        query = query.lt("created_at", until)
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        op = "lt" if descending else "gt"
+        query = query.or_(
+            f"created_at.{op}.{_quote(created_at)},"
+            f"and(created_at.eq.{_quote(created_at)},id.{op}.{_quote(row_id)})"
+        )
+    result = await (
+        query.order("created_at", desc=descending)
+        .order("id", desc=descending)
+        .limit(limit)
+        .execute()
+    )
+    rows = result.data
+    next_cursor = encode_cursor(rows[-1]) if len(rows) == limit else None
+    return rows, next_cursor
+
+
+async def iter_pages(
+    db,
+    org_id: str,
+    columns: list,
+    chunk_size: int = 500,
+    since: str = None,
+    until: str = None,
+):
+    """Every matching row, oldest first, one page in memory at a time"""
+    cursor = None
+    while True:
+        rows, cursor = await fetch_page(
+            db, org_id, columns, chunk_size, cursor, since, until, descending=False
+        )
+        if rows:
+            yield rows
+        if cursor is None:
+            return
@@ -0,0 +1,131 @@
+"""
+Compact `interaction_log.context_used`.
+
+Instead of a copy of every policy, relationship and outcome text, a log row
+stores references: point IDs with their retrieval scores, the org snapshot
+version and a hash of the entity state. Entity states are content-addressed
+in `entity_state_version` (one row per distinct state, written once), and
+everything else already lives in the vector store, so the full context can
+be rebuilt on demand by `reconstruct`.
+"""
+
+from context.cache import TTLCache
+import hashlib
+import json
+
+FORMAT = "refs/v1"
+
+
+def state_hash(state) -> str:
+    raw = json.dumps(state, separators=(",", ":"), sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()[:16]
+
+
+def compact_context(context: dict, entity_name=None) -> dict:
+    """The references for a retrieved context dict"""
+    state = context.get("entity_state")
+    refs = {
+        "format": FORMAT,
+        "snapshot_version": context.get("snapshot_version"),
+        "profile": context.get("profile_id"),
+        "policies": [[p.get("id"), p.get("check")] for p in context.get("policies", [])],
+        "violations": [v["flag"] for v in context.get("policy_violations", [])],
+        "relationships": [
+            [r.get("id"), r.get("confidence")] for r in context.get("relationships", [])
+        ],
+        "decisions": [
+            [d.get("id"), d.get("confidence")] for d in context.get("decisions", [])
+        ],
+        "entity": entity_name,
+        "entity_state_hash": state_hash(state) if state is not None else None,
+        "mentioned_entities": [m["entity"] for m in context.get("mentioned_entities", [])],
+    }
+    if "prompt_usage" in context:
+        refs["prompt_usage"] = context["prompt_usage"]
+    return refs
+
+
+class EntityStateVersions:
+    """
+    Writes each distinct entity state once to `entity_state_version` through
+    a batched writer; states already written recently are skipped.
+    """
+
+    def __init__(self, writer, maxsize: int = 50000):
+        self.writer = writer
+        self.written = TTLCache(maxsize=maxsize, ttl=86400.0)
+
+    async def record(self, org_id: str, entity_name: str, state) -> str:
+        if state is None:
+            return None
+        digest = state_hash(state)
+        key = (org_id, digest)
+        if self.written.peek(key) is None:
+            self.written.set(key, True)
+            await self.writer.submit(
+                {
+                    "org_id": org_id,
+                    "entity_name": entity_name,
+                    "state_hash": digest,
+                    "state": state,
+                }
+            )
+        return digest
+
+
+async def reconstruct(row: dict, vectors, db) -> dict:
+    """
+    Full context for a log row. Rows logged before references are returned
+    as stored. Points deleted since (e.g. merged by decision compaction)
+    come back as {"id", "missing": true}.
+    """
+    refs = row.get("context_used") or {}
+    if refs.get("format") != FORMAT:
+        return refs
+
+    ids = [refs["profile"]] if refs.get("profile") else []
+    for section in ("policies", "relationships", "decisions"):
+        ids += [i for i, _ in refs.get(section, []) if i is not None]
+    # Qdrant IDs are unsigned ints or UUIDs; references store them as text
+    ids = [int(i) if str(i).isdigit() else i for i in ids]
+    points = {str(p.id): p.payload for p in await vectors.retrieve(ids)}
+
+    def item(point_id, **extra):
+        payload = points.get(str(point_id))
+        if payload is None:
+            return {"id": point_id, "missing": True, **extra}
+        return {
+            "id": point_id,
+            "content": payload["content"],
+            "entity_name": payload.get("entity_name"),
+            **extra,
+        }
+
+    entity_state = None
+    if refs.get("entity_state_hash"):
+        result = await (
+            db.table("entity_state_version")
+            .select("state")
+            .eq("org_id", row["org_id"])
+            .eq("state_hash", refs["entity_state_hash"])
+            .limit(1)
+            .execute()
+        )
+        entity_state = result.data[0]["state"] if result.data else None
+
+    profile = points.get(str(refs.get("profile")))
+    return {
+        "snapshot_version": refs.get("snapshot_version"),
+        "profile": profile["content"] if profile else None,
+        "policies": [item(i, check=check) for i, check in refs.get("policies", [])],
+        "policy_violations": refs.get("violations", []),
+        "relationships": [
+            item(i, confidence=score) for i, score in refs.get("relationships", [])
+        ],
+        "decisions": [item(i, confidence=score) for i, score in refs.get("decisions", [])],
+        "entity": refs.get("entity"),
+        "entity_state": entity_state,
+        "entity_state_hash": refs.get("entity_state_hash"),
+        "mentioned_entities": refs.get("mentioned_entities", []),
+        "prompt_usage": refs.get("prompt_usage"),
+    }
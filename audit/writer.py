@@ -0,0 +1,208 @@
+import asyncio
+import glob
+import json
+import os
+import time
+
+
+class InteractionLogWriter:
+    """
+    Background, batched writer for `interaction_log` (or another append-only table).
+
+    Rows are queued in memory and inserted in bulk once `batch_size` rows are
+    waiting or `flush_interval` seconds have passed. Failed batches are
+    retried, then spilled to JSONL segments under `spill_dir` and replayed
+    once Supabase is reachable again. Unparseable lines in a segment are
+    moved to `<segment>.corrupt` and the rest is replayed.
+    """
+
+    def __init__(
+        self,
+        get_client,
+        table: str = "interaction_log",
+        max_queue: int = 10000,
+        batch_size: int = 100,
+        flush_interval: float = 1.0,
+        submit_timeout: float = 0.05,
+        max_retries: int = 3,
+        spill_dir: str = ".spill/interaction_log",
+    ):
+        self.get_client = get_client
+        self.table = table
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.submit_timeout = submit_timeout
+        self.max_retries = max_retries
+        self.spill_dir = spill_dir
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self._task = None
+        self._closing = False
+        self.written = 0
+        self.batches = 0
+        self.spilled = 0
+        self.replayed = 0
+        self.quarantined = 0
+
+    @classmethod
+    def from_env(cls, get_client, table: str = "interaction_log"):
+        spill_dir = os.getenv("LOG_SPILL_DIR", ".spill/interaction_log")
+        if table != "interaction_log":
+            # Other tables spill next to the interaction_log segments
+            spill_dir = os.path.join(os.path.dirname(spill_dir), table)
+        return cls(
+            get_client,
+            table=table,
+            max_queue=int(os.getenv("LOG_QUEUE_SIZE", "10000")),
+            batch_size=int(os.getenv("LOG_BATCH_SIZE", "100")),
+            flush_interval=float(os.getenv("LOG_FLUSH_INTERVAL_SECONDS", "1.0")),
+            spill_dir=spill_dir,
+        )
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def submit(self, row: dict):
+        """
+        Queue a row without waiting on the database.
+
+        When the queue is full the caller waits up to `submit_timeout`
+        (backpressure); if there is still no room the row goes to disk.
+        """
+        try:
+            self.queue.put_nowait(row)
+        except asyncio.QueueFull:
+            try:
+                await asyncio.wait_for(self.queue.put(row), self.submit_timeout)
+            except asyncio.TimeoutError:
+                await asyncio.to_thread(self._spill, [row])
+
+    async def stop(self):
+        """Drain everything still queued, then stop the background task"""
+        if self._task is None:
+            return
+        self._closing = True
+        await self._task
+        self._task = None
+
+    async def _run(self):
+        if self._spill_segments():
+            try:
+                await self._replay_spill()
+            except Exception as e:
+                # Spilled rows stay on disk; new rows must still be written
+                print(f"[ERROR] {self.table} spill replay failed: {e}")
+        while not (self._closing and self.queue.empty()):
+            batch = await self._next_batch()
+            if not batch:
+                continue
+            try:
+                await self._flush(batch)
+            except Exception as e:
+                print(f"[ERROR] Dropped {len(batch)} {self.table} rows: {e}")
+
+    async def _next_batch(self) -> list:
+        """Collect up to `batch_size` rows, waiting at most `flush_interval`"""
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            if self._closing and self.queue.empty():
+                break
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _insert(self, rows: list) -> bool:
+        for attempt in range(self.max_retries):
+            try:
+                client = await self.get_client()
+                await client.table(self.table).insert(rows).execute()
+                return True
+            except Exception as e:
+                print(
+                    f"[WARN] {self.table} insert failed "
+                    f"(attempt {attempt + 1}/{self.max_retries}): {e}"
+                )
+                if attempt + 1 < self.max_retries:
+                    await asyncio.sleep(0.2 * 2**attempt)
+        return False
+
+    async def _flush(self, batch: list):
+        if await self._insert(batch):
+            self.written += len(batch)
+            self.batches += 1
+            if self._spill_segments():
+                try:
+                    await self._replay_spill()
+                except Exception as e:
+                    print(f"[ERROR] {self.table} spill replay failed: {e}")
+        else:
+            await asyncio.to_thread(self._spill, batch)
+
+    # ====== Spill to disk ======
+
+    def _spill_segments(self) -> list:
+        return sorted(glob.glob(os.path.join(self.spill_dir, "segment-*.jsonl")))
+
+    def _spill(self, rows: list):
+        os.makedirs(self.spill_dir, exist_ok=True)
+        path = os.path.join(self.spill_dir, f"segment-{time.time_ns()}.jsonl")
+        # Written under a temporary name so a crash never leaves half a segment
+        with open(f"{path}.tmp", "w") as f:
+            for row in rows:
+                f.write(json.dumps(row, default=str) + "\n")
+        os.replace(f"{path}.tmp", path)
+        self.spilled += len(rows)
+        print(f"[WARN] Spilled {len(rows)} {self.table} rows to {path}")
+
+    def _read_segment(self, path: str) -> list:
+        """Rows of a segment; lines that don't parse are quarantined"""
+        rows, bad = [], []
+        with open(path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    rows.append(json.loads(line))
+                except ValueError:
+                    bad.append(line if line.endswith("\n") else line + "\n")
+        if bad:
+            with open(f"{path}.corrupt", "a") as f:
+                f.writelines(bad)
+            self.quarantined += len(bad)
+            print(f"[WARN] Moved {len(bad)} unreadable {self.table} rows to {path}.corrupt")
+        return rows
+
+    async def _replay_spill(self):
+        """Re-insert spilled segments, oldest first, stopping at the first failure"""
+        for path in self._spill_segments():
+            try:
+                rows = self._read_segment(path)
+            except OSError as e:
+                print(f"[WARN] Skipping {self.table} spill segment {path}: {e}")
+                continue
+            for i in range(0, len(rows), self.batch_size):
+                if not await self._insert(rows[i : i + self.batch_size]):
+                    # Keep only what is still unwritten
+                    with open(path, "w") as f:
+                        for row in rows[i:]:
+                            f.write(json.dumps(row) + "\n")
+                    return
+                self.replayed += len(rows[i : i + self.batch_size])
+            os.remove(path)
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self.queue.qsize(),
+            "written": self.written,
+            "batches": self.batches,
+            "spilled": self.spilled,
+            "replayed": self.replayed,
+            "quarantined": self.quarantined,
+            "spill_segments": len(self._spill_segments()),
+        }
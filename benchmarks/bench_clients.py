@@ -0,0 +1,130 @@
+"""
+Benchmark a fresh client per call vs the shared pooled clients.
+
+Runs a local HTTP/1.1 keep-alive server that sleeps for a simulated
+connection setup (TCP + TLS handshake to a cloud region) on every new
+connection, then compares per-call latency for: a new httpx client per call
+(what a per-request `acreate_client` does) and the shared pool from
+`clients.http()`. Also times constructing the Gemini and Qdrant SDK clients
+themselves, which the registry now does once per process.
+
+Usage: python -m benchmarks.bench_clients [--calls 200] [--connect-ms 60]
+       [--rtt-ms 20] [--concurrency 8]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+import clients
+
+
+class SlowServer:
+    """Keep-alive HTTP server that charges `connect_ms` once per connection"""
+
+    def __init__(self, connect_ms: float, rtt_ms: float):
+        self.connect_ms = connect_ms
+        self.rtt_ms = rtt_ms
+        self.connections = 0
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        await asyncio.sleep(self.connect_ms / 1000)
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                if not head:
+                    break
+                await asyncio.sleep(self.rtt_ms / 1000)
+                body = b'{"ok":true}'
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    b"Content-Length: %d\r\n\r\n%s" % (len(body), body)
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+
+async def time_calls(call, n, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            await call()
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(n)))
+    wall = time.perf_counter() - start
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.95) - 1], n / wall
+
+
+def construction_ms(factory, n=20):
+    start = time.perf_counter()
+    for _ in range(n):
+        factory()
+    return (time.perf_counter() - start) * 1000 / n
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--connect-ms", type=float, default=60)
+    parser.add_argument("--rtt-ms", type=float, default=20)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    server = SlowServer(args.connect_ms, args.rtt_ms)
+    listener = await asyncio.start_server(server.handle, "127.0.0.1", 0)
+    url = f"http://127.0.0.1:{listener.sockets[0].getsockname()[1]}/rest/v1/org_context"
+
+    async def fresh():
+        async with httpx.AsyncClient() as client:
+            (await client.get(url)).raise_for_status()
+
+    async def pooled():
+        (await clients.http().get(url)).raise_for_status()
+
+    rows = []
+    for name, call in (("fresh client per call", fresh), ("shared pool", pooled)):
+        server.connections = 0
+        p50, p95, rps = await time_calls(call, args.calls, args.concurrency)
+        rows.append((name, p50, p95, rps, server.connections))
+
+    print(
+        f"\n{args.calls} calls, concurrency {args.concurrency}, "
+        f"connect {args.connect_ms:.0f} ms, rtt {args.rtt_ms:.0f} ms"
+    )
+    print(f"{'client':<25}{'p50 ms':>10}{'p95 ms':>10}{'calls/s':>10}{'conns':>8}")
+    for name, p50, p95, rps, conns in rows:
+        print(f"{name:<25}{p50:>10.1f}{p95:>10.1f}{rps:>10.1f}{conns:>8}")
+    print(f"saved per call (p50): {rows[0][1] - rows[1][1]:.1f} ms")
+
+    from google import genai
+    from qdrant_client import AsyncQdrantClient
+
+    print("\nSDK client construction (paid once per process with the registry)")
+    print(f"{'client':<25}{'ms':>10}")
+    gemini = construction_ms(lambda: genai.Client(api_key="bench"))
+    qdrant = construction_ms(
+        lambda: AsyncQdrantClient(url="http://127.0.0.1:6333", check_compatibility=False)
+    )
+    print(f"{'genai.Client':<25}{gemini:>10.2f}")
+    print(f"{'AsyncQdrantClient':<25}{qdrant:>10.2f}")
+
+    await clients.close()
+    listener.close()
+    await listener.wait_closed()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,90 @@
+"""
+Benchmark ContextRetriever.get_context: sequential vs concurrent stages.
+
+Runs against the in-process fakes with injected latency, so the numbers
+show the overlap gained per stage rather than real network cost. "cold"
+runs clear the snapshot and entity-state caches before every request, so
+all three stages hit the (fake) network and the concurrency gain is
+visible; "warm" runs keep them, as a long-running API process would.
+
+Usage: python -m benchmarks.bench_retrieval [--runs 20] [--embed-ms 120]
+       [--qdrant-ms 60] [--supabase-ms 50]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from benchmarks.fakes import (
+    ORG_ID,
+    FakeGemini,
+    FakeSupabase,
+    fake_qdrant,
+    seed_points,
+    seed_tables,
+)
+from context.retriever import ContextRetriever
+
+
+def clear_caches(retriever):
+    retriever.snapshots.snapshots.clear()
+    retriever.entity_states.states.clear()
+    retriever.entity_states.negatives.clear()
+
+
+async def measure(retriever, runs, cold):
+    totals, stages = [], {}
+    for _ in range(runs):
+        if cold:
+            clear_caches(retriever)
+        timings = {}
+        start = time.perf_counter()
+        await retriever.get_context(
+            "follow up with Rahul about our prototype",
+            ORG_ID,
+            entity_name="Rahul",
+            timings=timings,
+        )
+        totals.append((time.perf_counter() - start) * 1000)
+        for name, ms in timings.items():
+            stages.setdefault(name, []).append(ms)
+    return statistics.median(totals), {k: statistics.median(v) for k, v in stages.items()}
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--embed-ms", type=float, default=120)
+    parser.add_argument("--qdrant-ms", type=float, default=60)
+    parser.add_argument("--supabase-ms", type=float, default=50)
+    args = parser.parse_args()
+
+    retriever = ContextRetriever(
+        qdrant=await fake_qdrant(args.qdrant_ms, points=seed_points()),
+        supabase=FakeSupabase(seed_tables(), latency_ms=args.supabase_ms),
+        client=FakeGemini(embed_ms=args.embed_ms),
+    )
+    # Measure the embedding round trip on every run, not cache hits
+    retriever.embed_cache = None
+
+    for cache_state, cold in (("cold", True), ("warm", False)):
+        results = {}
+        for mode, concurrent in (("sequential", False), ("concurrent", True)):
+            retriever.concurrent_stages = concurrent
+            clear_caches(retriever)
+            results[mode] = await measure(retriever, args.runs, cold)
+
+        print(f"\n{cache_state} snapshot / entity-state caches")
+        print(f"{'stage':<16}{'sequential ms':>16}{'concurrent ms':>16}")
+        for name in results["sequential"][1]:
+            seq = results["sequential"][1][name]
+            con = results["concurrent"][1].get(name, 0.0)
+            print(f"{name:<16}{seq:>16.1f}{con:>16.1f}")
+        seq_total, con_total = results["sequential"][0], results["concurrent"][0]
+        print(f"{'TOTAL (p50)':<16}{seq_total:>16.1f}{con_total:>16.1f}")
+        print(f"speedup: {seq_total / con_total:.2f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
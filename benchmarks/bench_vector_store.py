@@ -0,0 +1,94 @@
+"""
+Benchmark remote Qdrant vs the in-process vector index.
+
+Loads N random points for one org into an in-memory Qdrant collection
+(wrapped with an injected network round trip), then compares query latency
+and index memory for: the remote path, local brute force, and local HNSW.
+The remote numbers include the in-memory Qdrant's own search time on top
+of the simulated round trip.
+
+Usage: python -m benchmarks.bench_vector_store [--points 1000 10000]
+       [--queries 200] [--rtt-ms 40]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import numpy as np
+from qdrant_client.models import PointStruct
+
+from benchmarks.fakes import DIM, ORG_ID, fake_qdrant
+from context.vector_store import LocalVectorStore, QdrantVectorStore
+
+TYPES = ["relationship", "decision", "policy"]
+
+
+def random_points(n, rng):
+    vectors = rng.standard_normal((n, DIM)).astype(np.float32)
+    return [
+        PointStruct(
+            id=i,
+            vector=vectors[i].tolist(),
+            payload={
+                "org_id": ORG_ID,
+                "context_type": TYPES[i % len(TYPES)],
+                "entity_name": f"entity_{i % 50}",
+                "content": f"point {i}",
+            },
+        )
+        for i in range(n)
+    ]
+
+
+async def time_queries(store, queries):
+    latencies = []
+    for q in queries:
+        start = time.perf_counter()
+        await store.search(q, ORG_ID, limit=8, context_types=["relationship", "decision"])
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.95) - 1]
+
+
+async def bench(n, args, rng):
+    points = random_points(n, rng)
+    client = await fake_qdrant(latency_ms=0)
+    for i in range(0, n, 1000):
+        await client.upsert(collection_name="genios_context", points=points[i : i + 1000])
+    # Only queries pay the simulated round trip
+    client.latency_ms = args.rtt_ms
+    remote = QdrantVectorStore(client, "genios_context")
+    queries = rng.standard_normal((args.queries, DIM)).astype(np.float32).tolist()
+
+    rows = [("qdrant (remote)", *await time_queries(remote, queries), None)]
+    for name, threshold in (("local brute force", 10**9), ("local hnsw", 0)):
+        local = LocalVectorStore(remote, DIM, hnsw_threshold=threshold)
+        client.latency_ms = 0
+        index = await local._org(ORG_ID)
+        client.latency_ms = args.rtt_ms
+        rows.append((name, *await time_queries(local, queries), index.memory_bytes()))
+        if threshold == 0 and index.hnsw is None:
+            rows[-1] = ("local hnsw (hnswlib missing)",) + rows[-1][1:]
+
+    print(f"\n{n} points")
+    print(f"{'backend':<30}{'p50 ms':>10}{'p95 ms':>10}{'index MiB':>12}")
+    for name, p50, p95, mem in rows:
+        mem_text = f"{mem / 2**20:.2f}" if mem is not None else "-"
+        print(f"{name:<30}{p50:>10.3f}{p95:>10.3f}{mem_text:>12}")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--points", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--rtt-ms", type=float, default=40)
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+    for n in args.points:
+        await bench(n, args, rng)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
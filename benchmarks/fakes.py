@@ -0,0 +1,421 @@
+"""
+In-process stand-ins for Gemini, Qdrant and Supabase.
+
+Each fake sleeps for a configurable latency (plus jitter) before answering,
+so benchmarks can measure how the pipeline overlaps network waits without
+touching any cloud service.
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import Distance, PointStruct, VectorParams
+
+DIM = 384
+
+
+async def sleep_ms(latency_ms: float, jitter_ms: float = 0.0):
+    delay = latency_ms + (random.uniform(-jitter_ms, jitter_ms) if jitter_ms else 0)
+    if delay > 0:
+        await asyncio.sleep(delay / 1000)
+
+
+def fake_vector(text: str, dim: int = DIM) -> list:
+    """Hashed bag-of-words vector: texts sharing words have high cosine"""
+    vec = [0.0] * dim
+    for word in re.findall(r"\w+", text.lower()):
+        h = int(hashlib.md5(word.encode()).hexdigest(), 16)
+        vec[h % dim] += 1.0 if (h >> 16) & 1 else -1.0
+    norm = math.sqrt(sum(v * v for v in vec)) or 1.0
+    return [v / norm for v in vec]
+
+
+# ====== Gemini ======
+
+
+class _FakeModels:
+    def __init__(self, owner):
+        self.owner = owner
+
+    async def embed_content(self, model, contents, config=None):
+        await sleep_ms(self.owner.embed_ms, self.owner.jitter_ms)
+        self.owner.calls["embed_content"] += 1
+        texts = [contents] if isinstance(contents, str) else list(contents)
+        return SimpleNamespace(
+            embeddings=[SimpleNamespace(values=fake_vector(t)) for t in texts]
+        )
+
+    async def generate_content(self, model, contents, config=None):
+        await sleep_ms(self.owner.generate_ms, self.owner.jitter_ms)
+        self.owner.calls["generate_content"] += 1
+        return SimpleNamespace(text=json.dumps(self.owner.responder(contents)))
+
+    async def generate_content_stream(self, model, contents, config=None):
+        self.owner.calls["generate_content"] += 1
+        text = json.dumps(self.owner.responder(contents))
+        size = max(1, len(text) // 10)
+
+        async def chunks():
+            # Spread the generation latency evenly over ten chunks
+            for i in range(0, len(text), size):
+                await sleep_ms(self.owner.generate_ms / 10, self.owner.jitter_ms / 10)
+                yield SimpleNamespace(text=text[i : i + size])
+
+        return chunks()
+
+
+class _FakeCaches:
+    def __init__(self, owner):
+        self.owner = owner
+
+    async def create(self, model, config=None):
+        await sleep_ms(self.owner.embed_ms, self.owner.jitter_ms)
+        self.owner.calls["caches.create"] += 1
+        return SimpleNamespace(name=f"cachedContents/fake-{self.owner.calls['caches.create']}")
+
+
+def scripted_verdict(prompt) -> dict:
+    """Default FakeGemini responder: a fixed, well-formed PROCEED verdict"""
+    return {
+        "verdict": "PROCEED",
+        "enriched_brief": "Scripted response from the offline Gemini stand-in.",
+        "recommended_action": "Proceed with the requested action.",
+        "flags": [],
+        "key_context_used": [],
+        "confidence": 0.9,
+    }
+
+
+class FakeGemini:
+    """Mimics `genai.Client` for the `client.aio.models`/`caches` calls we make"""
+
+    def __init__(
+        self, embed_ms=120.0, generate_ms=1500.0, jitter_ms=0.0, responder=None
+    ):
+        self.embed_ms = embed_ms
+        self.generate_ms = generate_ms
+        self.jitter_ms = jitter_ms
+        self.responder = responder or scripted_verdict
+        self.calls = {"embed_content": 0, "generate_content": 0, "caches.create": 0}
+        self.aio = SimpleNamespace(
+            models=_FakeModels(self), caches=_FakeCaches(self), aclose=self._aclose
+        )
+
+    async def _aclose(self):
+        pass
+
+
+# ====== Qdrant ======
+
+
+class LatencyProxy:
+    """Wraps an async client so every coroutine method sleeps first"""
+
+    def __init__(self, target, latency_ms=60.0, jitter_ms=0.0):
+        self._target = target
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if not asyncio.iscoroutinefunction(attr):
+            return attr
+
+        async def call(*args, **kwargs):
+            await sleep_ms(self.latency_ms, self.jitter_ms)
+            return await attr(*args, **kwargs)
+
+        return call
+
+
+async def fake_qdrant(latency_ms=60.0, jitter_ms=0.0, points=()):
+    """In-memory Qdrant collection `genios_context`, optionally pre-loaded"""
+    client = AsyncQdrantClient(location=":memory:")
+    await client.create_collection(
+        collection_name="genios_context",
+        vectors_config=VectorParams(size=DIM, distance=Distance.COSINE),
+    )
+    if points:
+        await client.upsert(collection_name="genios_context", points=list(points))
+    return LatencyProxy(client, latency_ms, jitter_ms)
+
+
+# ====== Supabase / PostgREST ======
+
+
+def _like_to_regex(pattern: str) -> str:
+    """Translate a LIKE pattern (with backslash escapes) to a regex"""
+    parts, chars = [], iter(pattern)
+    for char in chars:
+        if char == "\\":
+            parts.append(re.escape(next(chars, "\\")))
+        elif char == "%":
+            parts.append(".*")
+        elif char == "_":
+            parts.append(".")
+        else:
+            parts.append(re.escape(char))
+    return "".join(parts)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _compare(actual, op, value) -> bool:
+    if actual is None or value is None:
+        return op == "eq" and actual is value
+    if isinstance(actual, int) and not isinstance(value, (int, float)):
+        value = int(value)
+    return {
+        "eq": actual == value,
+        "lt": actual < value,
+        "lte": actual <= value,
+        "gt": actual > value,
+        "gte": actual >= value,
+    }[op]
+
+
+def _split_top_level(text: str) -> list:
+    parts, depth, quoted, current = [], 0, False, ""
+    for char in text:
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        elif not quoted and char == "," and depth == 0:
+            parts.append(current)
+            current = ""
+            continue
+        current += char
+    return parts + [current]
+
+
+def _parse_logic(text: str, kind: str):
+    """PostgREST `or=(...)` logic tree -> row predicate (the subset we use)"""
+    conditions = []
+    for part in _split_top_level(text):
+        match = re.fullmatch(r"(and|or)\((.*)\)", part)
+        if match:
+            conditions.append(_parse_logic(match.group(2), match.group(1)))
+            continue
+        column, op, value = part.split(".", 2)
+        value = value[1:-1].replace('\\"', '"') if value.startswith('"') else value
+        conditions.append(
+            lambda row, c=column, o=op, v=value: _compare(row.get(c), o, v)
+        )
+    combine = any if kind == "or" else all
+    return lambda row: combine(c(row) for c in conditions)
+
+
+def _sort_key(value):
+    # Seed rows have int IDs, ingested rows uuid strings; order them apart
+    if isinstance(value, (int, float)):
+        return (0, value, "")
+    return (1, 0, "" if value is None else str(value))
+
+
+class _Query:
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+        self.filters = []
+        self.columns = None
+        self.order_by = []
+        self.max_rows = None
+        self.rows_to_insert = None
+        self.values_to_update = None
+        self.rows_to_upsert = None
+        self.deleting = False
+        self.offset = 0
+        self.negate = False
+
+    def select(self, columns="*"):
+        if columns.strip() != "*":
+            self.columns = [c.strip() for c in columns.split(",")]
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: _compare(row.get(column), "eq", value))
+        return self
+
+    def ilike(self, column, pattern):
+        regex = re.compile("^" + _like_to_regex(pattern) + "$", re.I)
+        self.filters.append(lambda row: bool(regex.match(str(row.get(column, "")))))
+        return self
+
+    def gte(self, column, value):
+        self.filters.append(lambda row: _compare(row.get(column), "gte", value))
+        return self
+
+    def lt(self, column, value):
+        self.filters.append(lambda row: _compare(row.get(column), "lt", value))
+        return self
+
+    def or_(self, filters):
+        condition = _parse_logic(filters, "or")
+        self.filters.append(condition)
+        return self
+
+    @property
+    def not_(self):
+        self.negate = True
+        return self
+
+    def is_(self, column, value):
+        negate, self.negate = self.negate, False
+        expected = None if value in (None, "null") else value
+        self.filters.append(lambda row: (row.get(column) == expected) != negate)
+        return self
+
+    def in_(self, column, values):
+        values = list(values)
+        self.filters.append(lambda row: row.get(column) in values)
+        return self
+
+    def order(self, column, desc=False):
+        self.order_by.append((column, desc))
+        return self
+
+    def limit(self, n):
+        self.max_rows = n
+        return self
+
+    def range(self, start, end):
+        self.offset = start
+        self.max_rows = end - start + 1
+        return self
+
+    def insert(self, rows):
+        self.rows_to_insert = rows if isinstance(rows, list) else [rows]
+        return self
+
+    def update(self, values):
+        self.values_to_update = values
+        return self
+
+    def delete(self):
+        self.deleting = True
+        return self
+
+    def upsert(self, rows, on_conflict="id"):
+        self.rows_to_upsert = rows if isinstance(rows, list) else [rows]
+        self.conflict_column = on_conflict
+        return self
+
+    async def execute(self):
+        await sleep_ms(self.db.latency_ms, self.db.jitter_ms)
+        rows = self.db.tables.setdefault(self.table, [])
+        if self.rows_to_insert is not None:
+            inserted = []
+            for row in self.rows_to_insert:
+                self.db.next_id += 1
+                row = {"id": self.db.next_id, "created_at": _now(), **row}
+                rows.append(row)
+                inserted.append(row)
+            return SimpleNamespace(data=inserted)
+
+        if self.rows_to_upsert is not None:
+            column = self.conflict_column
+            by_key = {r.get(column): r for r in rows}
+            for row in self.rows_to_upsert:
+                if row.get(column) in by_key:
+                    by_key[row[column]].update(row)
+                else:
+                    rows.append(dict(row))
+            return SimpleNamespace(data=self.rows_to_upsert)
+
+        data = [r for r in rows if all(f(r) for f in self.filters)]
+        if self.deleting:
+            rows[:] = [r for r in rows if r not in data]
+            return SimpleNamespace(data=data)
+        if self.values_to_update is not None:
+            for row in data:
+                row.update(self.values_to_update)
+            return SimpleNamespace(data=data)
+        for column, desc in reversed(self.order_by):
+            data.sort(key=lambda r: _sort_key(r.get(column)), reverse=desc)
+        data = data[self.offset :]
+        if self.max_rows is not None:
+            data = data[: self.max_rows]
+        if self.columns:
+            data = [{c: r.get(c) for c in self.columns} for r in data]
+        return SimpleNamespace(data=data)
+
+
+class FakeSupabase:
+    """Mimics the async Supabase client's `table(...)` query builder"""
+
+    def __init__(self, tables=None, latency_ms=50.0, jitter_ms=0.0):
+        self.tables = tables or {}
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.next_id = max(
+            (r.get("id", 0) for rows in self.tables.values() for r in rows), default=0
+        )
+
+    def table(self, name):
+        return _Query(self, name)
+
+
+# ====== Seed data (mirrors data/seed.py) ======
+
+ORG_ID = "genios_internal"
+
+SEED_CONTEXT = [
+    ("profile", None, "GeniOS Brain is a decision and cognition layer for agentic AI systems. Stage: pre-seed, building prototype. Location: India."),
+    ("policy", None, "Follow up with investors maximum once every 6 days unless they respond."),
+    ("policy", None, "Never share financial projections without founder approval first."),
+    ("policy", None, "Always personalize investor outreach based on their portfolio thesis before sending."),
+    ("policy", None, "Escalate to founder when any investor responds positively or requests a meeting."),
+    ("policy", None, "Do not follow up with investors who have explicitly said no in last 90 days."),
+    ("policy", None, "All external communications must reference latest product update."),
+    ("relationship", "Rahul", "Investor Rahul at SeedFund. Focus areas: B2B SaaS, AI infrastructure, developer tools. Last contact: 10 days ago. Status: warm lead."),
+    ("relationship", "Priya", "Investor Priya at TechVentures. Focus: Early-stage AI/ML startups, enterprise software. Last contact: 3 days ago. Status: very warm, requested demo."),
+    ("relationship", "Amit", "Investor Amit at GrowthCapital. Focus: Series A+ B2B companies. Last contact: 45 days ago. Status: cold, said timing not right."),
+]
+
+SEED_ENTITY_STATE = [
+    ("Rahul", {"status": "warm", "last_contact_days_ago": 10, "follow_up_due": True, "next_action": "share product update", "meeting_scheduled": False}),
+    ("Priya", {"status": "very_warm", "last_contact_days_ago": 3, "follow_up_due": True, "next_action": "schedule demo", "meeting_scheduled": False, "requested_demo": True}),
+    ("Amit", {"status": "cold", "last_contact_days_ago": 45, "follow_up_due": False, "next_action": "wait until Q3 2026", "meeting_scheduled": False, "said_no": True}),
+]
+
+
+def seed_points(org_id=ORG_ID):
+    return [
+        PointStruct(
+            id=i,
+            vector=fake_vector(content),
+            payload={
+                "org_id": org_id,
+                "context_type": ctx_type,
+                "entity_name": entity,
+                "content": content,
+            },
+        )
+        for i, (ctx_type, entity, content) in enumerate(SEED_CONTEXT, 1)
+    ]
+
+
+def seed_tables(org_id=ORG_ID):
+    return {
+        "org_context": [
+            {"id": i, "org_id": org_id, "context_type": t, "entity_name": e, "content": c}
+            for i, (t, e, c) in enumerate(SEED_CONTEXT, 1)
+        ],
+        "entity_state": [
+            {"id": i, "org_id": org_id, "entity_type": "investor", "entity_name": name, "current_state": state}
+            for i, (name, state) in enumerate(SEED_ENTITY_STATE, 1)
+        ],
+        "interaction_log": [],
+    }
@@ -0,0 +1,280 @@
+"""
+Offline load test of the FastAPI app.
+
+Starts `main.app` (lifespan included) against the in-process fakes from
+benchmarks/fakes.py: a scripted Gemini with latency and jitter, an
+in-memory Qdrant collection and a PostgREST stand-in for Supabase. The fakes
+are installed in `clients.py` before `main` is imported, so every module
+gets them exactly as it would get the real clients. Requests go through
+httpx's ASGI transport, so nothing touches the network.
+
+A fixed number of concurrent workers drive a weighted mix of
+`/v1/enrich`, `/v1/openclaw-webhook` and `/v1/logs` for `--duration`
+seconds. Reported per route: throughput, p50/p95/p99/max latency and
+non-2xx responses; plus event-loop lag (how late a 10ms timer fires),
+which shows CPU work blocking the loop.
+
+Usage: python -m benchmarks.loadtest [--duration 20] [--concurrency 32]
+       [--mix enrich=70,webhook=20,logs=10] [--distinct-intents 50]
+       [--generate-ms 800] [--embed-ms 120] [--qdrant-ms 40]
+       [--supabase-ms 30] [--jitter 0.2] [--json results.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.fakes import (
+    ORG_ID,
+    SEED_ENTITY_STATE,
+    FakeGemini,
+    FakeSupabase,
+    fake_qdrant,
+    seed_points,
+    seed_tables,
+)
+import clients
+
+ENTITIES = [name for name, _ in SEED_ENTITY_STATE]
+ACTIONS = [
+    "Send a follow-up email to {} about the prototype",
+    "Share our financial projections with {}",
+    "Schedule a demo call with {}",
+    "Ask {} for an intro to their portfolio companies",
+    "Send {} the latest product update",
+]
+OUTCOMES = ["Sent successfully", "No response", "Meeting booked", "Bounced"]
+
+LAG_INTERVAL = 0.01
+
+
+def parse_mix(text: str) -> dict:
+    mix = {}
+    for part in text.split(","):
+        route, _, weight = part.partition("=")
+        if route.strip() not in ("enrich", "webhook", "logs"):
+            raise SystemExit(f"Unknown route in --mix: {route}")
+        mix[route.strip()] = float(weight or 1)
+    return mix
+
+
+def intents(distinct: int, rng: random.Random) -> list:
+    """`distinct` messages; fewer distinct messages means more cache hits"""
+    pool = [a.format(e) for a in ACTIONS for e in ENTITIES]
+    messages = []
+    for i in range(distinct):
+        base = pool[i % len(pool)]
+        # Past one full pass, suffixes make every message unique
+        messages.append(base if i < len(pool) else f"{base} (ref {rng.randrange(10**6)})")
+    return messages
+
+
+def percentiles(values: list) -> dict:
+    if not values:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+    if len(values) == 1:
+        v = values[0]
+        return {"p50": v, "p95": v, "p99": v, "max": v}
+    q = statistics.quantiles(values, n=100, method="inclusive")
+    return {"p50": q[49], "p95": q[94], "p99": q[98], "max": max(values)}
+
+
+async def install_fakes(args):
+    """Put the fakes in the client registry before any module reads it"""
+    jitter = args.jitter
+    clients._gemini = FakeGemini(
+        embed_ms=args.embed_ms,
+        generate_ms=args.generate_ms,
+        jitter_ms=args.generate_ms * jitter,
+    )
+    clients._qdrant = await fake_qdrant(
+        args.qdrant_ms, args.qdrant_ms * jitter, points=seed_points()
+    )
+    clients._supabase = FakeSupabase(
+        seed_tables(), latency_ms=args.supabase_ms, jitter_ms=args.supabase_ms * jitter
+    )
+    return clients._gemini
+
+
+class LoopLag:
+    """Samples how late a short sleep wakes up while the load runs"""
+
+    def __init__(self):
+        self.samples = []
+        self._task = None
+
+    async def _run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(LAG_INTERVAL)
+            self.samples.append((time.perf_counter() - start - LAG_INTERVAL) * 1000)
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+
+async def run_load(client, args, rng):
+    messages = intents(args.distinct_intents, rng)
+    mix = parse_mix(args.mix)
+    routes, weights = list(mix), list(mix.values())
+    results = {route: {"latencies": [], "errors": {}} for route in routes}
+
+    def request(route):
+        if route == "enrich":
+            return client.post(
+                "/v1/enrich", json={"org_id": ORG_ID, "raw_message": rng.choice(messages)}
+            )
+        if route == "webhook":
+            entity = rng.choice(ENTITIES)
+            return client.post(
+                "/v1/openclaw-webhook",
+                json={
+                    "org_id": ORG_ID,
+                    "task_description": rng.choice(ACTIONS).format(entity),
+                    "result": rng.choice(OUTCOMES),
+                    "entities": [entity],
+                    "entity_state": {"last_contact_days_ago": 0},
+                },
+            )
+        return client.get(
+            f"/v1/logs/{ORG_ID}",
+            params={"limit": 20, "fields": "id,intent,verdict,confidence"},
+        )
+
+    async def worker(deadline):
+        while time.perf_counter() < deadline:
+            route = rng.choices(routes, weights)[0]
+            start = time.perf_counter()
+            try:
+                response = await request(route)
+                status = response.status_code
+            except Exception as e:
+                status = type(e).__name__
+            elapsed = (time.perf_counter() - start) * 1000
+            if isinstance(status, int) and status < 300:
+                results[route]["latencies"].append(elapsed)
+            else:
+                errors = results[route]["errors"]
+                errors[str(status)] = errors.get(str(status), 0) + 1
+
+    if args.warmup:
+        await asyncio.gather(*(worker(time.perf_counter() + args.warmup) for _ in range(args.concurrency)))
+        for r in results.values():
+            r["latencies"].clear()
+            r["errors"].clear()
+
+    lag = LoopLag()
+    lag.start()
+    start = time.perf_counter()
+    deadline = start + args.duration
+    await asyncio.gather(*(worker(deadline) for _ in range(args.concurrency)))
+    wall = time.perf_counter() - start
+    await lag.stop()
+    return results, wall, lag.samples
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--warmup", type=float, default=2)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--mix", default="enrich=70,webhook=20,logs=10")
+    parser.add_argument("--distinct-intents", type=int, default=50)
+    parser.add_argument("--generate-ms", type=float, default=800)
+    parser.add_argument("--embed-ms", type=float, default=120)
+    parser.add_argument("--qdrant-ms", type=float, default=40)
+    parser.add_argument("--supabase-ms", type=float, default=30)
+    parser.add_argument("--jitter", type=float, default=0.2, help="fraction of each latency")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    # Placeholder settings; nothing is contacted. Spilled audit rows go to a
+    # throwaway directory instead of the working tree.
+    spill = tempfile.mkdtemp(prefix="genios-loadtest-")
+    for key, value in {
+        "GEMINI_API_KEY": "offline",
+        "QDRANT_URL": "http://offline.invalid",
+        "SUPABASE_URL": "http://offline.invalid",
+        "SUPABASE_KEY": "offline",
+        "LOG_SPILL_DIR": os.path.join(spill, "interaction_log"),
+        "INGEST_CHECKPOINT_DIR": os.path.join(spill, "ingest"),
+    }.items():
+        os.environ.setdefault(key, value)
+
+    gemini = await install_fakes(args)
+    import main as app_module
+
+    rng = random.Random(args.seed)
+    transport = httpx.ASGITransport(app=app_module.app)
+    async with app_module.lifespan(app_module.app):
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://loadtest", timeout=120
+        ) as client:
+            results, wall, lag = await run_load(client, args, rng)
+        stats = app_module.pipeline_stats()
+
+    report = {
+        "settings": vars(args),
+        "wall_seconds": round(wall, 2),
+        "routes": {},
+        "event_loop_lag_ms": {k: round(v, 2) for k, v in percentiles(lag).items()},
+        "gemini_calls": gemini.calls,
+        "webhook_queue": {
+            k: stats["webhook_queue"].get(k) for k in ("accepted", "deduplicated", "written", "rejected")
+        },
+        "verdict_cache": stats["verdict_cache"],
+    }
+
+    print(
+        f"{'route':<10}{'ok':>8}{'err':>6}{'req/s':>9}"
+        f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}"
+    )
+    total_ok = 0
+    for route, r in results.items():
+        lat = r["latencies"]
+        total_ok += len(lat)
+        pct = percentiles(lat)
+        report["routes"][route] = {
+            "ok": len(lat),
+            "errors": r["errors"],
+            "rps": round(len(lat) / wall, 2),
+            **{k: round(v, 1) for k, v in pct.items()},
+        }
+        print(
+            f"{route:<10}{len(lat):>8}{sum(r['errors'].values()):>6}{len(lat) / wall:>9.1f}"
+            f"{pct['p50']:>10.1f}{pct['p95']:>10.1f}{pct['p99']:>10.1f}{pct['max']:>10.1f}"
+        )
+        if r["errors"]:
+            print(f"  errors: {r['errors']}")
+    report["rps"] = round(total_ok / wall, 2)
+    lag_pct = report["event_loop_lag_ms"]
+    print(f"total: {total_ok} ok in {wall:.1f}s = {total_ok / wall:.1f} req/s")
+    print(
+        f"event-loop lag ms: p50 {lag_pct['p50']:.2f}  p95 {lag_pct['p95']:.2f}"
+        f"  p99 {lag_pct['p99']:.2f}  max {lag_pct['max']:.2f}"
+    )
+    print(f"gemini calls: {gemini.calls}")
+    print(f"webhook queue: {report['webhook_queue']}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,127 @@
+"""
+Process-wide API clients.
+
+One Gemini client, one async Qdrant client and one async Supabase client
+per process, each with keep-alive connection pools (HTTP/2 where the server
+and the `h2` package allow). Modules get their clients from here instead of
+constructing their own, so repeated calls reuse warm TLS connections; the
+FastAPI lifespan closes everything on shutdown via `close()`.
+"""
+
+from google import genai
+from google.genai import types
+from supabase import AsyncClientOptions, acreate_client
+import asyncio
+import httpx
+import os
+
+POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "20"))
+KEEPALIVE_SECONDS = float(os.getenv("HTTP_KEEPALIVE_SECONDS", "60"))
+TIMEOUT_SECONDS = float(os.getenv("HTTP_TIMEOUT_SECONDS", "30"))
+QDRANT_PREFER_GRPC = os.getenv("QDRANT_PREFER_GRPC", "0") == "1"
+
+_gemini = None
+_qdrant = None
+_supabase = None
+_http = None
+_supabase_lock = asyncio.Lock()
+
+
+def _http2() -> bool:
+    if os.getenv("HTTP2_ENABLED", "1") == "0":
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=POOL_SIZE,
+        max_keepalive_connections=POOL_SIZE,
+        keepalive_expiry=KEEPALIVE_SECONDS,
+    )
+
+
+def http() -> httpx.AsyncClient:
+    """Shared pooled HTTP client (used by Supabase's PostgREST calls)"""
+    global _http
+    if _http is None:
+        _http = httpx.AsyncClient(
+            http2=_http2(),
+            limits=_limits(),
+            timeout=TIMEOUT_SECONDS,
+            follow_redirects=True,
+        )
+    return _http
+
+
+def gemini() -> genai.Client:
+    global _gemini
+    if _gemini is None:
+        pool = {"http2": _http2(), "limits": _limits()}
+        _gemini = genai.Client(
+            api_key=os.getenv("GEMINI_API_KEY"),
+            http_options=types.HttpOptions(
+                client_args={"limits": _limits()}, async_client_args=pool
+            ),
+        )
+    return _gemini
+
+
+def qdrant():
+    """Async Qdrant client; REST over pooled HTTP/2, or gRPC if preferred"""
+    global _qdrant
+    if _qdrant is None:
+        from qdrant_client import AsyncQdrantClient
+
+        _qdrant = AsyncQdrantClient(
+            url=os.getenv("QDRANT_URL"),
+            api_key=os.getenv("QDRANT_API_KEY"),
+            prefer_grpc=QDRANT_PREFER_GRPC,
+            timeout=int(TIMEOUT_SECONDS),
+            http2=_http2(),
+            limits=_limits(),
+        )
+    return _qdrant
+
+
+async def supabase():
+    """Async Supabase client, created inside the running event loop"""
+    global _supabase
+    if _supabase is None:
+        async with _supabase_lock:
+            if _supabase is None:
+                _supabase = await acreate_client(
+                    os.getenv("SUPABASE_URL"),
+                    os.getenv("SUPABASE_KEY"),
+                    options=AsyncClientOptions(httpx_client=http()),
+                )
+    return _supabase
+
+
+async def close():
+    """Close every pool that was opened; clients are recreated on next use"""
+    global _gemini, _qdrant, _supabase, _http
+    if _qdrant is not None:
+        await _qdrant.close()
+    if _gemini is not None:
+        await _gemini.aio.aclose()
+    if _http is not None:
+        await _http.aclose()
+    _gemini = _qdrant = _supabase = _http = None
+
+
+def stats() -> dict:
+    return {
+        "http2": _http2(),
+        "pool_size": POOL_SIZE,
+        "qdrant_grpc": QDRANT_PREFER_GRPC,
+        "open": {
+            "gemini": _gemini is not None,
+            "qdrant": _qdrant is not None,
+            "supabase": _supabase is not None,
+        },
+    }
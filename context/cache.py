@@ -0,0 +1,63 @@
+from collections import OrderedDict
+import time
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Bounded LRU cache with a per-entry time-to-live and hit/miss counters"""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 3600.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        entry = self._data.get(key, _MISSING)
+        if entry is not _MISSING:
+            value, expires_at = entry
+            if expires_at > time.monotonic():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._data[key]
+        self.misses += 1
+        return default
+
+    def peek(self, key, default=None):
+        """Read an unexpired entry without touching LRU order or counters"""
+        entry = self._data.get(key, _MISSING)
+        if entry is _MISSING or entry[1] <= time.monotonic():
+            return default
+        return entry[0]
+
+    def set(self, key, value):
+        self._data[key] = (value, time.monotonic() + self.ttl)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        entry = self._data.pop(key, _MISSING)
+        return default if entry is _MISSING else entry[0]
+
+    def keys(self):
+        return list(self._data)
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
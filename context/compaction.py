@@ -0,0 +1,268 @@
+"""
+Compaction of learned `decision` context.
+
+Webhook outcomes repeat: the same task against the same entity produces
+near-identical "Task: ... Result: ..." points. Exact repeats already share a
+content-hash ID; this job handles the near ones. Per org, entity and result
+(outcomes with different results are never merged), decision vectors are
+clustered greedily by cosine similarity, and each cluster of two or more is
+replaced by one point: the member closest to the cluster centre (its text
+and vector), with `count` holding how many outcomes it stands for and
+`variants` a few of the other phrasings. The originals are deleted from
+Qdrant and `org_context`.
+"""
+
+from qdrant_client.models import PointStruct
+from context.entity_state import entity_key
+from context.events import notify_context_changed
+from context.ingest import context_id, org_write_lock
+import clients
+import asyncio
+import numpy as np
+import os
+import re
+import time
+
+MAX_VARIANTS = 3
+PAGE_SIZE = 1000
+DELETE_CHUNK = 100
+
+RESULT = re.compile(r"\bResult:\s*(.*)$", re.S)
+
+
+def outcome_result(content: str) -> str:
+    """The normalized "Result: ..." part of an outcome, or "" if there is none"""
+    match = RESULT.search(content)
+    return " ".join(match.group(1).lower().split()).rstrip(".") if match else ""
+
+
+def _row_key(entity_name, content: str) -> tuple:
+    return entity_key(entity_name or ""), " ".join(content.split())
+
+
+def cluster(vectors: np.ndarray, threshold: float) -> list:
+    """
+    Greedy leader clustering: each vector joins the first cluster whose
+    leader it matches with cosine >= threshold. Returns lists of row indices.
+    """
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    unit = vectors / np.where(norms == 0, 1, norms)
+    leaders, clusters = [], []
+    for i, v in enumerate(unit):
+        if leaders:
+            scores = np.stack(leaders) @ v
+            best = int(np.argmax(scores))
+            if scores[best] >= threshold:
+                clusters[best].append(i)
+                continue
+        leaders.append(v)
+        clusters.append([i])
+    return clusters
+
+
+def _merge(org_id: str, records: list, members: list) -> PointStruct:
+    vectors = np.array([records[i].vector for i in members], dtype=np.float32)
+    centre = vectors.mean(axis=0)
+    medoid = records[members[int(np.argmax(vectors @ centre))]]
+    payload = dict(medoid.payload)
+    contents = [records[i].payload["content"] for i in members]
+    payload["count"] = sum(records[i].payload.get("count", 1) for i in members)
+    variants = {v for i in members for v in records[i].payload.get("variants", [])}
+    variants.update(contents)
+    variants.discard(payload["content"])
+    payload["variants"] = sorted(variants)[:MAX_VARIANTS]
+    point_id = context_id(
+        org_id, "decision", payload["content"], payload.get("entity_name")
+    )
+    return PointStruct(id=point_id, vector=medoid.vector, payload=payload)
+
+
+async def compact_decisions(
+    org_id: str, vectors, get_supabase=None, threshold: float = 0.92
+) -> dict:
+    """Merge near-duplicate decision points of an org; returns counts"""
+    get_supabase = get_supabase or clients.supabase
+    # Held across the read and the writes so queued outcomes can't raise
+    # the count of a point this pass is about to replace
+    async with org_write_lock(org_id):
+        return await _compact(org_id, vectors, get_supabase, threshold)
+
+
+async def _rows_to_delete(supabase, org_id: str, keys: set) -> list:
+    """IDs of the org's decision rows whose (entity, content) is in `keys`"""
+    ids, start = [], 0
+    while True:
+        result = await (
+            supabase.table("org_context")
+            .select("id, entity_name, content")
+            .eq("org_id", org_id)
+            .eq("context_type", "decision")
+            .order("id")
+            .range(start, start + PAGE_SIZE - 1)
+            .execute()
+        )
+        rows = result.data or []
+        ids += [r["id"] for r in rows if _row_key(r.get("entity_name"), r["content"]) in keys]
+        if len(rows) < PAGE_SIZE:
+            return ids
+        start += PAGE_SIZE
+
+
+async def _compact(org_id: str, vectors, get_supabase, threshold: float) -> dict:
+    start = time.perf_counter()
+    records = await vectors.scroll(org_id, ["decision"], with_vectors=True)
+
+    groups = {}
+    for i, record in enumerate(records):
+        payload = record.payload
+        key = (
+            entity_key(payload.get("entity_name") or ""),
+            outcome_result(payload["content"]),
+        )
+        groups.setdefault(key, []).append(i)
+
+    merged, merged_members, removed_ids = [], [], []
+    for indices in groups.values():
+        if len(indices) < 2:
+            continue
+        matrix = np.array([records[i].vector for i in indices], dtype=np.float32)
+        for members in cluster(matrix, threshold):
+            if len(members) < 2:
+                continue
+            members = [indices[m] for m in members]
+            point = _merge(org_id, records, members)
+            merged.append(point)
+            merged_members.extend(members)
+            removed_ids.extend(
+                records[i].id for i in members if str(records[i].id) != point.id
+            )
+
+    if merged:
+        supabase = await get_supabase()
+        # Write the merged points before deleting what they replace
+        await vectors.upsert(merged)
+        # Rows are found by entity and content, then deleted by ID, so rows
+        # written before IDs were content hashes are replaced too
+        keys = {
+            _row_key(records[i].payload.get("entity_name"), records[i].payload["content"])
+            for i in merged_members
+        }
+        row_ids = await _rows_to_delete(supabase, org_id, keys)
+        for i in range(0, len(row_ids), DELETE_CHUNK):
+            await (
+                supabase.table("org_context")
+                .delete()
+                .eq("org_id", org_id)
+                .in_("id", row_ids[i : i + DELETE_CHUNK])
+                .execute()
+            )
+        await supabase.table("org_context").upsert(
+            [
+                {
+                    "id": p.id,
+                    "org_id": org_id,
+                    "context_type": "decision",
+                    "entity_name": p.payload.get("entity_name"),
+                    "content": p.payload["content"],
+                    "metadata": {
+                        "count": p.payload["count"],
+                        "variants": p.payload["variants"],
+                    },
+                }
+                for p in merged
+            ],
+            on_conflict="id",
+        ).execute()
+        if removed_ids:
+            await vectors.delete(org_id, removed_ids)
+        notify_context_changed(org_id, "decision")
+
+    return {
+        "org_id": org_id,
+        "decisions_before": len(records),
+        "decisions_after": len(records) - len(removed_ids),
+        "clusters_merged": len(merged),
+        "wall_ms": round((time.perf_counter() - start) * 1000, 1),
+    }
+
+
+class CompactionJob:
+    """
+    Periodically compacts the decisions of orgs that received new ones.
+    `interval` of 0 disables the background loop.
+    """
+
+    def __init__(self, get_vectors, interval: float = 3600.0, threshold: float = 0.92):
+        self.get_vectors = get_vectors
+        self.interval = interval
+        self.threshold = threshold
+        self.dirty = set()
+        self._compacting = None
+        self._changes_while_compacting = 0
+        self._task = None
+        self.runs = 0
+        self.last = {}
+
+    @classmethod
+    def from_env(cls, get_vectors):
+        return cls(
+            get_vectors,
+            interval=float(os.getenv("COMPACTION_INTERVAL_SECONDS", "3600")),
+            threshold=float(os.getenv("COMPACTION_SIMILARITY", "0.92")),
+        )
+
+    def on_context_changed(self, org_id, context_type=None, entity_name=None):
+        if context_type != "decision":
+            return
+        if org_id == self._compacting:
+            self._changes_while_compacting += 1
+        else:
+            self.dirty.add(org_id)
+
+    async def start(self):
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run_once(self):
+        orgs, self.dirty = self.dirty, set()
+        for org_id in orgs:
+            # Compaction's own write must not mark the org dirty again, but
+            # decisions written by others during the pass must
+            self._compacting = org_id
+            self._changes_while_compacting = 0
+            try:
+                result = await compact_decisions(
+                    org_id, self.get_vectors(), threshold=self.threshold
+                )
+                self.last[org_id] = result
+                own = 1 if result["clusters_merged"] else 0
+                if self._changes_while_compacting > own:
+                    self.dirty.add(org_id)
+            except Exception as e:
+                self.dirty.add(org_id)
+                print(f"[WARN] Decision compaction failed for {org_id}: {e}")
+            finally:
+                self._compacting = None
+        self.runs += 1
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.run_once()
+
+    def stats(self) -> dict:
+        return {
+            "interval_seconds": self.interval,
+            "runs": self.runs,
+            "pending_orgs": len(self.dirty),
+            "last": self.last,
+        }
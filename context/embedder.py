@@ -0,0 +1,131 @@
+"""
+Embedding backends.
+
+Every vector written to or searched in Qdrant goes through an Embedder, so
+the backend can be swapped per deployment with EMBEDDER_BACKEND:
+
+- "gemini" (default): models/gemini-embedding-001 over the network
+- "local": a sentence-transformers model on CPU (torch or ONNX runtime)
+
+Each backend reports a `model_id`; vectors from different models live in
+different collections (see `collection_for`) and are never mixed.
+"""
+
+from google.genai import types
+import asyncio
+import clients
+import os
+import re
+
+BASE_COLLECTION = "genios_context"
+
+
+class GeminiEmbedder:
+    model_id = "models/gemini-embedding-001"
+    dim = 384  # must match the Qdrant collection
+    batch_limit = 100  # max texts per embed_content request
+
+    def __init__(self, client=None):
+        self.client = client or clients.gemini()
+
+    def _config(self, task_type: str):
+        return types.EmbedContentConfig(
+            task_type=task_type, output_dimensionality=self.dim
+        )
+
+    async def embed(self, texts: list, task_type: str = "RETRIEVAL_QUERY") -> list:
+        vectors = []
+        for start in range(0, len(texts), self.batch_limit):
+            result = await self.client.aio.models.embed_content(
+                model=self.model_id,
+                contents=texts[start : start + self.batch_limit],
+                config=self._config(task_type),
+            )
+            vectors.extend(e.values for e in result.embeddings)
+        return vectors
+
+
+class LocalEmbedder:
+    """
+    sentence-transformers model on CPU; needs `pip install sentence-transformers`
+    (plus `optimum[onnxruntime]` for LOCAL_EMBED_RUNTIME=onnx).
+    """
+
+    def __init__(
+        self,
+        model_name: str = None,
+        runtime: str = None,
+        batch_size: int = None,
+        threads: int = None,
+    ):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise ImportError(
+                "EMBEDDER_BACKEND=local requires sentence-transformers: "
+                "pip install sentence-transformers"
+            ) from e
+
+        self.model_name = model_name or os.getenv(
+            "LOCAL_EMBED_MODEL", "sentence-transformers/all-MiniLM-L6-v2"
+        )
+        runtime = runtime or os.getenv("LOCAL_EMBED_RUNTIME", "torch")
+        self.batch_size = batch_size or int(os.getenv("LOCAL_EMBED_BATCH_SIZE", "64"))
+        threads = threads or int(os.getenv("LOCAL_EMBED_THREADS", "0"))
+        if threads:
+            import torch
+
+            torch.set_num_threads(threads)
+
+        self.model = SentenceTransformer(
+            self.model_name, device="cpu", backend=runtime
+        )
+        self.dim = self.model.get_sentence_embedding_dimension()
+        self.model_id = f"local/{self.model_name}"
+        # One encode at a time; the model already uses all configured threads
+        self._lock = asyncio.Lock()
+
+    def embed_sync(self, texts: list, task_type: str = "RETRIEVAL_DOCUMENT") -> list:
+        vectors = self.model.encode(
+            list(texts),
+            batch_size=self.batch_size,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        )
+        return vectors.tolist()
+
+    async def embed(self, texts: list, task_type: str = "RETRIEVAL_QUERY") -> list:
+        async with self._lock:
+            return await asyncio.to_thread(self.embed_sync, texts, task_type)
+
+
+_embedder = None
+
+
+def get_embedder(client=None):
+    """The deployment's embedder, chosen by EMBEDDER_BACKEND"""
+    global _embedder
+    if client is not None:
+        return GeminiEmbedder(client)
+    if _embedder is None:
+        backend = os.getenv("EMBEDDER_BACKEND", "gemini").lower()
+        if backend == "local":
+            _embedder = LocalEmbedder()
+        elif backend == "gemini":
+            _embedder = GeminiEmbedder()
+        else:
+            raise ValueError(f"Unknown EMBEDDER_BACKEND: {backend}")
+    return _embedder
+
+
+def collection_for(embedder) -> str:
+    """
+    Qdrant collection holding this embedder's vectors.
+
+    The original Gemini collection keeps its name; any other model gets
+    its own suffixed collection.
+    """
+    if embedder.model_id == GeminiEmbedder.model_id:
+        return BASE_COLLECTION
+    slug = re.sub(r"[^a-z0-9]+", "_", embedder.model_id.lower()).strip("_")
+    return f"{BASE_COLLECTION}__{slug}"
@@ -0,0 +1,234 @@
+from collections import deque
+import asyncio
+import os
+
+# Rows per request when loading an org's names; stays under PostgREST's
+# max-rows cap (1000 by default), which would otherwise truncate silently
+PAGE_SIZE = int(os.getenv("ENTITY_INDEX_PAGE_SIZE", "1000"))
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+def _normalize(message: str):
+    """
+    Lowercased message with whitespace runs collapsed, as `add` normalizes
+    aliases, plus the index in `message` of each normalized character.
+    Lowercasing can change a character's length ("İ" becomes two), so it
+    is done one character at a time.
+    """
+    chars, origin = [], []
+    for i, char in enumerate(message):
+        if char.isspace():
+            if chars and chars[-1] == " ":
+                continue
+            chars.append(" ")
+            origin.append(i)
+            continue
+        for lowered in char.lower():
+            chars.append(lowered)
+            origin.append(i)
+    return "".join(chars), origin
+
+
+class EntityMatcher:
+    """
+    Aho-Corasick automaton over entity names and their aliases.
+
+    `find_all` scans a message once, in O(len(message) + matches), however
+    many entities are registered. Matches must sit on word boundaries
+    ("Amit" does not match inside "Amitabh") and are case-insensitive.
+    New names are added to the trie incrementally; failure links are
+    rebuilt lazily on the next scan.
+    """
+
+    def __init__(self):
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [[]]
+        self.report = [0]  # nearest failure-chain ancestor with outputs
+        self.names = set()
+        self._dirty = False
+
+    def add(self, alias: str, entity: str = None):
+        """Register `alias` as a way of mentioning `entity` (default: itself)"""
+        pattern = " ".join(alias.lower().split())
+        if not pattern:
+            return
+        entity = entity or alias
+        node = 0
+        for char in pattern:
+            nxt = self.goto[node].get(char)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[node][char] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append([])
+                self.report.append(0)
+                self._dirty = True
+            node = nxt
+        if (entity, len(pattern)) not in self.out[node]:
+            # Output links point at nodes with outputs, so a node's first
+            # output changes them; a known alias changes nothing
+            if not self.out[node]:
+                self._dirty = True
+            self.out[node].append((entity, len(pattern)))
+        self.names.add(entity)
+
+    def _build(self):
+        """Breadth-first computation of failure and output links"""
+        queue = deque()
+        for child in self.goto[0].values():
+            self.fail[child] = 0
+            self.report[child] = 0
+            queue.append(child)
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                state = self.fail[node]
+                while state and char not in self.goto[state]:
+                    state = self.fail[state]
+                target = self.goto[state].get(char, 0)
+                self.fail[child] = target
+                self.report[child] = (
+                    target if self.out[target] else self.report[target]
+                )
+        self._dirty = False
+
+    def find_all(self, message: str) -> list:
+        """Every mentioned entity as {"entity", "alias", "start", "end"}"""
+        if self._dirty:
+            self._build()
+        text, origin = _normalize(message)
+        matches = []
+        node = 0
+        for i, char in enumerate(text):
+            while node and char not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(char, 0)
+            state = node if self.out[node] else self.report[node]
+            while state:
+                for entity, length in self.out[state]:
+                    start, end = i - length + 1, i + 1
+                    if (start == 0 or not _is_word_char(text[start - 1])) and (
+                        end == len(text) or not _is_word_char(text[end])
+                    ):
+                        # Spans are reported against the original message
+                        start, end = origin[start], origin[end - 1] + 1
+                        matches.append(
+                            {
+                                "entity": entity,
+                                "alias": message[start:end],
+                                "start": start,
+                                "end": end,
+                            }
+                        )
+                state = self.report[state]
+
+        # Longest match wins where spans overlap ("Priya Shah" over "Priya")
+        matches.sort(key=lambda m: (m["start"], -(m["end"] - m["start"])))
+        result, covered_until = [], -1
+        for m in matches:
+            same_span = result and (m["start"], m["end"]) == (
+                result[-1]["start"],
+                result[-1]["end"],
+            )
+            if m["start"] >= covered_until or same_span:
+                result.append(m)
+                covered_until = max(covered_until, m["end"])
+        return result
+
+
+class EntityIndex:
+    """
+    Per-org entity matchers built from `entity_state` and `org_context`.
+
+    Each org's matcher is loaded on first use; entities written later
+    through store_context are added incrementally via context events.
+    """
+
+    def __init__(self, get_supabase, page_size: int = PAGE_SIZE):
+        self.get_supabase = get_supabase
+        self.page_size = page_size
+        self.matchers = {}
+        self._locks = {}
+
+    async def matcher(self, org_id: str) -> EntityMatcher:
+        matcher = self.matchers.get(org_id)
+        if matcher is not None:
+            return matcher
+        async with self._locks.setdefault(org_id, asyncio.Lock()):
+            if org_id not in self.matchers:
+                self.matchers[org_id] = await self._load(org_id)
+        return self.matchers[org_id]
+
+    async def _pages(self, build):
+        """Rows of `build()` (an ordered query) one `.range()` page at a time"""
+        start = 0
+        while True:
+            result = await build().range(start, start + self.page_size - 1).execute()
+            rows = result.data or []
+            if rows:
+                yield rows
+            if len(rows) < self.page_size:
+                return
+            start += self.page_size
+
+    async def _load(self, org_id: str) -> EntityMatcher:
+        supabase = await self.get_supabase()
+        matcher = EntityMatcher()
+
+        async def load_states():
+            pages = self._pages(
+                lambda: supabase.table("entity_state")
+                .select("entity_name, current_state")
+                .eq("org_id", org_id)
+                .order("id")
+            )
+            async for rows in pages:
+                for row in rows:
+                    name = row.get("entity_name")
+                    if not name:
+                        continue
+                    matcher.add(name)
+                    for alias in (row.get("current_state") or {}).get("aliases", []):
+                        matcher.add(alias, name)
+
+        async def load_context_names():
+            # PostgREST has no DISTINCT; ordering by name lets each page be
+            # reduced to its distinct names before touching the trie
+            pages = self._pages(
+                lambda: supabase.table("org_context")
+                .select("entity_name")
+                .eq("org_id", org_id)
+                .not_.is_("entity_name", "null")
+                .order("entity_name")
+                .order("id")
+            )
+            async for rows in pages:
+                for name in {row["entity_name"] for row in rows if row.get("entity_name")}:
+                    if name not in matcher.names:
+                        matcher.add(name)
+
+        await asyncio.gather(load_states(), load_context_names())
+        return matcher
+
+    def add_entity(self, org_id: str, name: str, aliases=()):
+        matcher = self.matchers.get(org_id)
+        if matcher is None:
+            return  # picked up when the org is first loaded
+        matcher.add(name)
+        for alias in aliases:
+            matcher.add(alias, name)
+
+    def on_context_changed(self, org_id: str, context_type=None, entity_name=None):
+        names = [entity_name] if isinstance(entity_name, str) else entity_name or []
+        for name in names:
+            self.add_entity(org_id, name)
+
+    async def extract(self, org_id: str, message: str) -> list:
+        matcher = await self.matcher(org_id)
+        return matcher.find_all(message)
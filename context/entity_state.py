@@ -0,0 +1,127 @@
+from context.cache import TTLCache
+import clients
+import os
+import re
+
+_NOT_FOUND = object()
+
+
+def entity_key(name: str) -> str:
+    """Normalized lookup key for an entity name"""
+    return " ".join(name.lower().split())
+
+
+def exact_pattern(name: str) -> str:
+    """ILIKE pattern matching `name` exactly (case-insensitive), no wildcards"""
+    return re.sub(r"([%_\\])", r"\\\1", " ".join(name.split()))
+
+
+class EntityStateCache:
+    """
+    Write-through cache of `entity_state.current_state` by (org_id, entity key).
+
+    Reads hit the database only on a miss, using an exact case-insensitive
+    match instead of a leading-wildcard scan. Unknown names are cached as
+    negatives for a shorter TTL. Entity-state writes (BulkIngester, used by
+    the webhook and data/seed.py) go through `put`; writes made by other
+    processes show up once the entry expires.
+    """
+
+    def __init__(self, get_supabase, maxsize=10000, ttl=600.0, negative_ttl=60.0):
+        self.get_supabase = get_supabase
+        self.states = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.negatives = TTLCache(maxsize=maxsize, ttl=negative_ttl)
+        self.db_reads = 0
+
+    @classmethod
+    def from_env(cls, get_supabase):
+        return cls(
+            get_supabase,
+            maxsize=int(os.getenv("ENTITY_CACHE_SIZE", "10000")),
+            ttl=float(os.getenv("ENTITY_CACHE_TTL_SECONDS", "600")),
+            negative_ttl=float(os.getenv("ENTITY_CACHE_NEGATIVE_TTL_SECONDS", "60")),
+        )
+
+    def _cached(self, key):
+        state = self.states.get(key, _NOT_FOUND)
+        if state is not _NOT_FOUND:
+            return state
+        if self.negatives.get(key, _NOT_FOUND) is not _NOT_FOUND:
+            return None
+        return _NOT_FOUND
+
+    async def get(self, org_id: str, entity_name: str):
+        key = (org_id, entity_key(entity_name))
+        state = self._cached(key)
+        if state is not _NOT_FOUND:
+            return state
+
+        supabase = await self.get_supabase()
+        self.db_reads += 1
+        result = (
+            await supabase.table("entity_state")
+            .select("entity_name, current_state")
+            .eq("org_id", org_id)
+            .ilike("entity_name", exact_pattern(entity_name))
+            .limit(1)
+            .execute()
+        )
+        if result.data:
+            state = result.data[0]["current_state"]
+            self.states.set(key, state)
+            return state
+        self.negatives.set(key, True)
+        return None
+
+    async def get_many(self, org_id: str, entity_names) -> dict:
+        """States for several names with at most one `in_` query for the misses"""
+        found, missing = {}, []
+        for name in set(entity_names):
+            state = self._cached((org_id, entity_key(name)))
+            if state is _NOT_FOUND:
+                missing.append(name)
+            else:
+                found[name] = state
+        if missing:
+            supabase = await self.get_supabase()
+            self.db_reads += 1
+            result = (
+                await supabase.table("entity_state")
+                .select("entity_name, current_state")
+                .eq("org_id", org_id)
+                .in_("entity_name", sorted(missing))
+                .execute()
+            )
+            rows = {entity_key(r["entity_name"]): r["current_state"] for r in result.data or []}
+            for key, state in rows.items():
+                self.states.set((org_id, key), state)
+            # `in_` is case-sensitive; resolve the rest one by one
+            for name in missing:
+                state = rows.get(entity_key(name), _NOT_FOUND)
+                found[name] = (
+                    await self.get(org_id, name) if state is _NOT_FOUND else state
+                )
+        return found
+
+    def put(self, org_id: str, entity_name: str, state: dict):
+        key = (org_id, entity_key(entity_name))
+        self.negatives.pop(key)
+        self.states.set(key, state)
+
+    def stats(self) -> dict:
+        return {
+            "states": self.states.stats(),
+            "negatives": self.negatives.stats(),
+            "db_reads": self.db_reads,
+        }
+
+
+_cache = None
+
+
+def get_entity_state_cache() -> EntityStateCache:
+    """Process-wide cache shared by the retriever and the ingester"""
+    global _cache
+    if _cache is None:
+        _cache = EntityStateCache.from_env(clients.supabase)
+    return _cache
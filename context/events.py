@@ -0,0 +1,26 @@
+"""Process-wide notifications for changes to an org's stored context"""
+
+_listeners = []
+_versions = {}
+
+
+def subscribe(listener):
+    """
+    Register `listener(org_id, context_type, entity_name)` for context writes.
+    Bulk writes pass a list of entity names (possibly empty) as `entity_name`.
+    """
+    _listeners.append(listener)
+
+
+def org_version(org_id: str) -> int:
+    """Monotonic counter bumped on every context write for the org"""
+    return _versions.get(org_id, 0)
+
+
+def notify_context_changed(org_id: str, context_type: str = None, entity_name=None):
+    _versions[org_id] = _versions.get(org_id, 0) + 1
+    for listener in list(_listeners):
+        try:
+            listener(org_id, context_type, entity_name)
+        except Exception as e:
+            print(f"[WARN] Context change listener failed: {e}")
@@ -0,0 +1,359 @@
+"""
+Bulk context ingestion.
+
+Reads items from JSONL or CSV and writes them in batches: one embedding
+call, one multi-row Supabase upsert and one Qdrant upsert per batch, with
+at most `concurrency` batches in flight. Items look like
+
+    {"context_type": "relationship", "entity_name": "Rahul",
+     "entity_type": "investor", "content": "...", "entity_state": {...}}
+
+`content` makes an org_context row + vector point; `entity_state` is merged
+into the entity's current state (either may be omitted). CSV columns map to
+the same keys, `entity_state` as a JSON string; other columns go to
+`metadata`.
+
+Row and point IDs are derived from the item (uuid5 of org, type, entity and
+content), so re-running an ingest overwrites instead of duplicating.
+Completed batches are recorded in a checkpoint file, and a resumed run
+skips them.
+"""
+
+from qdrant_client.models import PointStruct
+from context.embedder import get_embedder
+from context.entity_state import entity_key, exact_pattern, get_entity_state_cache
+from context.events import notify_context_changed
+from context.policies import compile_policy
+from context.vector_store import get_vector_store
+import clients
+import asyncio
+import csv
+import json
+import os
+import time
+import uuid
+
+# Namespace for deterministic org_context / point IDs
+CONTEXT_NAMESPACE = uuid.UUID("6f1c2a8e-3b4d-5e6f-8a9b-0c1d2e3f4a5b")
+
+ITEM_FIELDS = ("context_type", "entity_name", "entity_type", "content", "entity_state")
+
+
+def context_id(org_id: str, context_type: str, content: str, entity_name=None) -> str:
+    """Stable ID for a piece of context, shared by its row and its point"""
+    key = "\x1f".join(
+        [org_id, context_type, entity_key(entity_name or ""), " ".join(content.split())]
+    )
+    return str(uuid.uuid5(CONTEXT_NAMESPACE, key))
+
+
+_org_locks = {}
+
+
+def org_write_lock(org_id: str) -> asyncio.Lock:
+    """
+    Serializes read-modify-write passes over an org's decision points
+    (outcome counting, compaction) within this process
+    """
+    lock = _org_locks.get(org_id)
+    if lock is None:
+        lock = _org_locks[org_id] = asyncio.Lock()
+    return lock
+
+
+def entity_state_id(org_id: str, entity_name: str) -> str:
+    return str(uuid.uuid5(CONTEXT_NAMESPACE, f"{org_id}\x1fentity\x1f{entity_key(entity_name)}"))
+
+
+def _from_csv_row(row: dict) -> dict:
+    item = {k: v for k, v in row.items() if k in ITEM_FIELDS and v not in (None, "")}
+    if "entity_state" in item:
+        item["entity_state"] = json.loads(item["entity_state"])
+    metadata = {k: v for k, v in row.items() if k not in ITEM_FIELDS and v not in (None, "")}
+    if metadata:
+        item["metadata"] = metadata
+    return item
+
+
+def read_items(path: str) -> list:
+    """Items from a .jsonl/.ndjson or .csv file"""
+    with open(path, newline="") as f:
+        if path.lower().endswith(".csv"):
+            return [_from_csv_row(row) for row in csv.DictReader(f)]
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class Checkpoint:
+    """Completed batch numbers for one source, saved after every batch"""
+
+    def __init__(self, path: str, batch_size: int):
+        self.path = path
+        self.batch_size = batch_size
+        self.done = set()
+        if path and os.path.exists(path):
+            with open(path) as f:
+                saved = json.load(f)
+            # Batch numbers only line up if the batch size is unchanged
+            if saved.get("batch_size") == batch_size:
+                self.done = set(saved.get("done", []))
+            else:
+                print(f"[WARN] Ignoring checkpoint {path}: batch size changed")
+
+    def save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"batch_size": self.batch_size, "done": sorted(self.done)}, f)
+        os.replace(tmp, self.path)
+
+    def clear(self):
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class BulkIngester:
+    def __init__(
+        self,
+        embedder=None,
+        vectors=None,
+        get_supabase=None,
+        batch_size: int = 100,
+        concurrency: int = 4,
+        max_retries: int = 3,
+    ):
+        self.embedder = embedder or get_embedder()
+        self.vectors = vectors or get_vector_store()
+        self.get_supabase = get_supabase or clients.supabase
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+
+    @classmethod
+    def from_env(cls, **kwargs):
+        return cls(
+            batch_size=int(os.getenv("INGEST_BATCH_SIZE", "100")),
+            concurrency=int(os.getenv("INGEST_CONCURRENCY", "4")),
+            **kwargs,
+        )
+
+    async def _write_context(self, org_id: str, items: list, count_repeats=False):
+        # The same ID twice in one upsert is an error, so repeats are folded
+        unique, repeats = {}, {}
+        for item in items:
+            point_id = context_id(
+                org_id, item["context_type"], item["content"], item.get("entity_name")
+            )
+            unique.setdefault(point_id, item)
+            repeats[point_id] = repeats.get(point_id, 0) + 1
+
+        existing = {}
+        if count_repeats:
+            existing = {
+                str(r.id): r.payload for r in await self.vectors.retrieve(list(unique))
+            }
+
+        texts = [item["content"] for item in unique.values()]
+        vectors = await self.embedder.embed(texts, "RETRIEVAL_DOCUMENT")
+        rows, points = [], []
+        for (point_id, item), vector in zip(unique.items(), vectors):
+            row = {
+                "id": point_id,
+                "org_id": org_id,
+                "context_type": item["context_type"],
+                "entity_name": item.get("entity_name"),
+                "content": item["content"],
+            }
+            if item.get("metadata"):
+                row["metadata"] = item["metadata"]
+            rows.append(row)
+
+            payload = {
+                "org_id": org_id,
+                "context_type": item["context_type"],
+                "entity_name": item.get("entity_name"),
+                "content": item["content"],
+                "embedding_model": self.embedder.model_id,
+            }
+            if item["context_type"] == "policy":
+                payload["predicate"] = compile_policy(item["content"])
+            if count_repeats:
+                # Repeated outcomes raise the count (kept by compaction too)
+                seen = existing.get(point_id, {})
+                payload["count"] = seen.get("count", 1 if seen else 0) + repeats[point_id]
+                if seen.get("variants"):
+                    payload["variants"] = seen["variants"]
+            points.append(PointStruct(id=point_id, vector=vector, payload=payload))
+
+        supabase = await self.get_supabase()
+        await supabase.table("org_context").upsert(rows, on_conflict="id").execute()
+        await self.vectors.upsert(points)
+
+    async def _write_entity_states(self, org_id: str, items: list):
+        """Merge states into existing rows (matched by name, case-insensitively) or new ones"""
+        states = {}
+        for item in items:
+            name = item["entity_name"]
+            key = entity_key(name)
+            seen = states.get(key)
+            states[key] = {
+                "entity_name": seen["entity_name"] if seen else name,
+                "entity_type": item.get("entity_type") or (seen or {}).get("entity_type"),
+                "state": {**(seen or {}).get("state", {}), **item["entity_state"]},
+            }
+
+        supabase = await self.get_supabase()
+        existing = await (
+            supabase.table("entity_state")
+            .select("id, entity_name, entity_type, current_state")
+            .eq("org_id", org_id)
+            .in_("entity_name", [s["entity_name"] for s in states.values()])
+            .execute()
+        )
+        current = {entity_key(r["entity_name"]): r for r in existing.data}
+        # Names stored with different casing need the case-insensitive lookup
+        missing = [s["entity_name"] for k, s in states.items() if k not in current]
+        found = await asyncio.gather(
+            *(
+                supabase.table("entity_state")
+                .select("id, entity_name, entity_type, current_state")
+                .eq("org_id", org_id)
+                .ilike("entity_name", exact_pattern(name))
+                .limit(1)
+                .execute()
+                for name in missing
+            )
+        )
+        for name, result in zip(missing, found):
+            if result.data:
+                current[entity_key(name)] = result.data[0]
+
+        rows = []
+        for key, new in states.items():
+            row = current.get(key)
+            rows.append(
+                {
+                    "id": row["id"] if row else entity_state_id(org_id, new["entity_name"]),
+                    "org_id": org_id,
+                    "entity_type": new["entity_type"]
+                    or (row or {}).get("entity_type")
+                    or "unknown",
+                    "entity_name": row["entity_name"] if row else new["entity_name"],
+                    "current_state": {
+                        **((row or {}).get("current_state") or {}),
+                        **new["state"],
+                    },
+                }
+            )
+        await supabase.table("entity_state").upsert(rows, on_conflict="id").execute()
+
+        cache = get_entity_state_cache()
+        for row in rows:
+            cache.put(org_id, row["entity_name"], row["current_state"])
+
+    async def _write_batch(
+        self, org_id: str, items: list, count_repeats=False, done: set = None
+    ):
+        """
+        Write a batch's context, then its entity states. Finished parts are
+        added to `done` and skipped on a retry, so a retry after a partial
+        failure does not count repeated outcomes twice.
+        """
+        done = set() if done is None else done
+        with_content = [i for i in items if i.get("content")]
+        with_state = [i for i in items if i.get("entity_state") and i.get("entity_name")]
+        if with_content and "context" not in done:
+            await self._write_context(org_id, with_content, count_repeats)
+            done.add("context")
+        if with_state and "entity_state" not in done:
+            await self._write_entity_states(org_id, with_state)
+            done.add("entity_state")
+
+    async def ingest(
+        self, org_id: str, items: list, checkpoint_path: str = None, count_repeats=False
+    ) -> dict:
+        """
+        Ingest `items` for an org. Returns counts; failed batches are left
+        out of the checkpoint so a re-run retries them.
+
+        With `count_repeats`, content that already exists has its payload
+        `count` raised instead of being overwritten as is (for outcomes that
+        genuinely happened again, not for re-running an import).
+        """
+        start = time.perf_counter()
+        items = [self._validate(i) for i in items]
+        batches = [
+            items[i : i + self.batch_size] for i in range(0, len(items), self.batch_size)
+        ]
+        checkpoint = Checkpoint(checkpoint_path, self.batch_size)
+        skipped = len(checkpoint.done & set(range(len(batches))))
+        semaphore = asyncio.Semaphore(self.concurrency)
+        failed = []
+        written = []
+
+        async def run(number, batch):
+            async with semaphore:
+                done = set()
+                for attempt in range(self.max_retries):
+                    try:
+                        await self._write_batch(org_id, batch, count_repeats, done)
+                        checkpoint.done.add(number)
+                        checkpoint.save()
+                        written.extend(batch)
+                        return
+                    except Exception as e:
+                        print(
+                            f"[WARN] Ingest batch {number} failed "
+                            f"(attempt {attempt + 1}/{self.max_retries}): {e}"
+                        )
+                        if attempt + 1 < self.max_retries:
+                            await asyncio.sleep(0.5 * 2**attempt)
+                failed.append(number)
+
+        await asyncio.gather(
+            *(run(n, b) for n, b in enumerate(batches) if n not in checkpoint.done)
+        )
+
+        # One invalidation per context type instead of one per item; each
+        # carries the names of the entities written (for the entity index)
+        names = {}
+        for item in items:
+            if item.get("content"):
+                names.setdefault(item["context_type"], set())
+            if item.get("entity_state"):
+                names.setdefault("entity_state", set())
+        for item in written:
+            if item.get("entity_name"):
+                if item.get("content"):
+                    names[item["context_type"]].add(item["entity_name"])
+                if item.get("entity_state"):
+                    names["entity_state"].add(item["entity_name"])
+        for context_type, entity_names in names.items():
+            notify_context_changed(org_id, context_type, sorted(entity_names))
+        if not failed:
+            checkpoint.clear()
+
+        return {
+            "org_id": org_id,
+            "items": len(items),
+            "batches": len(batches),
+            "batches_skipped": skipped,
+            "batches_failed": sorted(failed),
+            "wall_ms": round((time.perf_counter() - start) * 1000, 1),
+        }
+
+    @staticmethod
+    def _validate(item: dict) -> dict:
+        if item.get("content") and not item.get("context_type"):
+            raise ValueError(f"Item has content but no context_type: {item}")
+        if item.get("entity_state") is not None and not item.get("entity_name"):
+            raise ValueError(f"Item has entity_state but no entity_name: {item}")
+        if not item.get("content") and item.get("entity_state") is None:
+            raise ValueError(f"Item has neither content nor entity_state: {item}")
+        return item
+
+
+def default_checkpoint(org_id: str, source: str) -> str:
+    name = os.path.basename(source)
+    return os.path.join(os.getenv("INGEST_CHECKPOINT_DIR", ".ingest"), f"{org_id}-{name}.json")
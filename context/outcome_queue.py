@@ -0,0 +1,180 @@
+from context.cache import TTLCache
+from context.ingest import org_write_lock
+import asyncio
+import hashlib
+import json
+import os
+import time
+
+
+class OutcomeQueue:
+    """
+    Background, batched ingestion of OpenClaw task outcomes.
+
+    The webhook only enqueues; a worker collects up to `batch_size` outcomes
+    (or whatever arrived within `flush_interval` seconds) and writes them
+    through the bulk ingester, so a burst costs a few batched embedding
+    calls and upserts instead of one of each per outcome. Payloads identical
+    to one still queued or written in the last `dedup_ttl` seconds are
+    dropped. When the queue is full, `submit` waits up to `submit_timeout`
+    and then refuses the outcome so the caller can retry later. Entities
+    named in written outcomes reach the entity index through the
+    ingester's context notifications, as they did with store_context.
+    """
+
+    def __init__(
+        self,
+        get_ingester,
+        max_queue: int = 10000,
+        batch_size: int = 100,
+        flush_interval: float = 0.5,
+        submit_timeout: float = 0.05,
+        dedup_ttl: float = 600.0,
+    ):
+        self.get_ingester = get_ingester
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.submit_timeout = submit_timeout
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.recent = TTLCache(maxsize=max_queue, ttl=dedup_ttl)
+        self._pending = {}  # dedup key -> enqueue time, oldest first
+        self._task = None
+        self._closing = False
+        self.accepted = 0
+        self.deduplicated = 0
+        self.rejected = 0
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+        self.last_lag_ms = None
+        self.max_lag_ms = 0.0
+
+    @classmethod
+    def from_env(cls, get_ingester):
+        return cls(
+            get_ingester,
+            max_queue=int(os.getenv("WEBHOOK_QUEUE_SIZE", "10000")),
+            batch_size=int(os.getenv("WEBHOOK_BATCH_SIZE", "100")),
+            flush_interval=float(os.getenv("WEBHOOK_FLUSH_INTERVAL_SECONDS", "0.5")),
+            dedup_ttl=float(os.getenv("WEBHOOK_DEDUP_TTL_SECONDS", "600")),
+        )
+
+    async def start(self):
+        if self._task is None:
+            self._closing = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Write everything still queued, then stop the background task"""
+        if self._task is None:
+            return
+        self._closing = True
+        await self._task
+        self._task = None
+
+    @staticmethod
+    def _key(org_id: str, item: dict) -> str:
+        raw = json.dumps([org_id, item], sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    async def submit(self, org_id: str, item: dict) -> str:
+        """Returns "queued", "duplicate" or "rejected" (queue full)"""
+        key = self._key(org_id, item)
+        if key in self._pending or self.recent.peek(key) is not None:
+            self.deduplicated += 1
+            return "duplicate"
+        entry = (key, org_id, item, time.monotonic())
+        self._pending[key] = entry[3]
+        try:
+            self.queue.put_nowait(entry)
+        except asyncio.QueueFull:
+            try:
+                await asyncio.wait_for(self.queue.put(entry), self.submit_timeout)
+            except asyncio.TimeoutError:
+                del self._pending[key]
+                self.rejected += 1
+                return "rejected"
+        self.accepted += 1
+        return "queued"
+
+    async def _run(self):
+        while not (self._closing and self.queue.empty()):
+            batch = await self._next_batch()
+            if not batch:
+                continue
+            try:
+                await self._flush(batch)
+            except Exception as e:
+                self.failed += len(batch)
+                print(f"[ERROR] Dropped {len(batch)} webhook outcomes: {e}")
+            finally:
+                for key, *_ in batch:
+                    self._pending.pop(key, None)
+
+    async def _next_batch(self) -> list:
+        """Collect up to `batch_size` outcomes, waiting at most `flush_interval`"""
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            if self._closing and self.queue.empty():
+                break
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _flush(self, batch: list):
+        by_org = {}
+        for key, org_id, item, _ in batch:
+            by_org.setdefault(org_id, []).append((key, item))
+
+        ingester = self.get_ingester()
+        for org_id, entries in by_org.items():
+            # Counts are read, raised and written back; compaction must not
+            # delete or merge these points in between
+            async with org_write_lock(org_id):
+                result = await ingester.ingest(
+                    org_id, [item for _, item in entries], count_repeats=True
+                )
+            size = ingester.batch_size
+            failed = {
+                i
+                for n in result["batches_failed"]
+                for i in range(n * size, min((n + 1) * size, len(entries)))
+            }
+            for i, (key, _) in enumerate(entries):
+                if i in failed:
+                    self.failed += 1
+                else:
+                    self.recent.set(key, True)
+                    self.written += 1
+            if failed:
+                print(f"[ERROR] Dropped {len(failed)} webhook outcomes for {org_id}")
+
+        self.batches += 1
+        self.last_lag_ms = (time.monotonic() - min(e[3] for e in batch)) * 1000
+        self.max_lag_ms = max(self.max_lag_ms, self.last_lag_ms)
+
+    def stats(self) -> dict:
+        oldest = next(iter(self._pending.values()), None)
+        return {
+            "queue_depth": self.queue.qsize(),
+            "in_flight": len(self._pending) - self.queue.qsize(),
+            "oldest_pending_ms": (
+                round((time.monotonic() - oldest) * 1000, 1) if oldest else 0.0
+            ),
+            "last_batch_lag_ms": (
+                round(self.last_lag_ms, 1) if self.last_lag_ms is not None else None
+            ),
+            "max_batch_lag_ms": round(self.max_lag_ms, 1),
+            "accepted": self.accepted,
+            "deduplicated": self.deduplicated,
+            "rejected": self.rejected,
+            "written": self.written,
+            "failed": self.failed,
+            "batches": self.batches,
+        }
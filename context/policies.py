@@ -0,0 +1,182 @@
+"""
+Policy compilation and evaluation.
+
+Free-text policies are compiled once, when they are stored, into a small
+JSON predicate kept next to the text in the vector payload:
+
+    {"action": "contact",
+     "when": [["last_contact_days_ago", "<", 6]],
+     "unless": [["responded", "==", true]],
+     "effect": "ESCALATE",
+     "flag": "follow_up_frequency_exceeded"}
+
+A policy is violated when the intent performs `action`, every `when`
+condition holds on the entity state and no `unless` condition does.
+Policies the compiler does not recognise get no predicate and stay
+LLM-interpreted. At request time an org's predicates are evaluated
+together, as numpy comparisons over an (entities x conditions) matrix.
+"""
+
+import re
+import numpy as np
+
+CONTACT_ACTION = re.compile(
+    r"\b(reach out|follow[- ]?up|contact|email|e-mail|message|ping|call|reconnect"
+    r"|write to|send|pitch|nudge|check in)\b"
+)
+ACTIONS = {"contact": CONTACT_ACTION}
+
+_CONTACT_VERBS = r"(follow up with|follow-up with|contact|reach out to|email|message)"
+_FREQUENCY = re.compile(
+    r"\b(?:maximum|at most|no more than)\s+once\s+every\s+(\d+)\s+days?\b"
+    r"(?P<unless>.*\bunless\b.*\brespon\w*)?"
+)
+_SAID_NO = re.compile(
+    rf"\b(?:do not|don't|never)\s+{_CONTACT_VERBS}\b.*\bsaid no\b"
+    r"(?:.*?\b(?:last|past)\s+(\d+)\s+days?\b)?"
+)
+
+_OPS = {
+    "<": np.less,
+    "<=": np.less_equal,
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "==": np.equal,
+}
+
+
+def compile_policy(content: str):
+    """Predicate for a policy text, or None if it needs the LLM"""
+    text = " ".join(content.lower().split())
+
+    match = _FREQUENCY.search(text)
+    if match:
+        return {
+            "action": "contact",
+            "when": [["last_contact_days_ago", "<", int(match.group(1))]],
+            "unless": [["responded", "==", True]] if match.group("unless") else [],
+            "effect": "ESCALATE",
+            "flag": "follow_up_frequency_exceeded",
+        }
+
+    match = _SAID_NO.search(text)
+    if match:
+        when = [["said_no", "==", True]]
+        if match.group(2):
+            when.append(["last_contact_days_ago", "<=", int(match.group(2))])
+        return {
+            "action": "contact",
+            "when": when,
+            "unless": [],
+            "effect": "BLOCK",
+            "flag": "investor_said_no",
+        }
+
+    return None
+
+
+def _number(value) -> float:
+    """Entity-state field as a float; missing or non-numeric fields are NaN"""
+    if isinstance(value, bool):
+        return 1.0 if value else 0.0
+    if isinstance(value, (int, float)):
+        return float(value)
+    return np.nan
+
+
+class PolicySet:
+    """An org's compiled predicates, laid out as condition columns"""
+
+    def __init__(self, policies: list):
+        self.policies = [p for p in policies if p.get("predicate")]
+        fields, ops, values, owners, is_unless = [], [], [], [], []
+        for i, policy in enumerate(self.policies):
+            predicate = policy["predicate"]
+            conditions = [(c, False) for c in predicate["when"]]
+            conditions += [(c, True) for c in predicate.get("unless", [])]
+            for (field, op, value), unless in conditions:
+                fields.append(field)
+                ops.append(op)
+                values.append(_number(value))
+                owners.append(i)
+                is_unless.append(unless)
+
+        self.fields = fields
+        self.ops = np.array(ops, dtype=object)
+        self.values = np.array(values, dtype=np.float64)
+        self.is_unless = np.array(is_unless, dtype=bool)
+        # (conditions x policies) one-hot ownership, split by condition kind
+        owner = np.zeros((len(fields), len(self.policies)), dtype=np.int32)
+        owner[np.arange(len(fields)), owners] = 1
+        self.when_owner = owner * ~self.is_unless[:, None]
+        self.unless_owner = owner * self.is_unless[:, None]
+
+    def __len__(self):
+        return len(self.policies)
+
+    def evaluate_many(self, states: list):
+        """
+        (violated, satisfied) boolean matrices of shape (states x policies).
+
+        A policy is satisfied when one of its `when` conditions is known to
+        fail or one of its `unless` conditions holds, and violated when all
+        `when` conditions hold and every `unless` field is known not to.
+        Anything else (fields missing from the state) is neither.
+        """
+        x = np.array(
+            [[_number((s or {}).get(f)) for f in self.fields] for s in states],
+            dtype=np.float64,
+        ).reshape(len(states), len(self.fields))
+        holds = np.zeros(x.shape, dtype=bool)
+        with np.errstate(invalid="ignore"):
+            for op, compare in _OPS.items():
+                columns = self.ops == op
+                if columns.any():
+                    holds[:, columns] = compare(x[:, columns], self.values[columns])
+        missing = np.isnan(x)
+
+        holding_when = holds.astype(np.int32) @ self.when_owner
+        failed_when = (~holds & ~missing).astype(np.int32) @ self.when_owner
+        matched_unless = holds.astype(np.int32) @ self.unless_owner
+        missing_unless = missing.astype(np.int32) @ self.unless_owner
+
+        all_when = holding_when == self.when_owner.sum(axis=0)
+        satisfied = (failed_when > 0) | (matched_unless > 0)
+        violated = all_when & ~satisfied & (missing_unless == 0)
+        return violated, satisfied
+
+    def check(self, intent: str, entity_state) -> list:
+        """
+        Status of each compiled policy for one request, as
+        {"id", "content", "status", "effect", "flag"} with status
+        "violated", "satisfied", "unknown" (the entity state can't tell) or
+        "not_applicable" (the intent doesn't perform the policy's action).
+        """
+        if not self.policies:
+            return []
+        text = intent.lower()
+        violated, satisfied = self.evaluate_many([entity_state])
+        results = []
+        for i, policy in enumerate(self.policies):
+            predicate = policy["predicate"]
+            pattern = ACTIONS.get(predicate["action"])
+            if pattern is not None and not pattern.search(text):
+                status = "not_applicable"
+            elif not isinstance(entity_state, dict):
+                status = "unknown"
+            elif violated[0, i]:
+                status = "violated"
+            elif satisfied[0, i]:
+                status = "satisfied"
+            else:
+                status = "unknown"
+            results.append(
+                {
+                    "id": policy.get("id"),
+                    "content": policy["content"],
+                    "status": status,
+                    "effect": predicate["effect"],
+                    "flag": predicate["flag"],
+                }
+            )
+        return results
@@ -1,86 +1,271 @@
-from qdrant_client import QdrantClient
-from supabase import create_client
-from google import genai
-from google.genai import types
+from context.cache import TTLCache
+import clients
+from context.embedder import collection_for, get_embedder
+from context.entity_state import EntityStateCache, get_entity_state_cache
+from context.events import subscribe
+from context.snapshot import SnapshotStore
+from context.vector_store import get_vector_store, make_vector_store
+from context.stages import run_stages, timed
+import asyncio
 import os
 
 
+# Context types ranked by vector search; profiles/policies come from snapshots
+SEARCHED_TYPES = ["relationship", "decision"]
+
+
+def normalize_text(text: str) -> str:
+    """Case- and whitespace-insensitive form of a text, used as a cache key"""
+    return " ".join(text.lower().split())
+
+
 class ContextRetriever:
-    def __init__(self):
-        self.qdrant = QdrantClient(
-            url=os.getenv("QDRANT_URL"), api_key=os.getenv("QDRANT_API_KEY")
-        )
+    def __init__(self, qdrant=None, supabase=None, client=None, embedder=None):
+        # Overrides the shared Supabase client (see clients.py)
+        self.supabase = supabase
+
+        # `client` overrides the Gemini client of the default embedder
+        self.embedder = embedder or get_embedder(client)
 
-        self.supabase = create_client(
-            os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY")
+        # `qdrant` overrides the shared vector store with one on that client
+        if qdrant is None:
+            self.vectors = get_vector_store()
+        else:
+            self.vectors = make_vector_store(
+                qdrant, collection_for(self.embedder), self.embedder.dim
+            )
+
+        # Profiles and policies are pinned per org; vector search only
+        # ranks the open-ended context types
+        self.snapshots = SnapshotStore(self.vectors)
+        subscribe(self.snapshots.on_context_changed)
+        self.search_limit = int(os.getenv("RETRIEVAL_LIMIT", "5"))
+
+        # Entity state is read through an in-process cache keyed by
+        # (org_id, normalized name); the injected client gets its own cache
+        if supabase is None:
+            self.entity_states = get_entity_state_cache()
+        else:
+            self.entity_states = EntityStateCache.from_env(self._get_supabase)
+
+        # Independent retrieval stages run concurrently unless disabled
+        self.concurrent_stages = os.getenv("RETRIEVAL_CONCURRENT_STAGES", "1") != "0"
+
+        # Agents repeat the same intents; cache their query embeddings
+        self.embed_cache = None
+        if os.getenv("EMBED_CACHE_ENABLED", "1") != "0":
+            self.embed_cache = TTLCache(
+                maxsize=int(os.getenv("EMBED_CACHE_SIZE", "2048")),
+                ttl=float(os.getenv("EMBED_CACHE_TTL_SECONDS", "3600")),
+            )
+
+    async def _get_supabase(self):
+        if self.supabase is not None:
+            return self.supabase
+        return await clients.supabase()
+
+    def _embed_key(self, intent: str):
+        return (
+            normalize_text(intent),
+            self.embedder.model_id,
+            "RETRIEVAL_QUERY",
+            self.embedder.dim,
         )
 
-        self.client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
-
-    def get_context(self, intent: str, org_id: str, entity_name: str = None):
-        """Retrieve structured context with metadata"""
-        # Generate embedding using Gemini API (384 dimensions to match Qdrant)
-        result = self.client.models.embed_content(
-            model="models/gemini-embedding-001",
-            contents=intent,
-            config=types.EmbedContentConfig(
-                task_type="RETRIEVAL_QUERY",
-                output_dimensionality=384,
+    async def embed_query(self, intent: str):
+        """Embed an intent for retrieval, served from the cache when possible"""
+        return (await self.embed_queries([intent]))[0]
+
+    async def embed_queries(self, intents: list) -> list:
+        """Embed many intents with as few embedding calls as possible"""
+        keys = [self._embed_key(i) for i in intents]
+        vectors = [None] * len(intents)
+        if self.embed_cache is not None:
+            vectors = [self.embed_cache.get(key) for key in keys]
+
+        # Embed each distinct uncached text once
+        missing = {}
+        for i, vector in enumerate(vectors):
+            if vector is None:
+                missing.setdefault(keys[i], []).append(i)
+        if missing:
+            pending = list(missing)
+            embedded = await self.embedder.embed(
+                [intents[missing[key][0]] for key in pending], "RETRIEVAL_QUERY"
+            )
+            for key, vector in zip(pending, embedded):
+                if self.embed_cache is not None:
+                    self.embed_cache.set(key, vector)
+                for i in missing[key]:
+                    vectors[i] = vector
+        return vectors
+
+    async def _vector_search(
+        self, intent: str, org_id: str, timings: dict = None, embedding: dict = None
+    ):
+        """Embed the intent, then search Qdrant (the only dependent chain)"""
+        vector = await timed("embed", self.embed_query(intent), timings)
+        if embedding is not None:
+            embedding["vector"] = vector
+
+        return await timed(
+            "qdrant_search",
+            self.vectors.search(
+                vector, org_id, limit=self.search_limit, context_types=SEARCHED_TYPES
             ),
+            timings,
         )
-        vector = result.embeddings[0].values
 
-        from qdrant_client.models import Filter, FieldCondition, MatchValue
+    async def _fetch_entity_state(self, org_id: str, entity_name: str):
+        return await self.entity_states.get(org_id, entity_name)
 
-        results = self.qdrant.query_points(
-            collection_name="genios_context",
-            query=vector,
-            limit=8,
-            query_filter=Filter(
-                must=[FieldCondition(key="org_id", match=MatchValue(value=org_id))]
-            ),
+    async def get_context(
+        self,
+        intent: str,
+        org_id: str,
+        entity_name: str = None,
+        timings: dict = None,
+        embedding: dict = None,
+    ):
+        """
+        Retrieve structured context with metadata.
+
+        Stages that don't depend on each other (embed -> vector search, entity
+        state, pinned profile/policy snapshot) run concurrently. Pass a dict
+        as `timings` to receive per-stage latency in milliseconds, and as
+        `embedding` to receive the intent's query vector under "vector".
+        """
+        stages = {
+            "vector": self._vector_search(intent, org_id, timings, embedding),
+            "pinned": self.snapshots.get(org_id),
+        }
+        # Fetch entity state if entity mentioned
+        if entity_name:
+            stages["entity_state"] = self._fetch_entity_state(org_id, entity_name)
+
+        results = await run_stages(
+            stages, timings=timings, concurrent=self.concurrent_stages
+        )
+        return self._build_context(
+            intent, results["vector"], results["pinned"], results.get("entity_state")
+        )
+
+    async def get_context_batch(
+        self, items: list, timings: dict = None, embedding: dict = None
+    ) -> list:
+        """
+        Retrieve context for many (intent, org_id, entity_name) items at once.
+
+        Intents are embedded in one batched call and searched with a single
+        Qdrant batch query; profiles/policies are fetched once per org and
+        entity states come from the cache, with one `in_` query per org for
+        misses. Returns contexts in order; `embedding` receives the query
+        vectors under "vectors".
+        """
+
+        async def vector_branch():
+            vectors = await timed(
+                "embed", self.embed_queries([i[0] for i in items]), timings
+            )
+            if embedding is not None:
+                embedding["vectors"] = vectors
+            return await timed(
+                "qdrant_search",
+                self.vectors.search_batch(
+                    [(vector, org_id) for vector, (_, org_id, _) in zip(vectors, items)],
+                    limit=self.search_limit,
+                    context_types=SEARCHED_TYPES,
+                ),
+                timings,
+            )
+
+        orgs = sorted({org_id for _, org_id, _ in items})
+        entities = {}
+        for _, org_id, entity_name in items:
+            if entity_name:
+                entities.setdefault(org_id, set()).add(entity_name)
+
+        async def pinned_branch():
+            snapshots = await asyncio.gather(*(self.snapshots.get(o) for o in orgs))
+            return dict(zip(orgs, snapshots))
+
+        async def entity_branch():
+            states = {}
+            for org_id, names in entities.items():
+                found = await self.entity_states.get_many(org_id, names)
+                for name, state in found.items():
+                    states[(org_id, name)] = state
+            return states
+
+        results = await run_stages(
+            {
+                "vector": vector_branch(),
+                "pinned": pinned_branch(),
+                "entity_state": entity_branch(),
+            },
+            timings=timings,
+            concurrent=self.concurrent_stages,
         )
+        return [
+            self._build_context(
+                intent,
+                points,
+                results["pinned"][org_id],
+                results["entity_state"].get((org_id, entity_name)),
+            )
+            for points, (intent, org_id, entity_name) in zip(results["vector"], items)
+        ]
+
+    def _build_context(self, intent, points, snapshot, entity_state):
+        """Shape vector hits, the org snapshot and entity state into the context dict"""
+        # Compiled policies are checked against the entity state up front
+        checks = {c["id"]: c for c in snapshot.compiled.check(intent, entity_state)}
+        policies = []
+        for p in snapshot.policies:
+            policy = {"id": p["id"], "content": p["content"], "confidence": 1.0}
+            if p["id"] in checks:
+                policy["check"] = checks[p["id"]]["status"]
+            policies.append(policy)
 
         # Structured context with metadata
         context = {
-            "policies": [],
+            "policies": policies,
+            "policy_violations": [
+                {"content": c["content"], "effect": c["effect"], "flag": c["flag"]}
+                for c in checks.values()
+                if c["status"] == "violated"
+            ],
             "relationships": [],
-            "profile": None,
-            "entity_state": None,
+            "decisions": [],
+            "profile": snapshot.profile,
+            "profile_id": snapshot.profile_id,
+            "entity_state": entity_state,
+            "snapshot_version": snapshot.version,
         }
 
-        for r in results.points:
+        for r in points:
             if r.score > 0.3:  # relevance threshold
                 ctx_type = r.payload.get("context_type")
 
-                if ctx_type == "policy":
-                    context["policies"].append(
+                if ctx_type == "relationship":
+                    context["relationships"].append(
                         {
+                            "id": str(r.id),
                             "content": r.payload["content"],
+                            "entity_name": r.payload.get("entity_name"),
                             "confidence": round(r.score, 3),
                         }
                     )
-                elif ctx_type == "relationship":
-                    context["relationships"].append(
+                elif ctx_type == "decision":
+                    context["decisions"].append(
                         {
+                            "id": str(r.id),
                             "content": r.payload["content"],
                             "entity_name": r.payload.get("entity_name"),
                             "confidence": round(r.score, 3),
+                            # Outcomes merged into this one by compaction
+                            "count": r.payload.get("count", 1),
                         }
                     )
-                elif ctx_type == "profile":
-                    context["profile"] = r.payload["content"]
-
-        # Fetch entity state if entity mentioned
-        if entity_name:
-            result = (
-                self.supabase.table("entity_state")
-                .select("*")
-                .eq("org_id", org_id)
-                .ilike("entity_name", f"%{entity_name}%")
-                .execute()
-            )
-            if result.data:
-                context["entity_state"] = result.data[0]["current_state"]
 
         return context
@@ -0,0 +1,103 @@
+from context.policies import PolicySet, compile_policy
+import asyncio
+import os
+import time
+
+
+class OrgSnapshot:
+    """An org's profile and complete policy set, pinned in memory"""
+
+    def __init__(
+        self, org_id: str, version: int, profile, policies: list, profile_id=None
+    ):
+        self.org_id = org_id
+        self.version = version
+        self.profile = profile
+        self.profile_id = profile_id
+        self.policies = policies
+        self.compiled = PolicySet(policies)
+        self.loaded_at = time.monotonic()
+
+
+class SnapshotStore:
+    """
+    Per-org snapshots of profile + policies.
+
+    Profiles and policies are tiny and change rarely, so they are loaded
+    once (at startup or on first use) instead of competing for slots in
+    every vector search. A `policy`/`profile` write to an org drops its
+    snapshot; the next read reloads it with a bumped version. Writes made by
+    other processes (other workers, data/seed.py, data/ingest.py) are picked
+    up when a snapshot older than `refresh_seconds` is reloaded; the version
+    only changes if the content did. Policies keep the predicate compiled at
+    ingest (context/policies.py).
+    """
+
+    def __init__(self, vectors, refresh_seconds: float = None):
+        self.vectors = vectors
+        if refresh_seconds is None:
+            refresh_seconds = float(os.getenv("SNAPSHOT_REFRESH_SECONDS", "60"))
+        self.refresh_seconds = refresh_seconds
+        self.snapshots = {}
+        self._versions = {}
+        self._changes = {}
+        self._locks = {}
+
+    def _fresh(self, snapshot) -> bool:
+        return (
+            snapshot is not None
+            and time.monotonic() - snapshot.loaded_at < self.refresh_seconds
+        )
+
+    async def get(self, org_id: str) -> OrgSnapshot:
+        snapshot = self.snapshots.get(org_id)
+        if self._fresh(snapshot):
+            return snapshot
+        async with self._locks.setdefault(org_id, asyncio.Lock()):
+            snapshot = self.snapshots.get(org_id)
+            if not self._fresh(snapshot):
+                snapshot = await self.load(org_id)
+        return snapshot
+
+    async def load(self, org_id: str) -> OrgSnapshot:
+        changes = self._changes.get(org_id, 0)
+        records = await self.vectors.scroll(org_id, context_types=["profile", "policy"])
+        profile, profile_id, policies = None, None, []
+        for record in records:
+            if record.payload.get("context_type") == "profile":
+                profile = record.payload["content"]
+                profile_id = str(record.id)
+            else:
+                content = record.payload["content"]
+                # Points written before predicates existed are compiled here
+                predicate = record.payload.get("predicate", compile_policy(content))
+                policies.append(
+                    {"id": str(record.id), "content": content, "predicate": predicate}
+                )
+
+        # A periodic refresh that finds the same content keeps the version
+        previous = self.snapshots.get(org_id)
+        content = (profile, profile_id, policies)
+        if previous is not None and content == (
+            previous.profile, previous.profile_id, previous.policies
+        ):
+            version = previous.version
+        else:
+            version = self._versions.get(org_id, 0) + 1
+            self._versions[org_id] = version
+        snapshot = OrgSnapshot(org_id, version, profile, policies, profile_id)
+        # Don't pin a snapshot that a concurrent write already made stale
+        if self._changes.get(org_id, 0) == changes:
+            self.snapshots[org_id] = snapshot
+        return snapshot
+
+    def on_context_changed(self, org_id: str, context_type=None, entity_name=None):
+        if context_type in (None, "profile", "policy"):
+            self._changes[org_id] = self._changes.get(org_id, 0) + 1
+            self.snapshots.pop(org_id, None)
+
+    def stats(self) -> dict:
+        return {
+            org_id: {"version": s.version, "policies": len(s.policies)}
+            for org_id, s in self.snapshots.items()
+        }
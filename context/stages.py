@@ -0,0 +1,42 @@
+from contextlib import contextmanager
+import asyncio
+import time
+
+
+async def timed(name: str, coro, timings: dict = None):
+    """Await a coroutine and record its wall time (ms) under `name`"""
+    start = time.perf_counter()
+    try:
+        return await coro
+    finally:
+        if timings is not None:
+            timings[name] = round((time.perf_counter() - start) * 1000, 2)
+
+
+@contextmanager
+def stage(name: str, timings: dict = None):
+    """Record the wall time (ms) of a synchronous block under `name`"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timings is not None:
+            timings[name] = round((time.perf_counter() - start) * 1000, 2)
+
+
+async def run_stages(stages: dict, timings: dict = None, concurrent: bool = True):
+    """
+    Run independent retrieval stages and return their results by name.
+
+    `stages` maps a stage name to a coroutine. With `concurrent=True` every
+    stage is started at once, so the total latency is that of the slowest
+    branch rather than the sum of all of them.
+    """
+    names = list(stages)
+    if concurrent:
+        results = await asyncio.gather(
+            *(timed(name, stages[name], timings) for name in names)
+        )
+    else:
+        results = [await timed(name, stages[name], timings) for name in names]
+    return dict(zip(names, results))
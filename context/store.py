@@ -1,54 +1,48 @@
-from qdrant_client import QdrantClient
 from qdrant_client.models import PointStruct
-from supabase import create_client
-from google import genai
-from google.genai import types
-import uuid, os
+from context.embedder import get_embedder
+from context.events import notify_context_changed
+from context.ingest import context_id
+from context.policies import compile_policy
+from context.vector_store import get_vector_store
+import clients
 
-client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
 
+async def store_context(org_id: str, context_type: str, content: str, entity_name=None):
 
-def store_context(org_id: str, context_type: str, content: str, entity_name=None):
-
-    supabase = create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
-
-    qdrant = QdrantClient(
-        url=os.getenv("QDRANT_URL"), api_key=os.getenv("QDRANT_API_KEY")
-    )
+    supabase = await clients.supabase()
+    # Content-hash ID shared by the row and the point: repeats are upserts
+    point_id = context_id(org_id, context_type, content, entity_name)
 
     # Store structured
-    supabase.table("org_context").insert(
+    await supabase.table("org_context").upsert(
         {
+            "id": point_id,
             "org_id": org_id,
             "context_type": context_type,
             "entity_name": entity_name,
             "content": content,
-        }
+        },
+        on_conflict="id",
     ).execute()
 
-    # Store vector using Gemini embeddings
-    result = client.models.embed_content(
-        model="models/gemini-embedding-001",
-        contents=content,
-        config=types.EmbedContentConfig(
-            task_type="RETRIEVAL_DOCUMENT",
-            output_dimensionality=384,
-        ),
-    )
-    vector = result.embeddings[0].values
-
-    qdrant.upsert(
-        collection_name="genios_context",
-        points=[
-            PointStruct(
-                id=str(uuid.uuid4()),
-                vector=vector,
-                payload={
-                    "org_id": org_id,
-                    "context_type": context_type,
-                    "entity_name": entity_name,
-                    "content": content,
-                },
-            )
-        ],
+    # Store vector using the deployment's embedder
+    embedder = get_embedder()
+    vector = (await embedder.embed([content], "RETRIEVAL_DOCUMENT"))[0]
+
+    payload = {
+        "org_id": org_id,
+        "context_type": context_type,
+        "entity_name": entity_name,
+        "content": content,
+        "embedding_model": embedder.model_id,
+    }
+    # Policies are compiled once into a predicate evaluated at request time
+    if context_type == "policy":
+        payload["predicate"] = compile_policy(content)
+
+    await get_vector_store().upsert(
+        [PointStruct(id=point_id, vector=vector, payload=payload)]
     )
+
+    notify_context_changed(org_id, context_type, entity_name)
+
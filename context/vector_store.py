@@ -0,0 +1,401 @@
+"""
+Vector store backends behind ContextRetriever and store_context.
+
+- QdrantVectorStore: the remote `genios_context` collection (source of truth)
+- LocalVectorStore: per-org in-process index loaded from Qdrant, with
+  vectorized brute-force cosine search, switching to an HNSW index
+  (optional `hnswlib`) once an org grows past a size threshold
+
+Select with VECTOR_BACKEND=qdrant|local. Writes through LocalVectorStore go
+to Qdrant first and are then applied locally; writes made by other
+processes are picked up when an org is reloaded after
+LOCAL_INDEX_REFRESH_SECONDS. Reloads are built in one vectorized pass in a
+worker thread while the previous index keeps serving, then swapped in.
+"""
+
+from collections import namedtuple
+from qdrant_client.models import (
+    FieldCondition,
+    Filter,
+    MatchAny,
+    MatchValue,
+    PointIdsList,
+    QueryRequest,
+)
+from context.embedder import collection_for, get_embedder
+import asyncio
+import clients
+import numpy as np
+import os
+import time
+
+Hit = namedtuple("Hit", ["id", "score", "payload"])
+
+
+def build_filter(org_id: str, context_types=None, entity_name=None) -> Filter:
+    must = [FieldCondition(key="org_id", match=MatchValue(value=org_id))]
+    if context_types:
+        must.append(
+            FieldCondition(key="context_type", match=MatchAny(any=list(context_types)))
+        )
+    if entity_name:
+        must.append(FieldCondition(key="entity_name", match=MatchValue(value=entity_name)))
+    return Filter(must=must)
+
+
+class QdrantVectorStore:
+    def __init__(self, client, collection: str):
+        self.client = client
+        self.collection = collection
+
+    async def search(
+        self, vector, org_id: str, limit: int = 8, context_types=None, entity_name=None
+    ) -> list:
+        results = await self.client.query_points(
+            collection_name=self.collection,
+            query=vector,
+            limit=limit,
+            query_filter=build_filter(org_id, context_types, entity_name),
+        )
+        return results.points
+
+    async def search_batch(self, queries: list, limit: int = 8, context_types=None):
+        """`queries` is a list of (vector, org_id); one round trip for all"""
+        responses = await self.client.query_batch_points(
+            collection_name=self.collection,
+            requests=[
+                QueryRequest(
+                    query=vector,
+                    filter=build_filter(org_id, context_types),
+                    limit=limit,
+                    with_payload=True,
+                )
+                for vector, org_id in queries
+            ],
+        )
+        return [r.points for r in responses]
+
+    async def upsert(self, points: list):
+        await self.client.upsert(collection_name=self.collection, points=points)
+
+    async def retrieve(self, ids: list) -> list:
+        if not ids:
+            return []
+        return await self.client.retrieve(
+            collection_name=self.collection, ids=ids, with_payload=True
+        )
+
+    async def delete(self, org_id: str, ids: list):
+        await self.client.delete(
+            collection_name=self.collection, points_selector=PointIdsList(points=ids)
+        )
+
+    async def scroll(self, org_id: str, context_types=None, with_vectors=False):
+        """Every point of an org (optionally of some context types)"""
+        records, offset = [], None
+        while True:
+            page, offset = await self.client.scroll(
+                collection_name=self.collection,
+                scroll_filter=build_filter(org_id, context_types),
+                limit=256,
+                offset=offset,
+                with_payload=True,
+                with_vectors=with_vectors,
+            )
+            records.extend(page)
+            if offset is None:
+                return records
+
+
+class _OrgIndex:
+    """Contiguous float32 matrix of one org's unit vectors plus payload columns"""
+
+    def __init__(self, dim: int, hnsw_threshold: int):
+        self.dim = dim
+        self.hnsw_threshold = hnsw_threshold
+        self.size = 0
+        self.matrix = np.zeros((16, dim), dtype=np.float32)
+        self.alive = np.zeros(16, dtype=bool)
+        self.types = np.empty(16, dtype=object)
+        self.entities = np.empty(16, dtype=object)
+        self.ids = []
+        self.payloads = []
+        self.positions = {}
+        self.hnsw = None
+        self.loaded_at = time.monotonic()
+
+    @classmethod
+    def from_records(cls, dim: int, hnsw_threshold: int, records: list) -> "_OrgIndex":
+        """Index over scrolled records in one pass; CPU-bound, run off the loop"""
+        index = cls(dim, hnsw_threshold)
+        latest = {record.id: record for record in records}
+        n = len(latest)
+        if n == 0:
+            return index
+        capacity = max(16, 1 << (n - 1).bit_length())
+        index.matrix = np.zeros((capacity, dim), dtype=np.float32)
+        index.matrix[:n] = np.asarray([r.vector for r in latest.values()], dtype=np.float32)
+        norms = np.linalg.norm(index.matrix[:n], axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        index.matrix[:n] /= norms
+        index.alive = np.zeros(capacity, dtype=bool)
+        index.alive[:n] = True
+        index.types = np.empty(capacity, dtype=object)
+        index.entities = np.empty(capacity, dtype=object)
+        index.ids = list(latest)
+        index.payloads = [r.payload for r in latest.values()]
+        index.types[:n] = [p.get("context_type") for p in index.payloads]
+        index.entities[:n] = [p.get("entity_name") for p in index.payloads]
+        index.positions = {point_id: pos for pos, point_id in enumerate(index.ids)}
+        index.size = n
+        if n >= hnsw_threshold:
+            index._build_hnsw()
+        return index
+
+    def _grow(self):
+        capacity = len(self.alive) * 2
+        self.matrix = np.resize(self.matrix, (capacity, self.dim))
+        self.alive = np.resize(self.alive, capacity)
+        self.alive[self.size :] = False
+        for name in ("types", "entities"):
+            column = np.empty(capacity, dtype=object)
+            column[: self.size] = getattr(self, name)[: self.size]
+            setattr(self, name, column)
+        if self.hnsw is not None:
+            self.hnsw.resize_index(capacity)
+
+    def upsert(self, point_id, vector, payload: dict):
+        vector = np.asarray(vector, dtype=np.float32)
+        vector = vector / (np.linalg.norm(vector) or 1.0)
+        pos = self.positions.get(point_id)
+        if pos is None:
+            if self.size == len(self.alive):
+                self._grow()
+            pos = self.size
+            self.size += 1
+            self.positions[point_id] = pos
+            self.ids.append(point_id)
+            self.payloads.append(payload)
+        else:
+            self.payloads[pos] = payload
+        self.matrix[pos] = vector
+        self.alive[pos] = True
+        self.types[pos] = payload.get("context_type")
+        self.entities[pos] = payload.get("entity_name")
+
+        if self.hnsw is not None:
+            self.hnsw.add_items(vector[None, :], [pos])
+        elif self.size >= self.hnsw_threshold:
+            # Past the threshold: mark stale so the graph is built by a
+            # background reload rather than on the event loop
+            self.loaded_at = float("-inf")
+
+    def delete(self, point_id):
+        pos = self.positions.pop(point_id, None)
+        if pos is not None:
+            self.alive[pos] = False
+            if self.hnsw is not None:
+                self.hnsw.mark_deleted(pos)
+
+    def _build_hnsw(self):
+        try:
+            import hnswlib
+        except ImportError:
+            self.hnsw_threshold = float("inf")
+            print("[WARN] hnswlib not installed; staying on brute-force search")
+            return
+        index = hnswlib.Index(space="ip", dim=self.dim)
+        index.init_index(max_elements=len(self.alive), ef_construction=200, M=16)
+        live = np.flatnonzero(self.alive[: self.size])
+        index.add_items(self.matrix[live], live)
+        index.set_ef(64)
+        self.hnsw = index
+
+    def search(self, vector, limit: int, context_types=None, entity_name=None) -> list:
+        query = np.asarray(vector, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+
+        mask = self.alive[: self.size].copy()
+        if context_types:
+            mask &= np.isin(self.types[: self.size], list(context_types))
+        if entity_name:
+            mask &= self.entities[: self.size] == entity_name
+        candidates = int(mask.sum())
+        if candidates == 0:
+            return []
+        limit = min(limit, candidates)
+
+        order = None
+        if self.hnsw is not None:
+            try:
+                labels, distances = self.hnsw.knn_query(
+                    query, k=limit, filter=lambda label: bool(mask[label])
+                )
+                order = labels[0]
+                scores = 1.0 - distances[0]
+            except RuntimeError:
+                # HNSW found fewer than `limit` matches for a narrow filter
+                order = None
+        if order is None:
+            all_scores = self.matrix[: self.size] @ query
+            all_scores[~mask] = -np.inf
+            order = np.argpartition(-all_scores, limit - 1)[:limit]
+            order = order[np.argsort(-all_scores[order])]
+            scores = all_scores[order]
+
+        return [
+            Hit(self.ids[pos], float(score), self.payloads[pos])
+            for pos, score in zip(order, scores)
+        ]
+
+    def memory_bytes(self) -> int:
+        total = self.matrix.nbytes + self.alive.nbytes
+        if self.hnsw is not None:
+            # hnswlib stores the vector plus ~2*M links per element
+            total += len(self.alive) * (self.dim * 4 + 2 * 16 * 4)
+        return total
+
+
+class LocalVectorStore:
+    def __init__(
+        self,
+        source: QdrantVectorStore,
+        dim: int,
+        hnsw_threshold: int = 10000,
+        refresh_seconds: float = 300.0,
+    ):
+        self.source = source
+        self.dim = dim
+        self.hnsw_threshold = hnsw_threshold
+        self.refresh_seconds = refresh_seconds
+        self.orgs = {}
+        self._locks = {}
+        # org_id -> writes applied while its index is being (re)built
+        self._pending = {}
+        self._refreshes = set()
+
+    async def _org(self, org_id: str) -> _OrgIndex:
+        index = self.orgs.get(org_id)
+        if index is None:
+            lock = self._locks.setdefault(org_id, asyncio.Lock())
+            async with lock:
+                index = self.orgs.get(org_id)
+                if index is None:
+                    index = await self._load(org_id)
+                    self.orgs[org_id] = index
+            return index
+        if (
+            time.monotonic() - index.loaded_at >= self.refresh_seconds
+            and org_id not in self._pending
+        ):
+            # Stale: keep serving it while the replacement is built
+            self._pending[org_id] = []
+            task = asyncio.create_task(self._refresh(org_id, index))
+            self._refreshes.add(task)
+            task.add_done_callback(self._refreshes.discard)
+        return index
+
+    async def _refresh(self, org_id: str, stale: _OrgIndex):
+        try:
+            self.orgs[org_id] = await self._load(org_id)
+        except Exception as e:
+            print(f"[WARN] Reloading local index for org {org_id} failed: {e}")
+            stale.loaded_at = time.monotonic()  # retry after another period
+
+    async def _load(self, org_id: str) -> _OrgIndex:
+        """(Re)build an org's index from Qdrant in a worker thread"""
+        pending = self._pending.setdefault(org_id, [])
+        try:
+            started = time.monotonic()
+            records = await self.source.scroll(org_id, with_vectors=True)
+            index = await asyncio.to_thread(
+                _OrgIndex.from_records, self.dim, self.hnsw_threshold, records
+            )
+            if index.hnsw_threshold == float("inf"):
+                self.hnsw_threshold = index.hnsw_threshold  # hnswlib missing
+            index.loaded_at = started
+            # Replay writes the scroll may have missed
+            for op, args in pending:
+                getattr(index, op)(*args)
+            return index
+        finally:
+            self._pending.pop(org_id, None)
+
+    async def search(
+        self, vector, org_id: str, limit: int = 8, context_types=None, entity_name=None
+    ) -> list:
+        index = await self._org(org_id)
+        return index.search(vector, limit, context_types, entity_name)
+
+    async def search_batch(self, queries: list, limit: int = 8, context_types=None):
+        return [
+            await self.search(vector, org_id, limit, context_types)
+            for vector, org_id in queries
+        ]
+
+    async def upsert(self, points: list):
+        await self.source.upsert(points)
+        for point in points:
+            org_id = point.payload.get("org_id")
+            index = self.orgs.get(org_id)
+            if index is not None:
+                index.upsert(point.id, point.vector, point.payload)
+            if org_id in self._pending:
+                self._pending[org_id].append(
+                    ("upsert", (point.id, point.vector, point.payload))
+                )
+
+    async def retrieve(self, ids: list) -> list:
+        return await self.source.retrieve(ids)
+
+    async def delete(self, org_id: str, ids: list):
+        await self.source.delete(org_id, ids)
+        index = self.orgs.get(org_id)
+        if index is not None:
+            for point_id in ids:
+                index.delete(point_id)
+        if org_id in self._pending:
+            self._pending[org_id].extend(("delete", (point_id,)) for point_id in ids)
+
+    async def scroll(self, org_id: str, context_types=None, with_vectors=False):
+        return await self.source.scroll(org_id, context_types, with_vectors)
+
+    def stats(self) -> dict:
+        return {
+            org_id: {
+                "points": len(index.positions),
+                "hnsw": index.hnsw is not None,
+                "memory_bytes": index.memory_bytes(),
+            }
+            for org_id, index in self.orgs.items()
+        }
+
+
+def make_vector_store(client, collection: str, dim: int):
+    """Vector store for this deployment, chosen by VECTOR_BACKEND"""
+    remote = QdrantVectorStore(client, collection)
+    backend = os.getenv("VECTOR_BACKEND", "qdrant").lower()
+    if backend == "qdrant":
+        return remote
+    if backend == "local":
+        return LocalVectorStore(
+            remote,
+            dim,
+            hnsw_threshold=int(os.getenv("LOCAL_INDEX_HNSW_THRESHOLD", "10000")),
+            refresh_seconds=float(os.getenv("LOCAL_INDEX_REFRESH_SECONDS", "300")),
+        )
+    raise ValueError(f"Unknown VECTOR_BACKEND: {backend}")
+
+
+_store = None
+
+
+def get_vector_store():
+    """Process-wide vector store shared by the retriever and store_context"""
+    global _store
+    if _store is None:
+        embedder = get_embedder()
+        _store = make_vector_store(
+            clients.qdrant(), collection_for(embedder), embedder.dim
+        )
+    return _store
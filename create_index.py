@@ -2,6 +2,7 @@ from qdrant_client import QdrantClient
 from qdrant_client.models import PayloadSchemaType
 import os
 from dotenv import load_dotenv
+from context.embedder import collection_for, get_embedder
 
 load_dotenv()
 
@@ -10,10 +11,12 @@ client = QdrantClient(
     api_key=os.getenv("QDRANT_API_KEY")
 )
 
-client.create_payload_index(
-    collection_name="genios_context",
-    field_name="org_id",
-    field_schema=PayloadSchemaType.KEYWORD
-)
-
-print("Index created for org_id")
\ No newline at end of file
+# Every search and scroll filters on org_id and context_type; compaction and
+# the local index also filter on entity_name
+for field in ("org_id", "context_type", "entity_name"):
+    client.create_payload_index(
+        collection_name=collection_for(get_embedder()),
+        field_name=field,
+        field_schema=PayloadSchemaType.KEYWORD
+    )
+    print(f"Index created for {field}")
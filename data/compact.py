@@ -0,0 +1,42 @@
+"""
+Merge near-duplicate learned decisions for an org (see context/compaction.py).
+
+Usage: python data/compact.py --org acme [--similarity 0.92]
+
+The API runs the same job in the background every
+COMPACTION_INTERVAL_SECONDS for orgs that received new decisions.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from context.compaction import compact_decisions
+from context.vector_store import get_vector_store
+import clients
+
+load_dotenv()
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--org", default=os.getenv("ORG_ID"))
+    parser.add_argument(
+        "--similarity", type=float, default=float(os.getenv("COMPACTION_SIMILARITY", "0.92"))
+    )
+    args = parser.parse_args()
+    if not args.org:
+        parser.error("--org (or ORG_ID) is required")
+    try:
+        result = await compact_decisions(args.org, get_vector_store(), threshold=args.similarity)
+    finally:
+        await clients.close()
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,52 @@
+"""
+Bulk-ingest context for an org from a JSONL or CSV file.
+
+Usage: python data/ingest.py crm_export.jsonl --org acme
+       [--batch-size 100] [--concurrency 4] [--restart]
+
+Progress is checkpointed under INGEST_CHECKPOINT_DIR (default `.ingest/`);
+re-running the same command resumes after the last completed batch.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from context.ingest import BulkIngester, default_checkpoint, read_items
+import clients
+
+load_dotenv()
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("source", help="JSONL (.jsonl/.ndjson) or CSV file")
+    parser.add_argument("--org", default=os.getenv("ORG_ID"))
+    parser.add_argument("--batch-size", type=int, default=int(os.getenv("INGEST_BATCH_SIZE", "100")))
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("INGEST_CONCURRENCY", "4")))
+    parser.add_argument("--restart", action="store_true", help="ignore any checkpoint")
+    args = parser.parse_args()
+    if not args.org:
+        parser.error("--org (or ORG_ID) is required")
+
+    checkpoint = default_checkpoint(args.org, args.source)
+    if args.restart and os.path.exists(checkpoint):
+        os.remove(checkpoint)
+
+    ingester = BulkIngester(batch_size=args.batch_size, concurrency=args.concurrency)
+    try:
+        result = await ingester.ingest(args.org, read_items(args.source), checkpoint)
+    finally:
+        await clients.close()
+    print(json.dumps(result, indent=2))
+    if result["batches_failed"]:
+        print(f"[WARN] {len(result['batches_failed'])} batches failed; re-run to resume")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
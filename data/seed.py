@@ -1,54 +1,32 @@
-from supabase import create_client
-from qdrant_client import QdrantClient
-from qdrant_client.models import PointStruct
-from google import genai
-from google.genai import types
-import uuid, os
+"""
+Seed the demo org's profile, policies, investors and entity states.
+
+Goes through the bulk ingester, so re-running it updates the same rows and
+points instead of duplicating them.
+"""
+
+import asyncio, os, sys
 from dotenv import load_dotenv
 
-load_dotenv()
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from context.ingest import BulkIngester
+import clients
 
-supabase = create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
-qdrant = QdrantClient(url=os.getenv("QDRANT_URL"), api_key=os.getenv("QDRANT_API_KEY"))
-client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
+load_dotenv()
 
 ORG_ID = os.getenv("ORG_ID")
+ITEMS = []
 
 
 def store_context(context_type, content, entity_name=None):
-    supabase.table("org_context").insert(
-        {
-            "org_id": ORG_ID,
-            "context_type": context_type,
-            "entity_name": entity_name,
-            "content": content,
-        }
-    ).execute()
-
-    # Generate embedding using Gemini
-    result = client.models.embed_content(
-        model="models/gemini-embedding-001",
-        contents=content,
-        config=types.EmbedContentConfig(
-            task_type="RETRIEVAL_DOCUMENT", output_dimensionality=384
-        ),
+    ITEMS.append(
+        {"context_type": context_type, "content": content, "entity_name": entity_name}
     )
-    vector = result.embeddings[0].values
-
-    qdrant.upsert(
-        collection_name="genios_context",
-        points=[
-            PointStruct(
-                id=str(uuid.uuid4()),
-                vector=vector,
-                payload={
-                    "org_id": ORG_ID,
-                    "context_type": context_type,
-                    "entity_name": entity_name,
-                    "content": content,
-                },
-            )
-        ],
+
+
+def store_entity_state(entity_type, entity_name, state):
+    ITEMS.append(
+        {"entity_type": entity_type, "entity_name": entity_name, "entity_state": state}
     )
 
 
@@ -114,51 +92,54 @@ store_context(
 )
 
 # Entity States - Current status
-supabase.table("entity_state").insert(
+store_entity_state(
+    "investor",
+    "Rahul",
     {
-        "org_id": ORG_ID,
-        "entity_type": "investor",
-        "entity_name": "Rahul",
-        "current_state": {
-            "status": "warm",
-            "last_contact_days_ago": 10,
-            "follow_up_due": True,
-            "next_action": "share product update",
-            "meeting_scheduled": False,
-        },
-    }
-).execute()
-
-supabase.table("entity_state").insert(
+        "status": "warm",
+        "last_contact_days_ago": 10,
+        "follow_up_due": True,
+        "next_action": "share product update",
+        "meeting_scheduled": False,
+    },
+)
+
+store_entity_state(
+    "investor",
+    "Priya",
     {
-        "org_id": ORG_ID,
-        "entity_type": "investor",
-        "entity_name": "Priya",
-        "current_state": {
-            "status": "very_warm",
-            "last_contact_days_ago": 3,
-            "follow_up_due": True,
-            "next_action": "schedule demo",
-            "meeting_scheduled": False,
-            "requested_demo": True,
-        },
-    }
-).execute()
-
-supabase.table("entity_state").insert(
+        "status": "very_warm",
+        "last_contact_days_ago": 3,
+        "follow_up_due": True,
+        "next_action": "schedule demo",
+        "meeting_scheduled": False,
+        "requested_demo": True,
+    },
+)
+
+store_entity_state(
+    "investor",
+    "Amit",
     {
-        "org_id": ORG_ID,
-        "entity_type": "investor",
-        "entity_name": "Amit",
-        "current_state": {
-            "status": "cold",
-            "last_contact_days_ago": 45,
-            "follow_up_due": False,
-            "next_action": "wait until Q3 2026",
-            "meeting_scheduled": False,
-            "said_no": True,
-        },
-    }
-).execute()
-
-print("Seed data inserted: profile + 6 policies + 3 investors + 3 entity states")
+        "status": "cold",
+        "last_contact_days_ago": 45,
+        "follow_up_due": False,
+        "next_action": "wait until Q3 2026",
+        "meeting_scheduled": False,
+        "said_no": True,
+    },
+)
+
+
+async def main():
+    try:
+        result = await BulkIngester().ingest(ORG_ID, ITEMS)
+    finally:
+        await clients.close()
+    if result["batches_failed"]:
+        raise SystemExit(f"Seeding failed: {result}")
+    print("Seed data inserted: profile + 6 policies + 3 investors + 3 entity states")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,19 +1,129 @@
-from fastapi import FastAPI
-from pydantic import BaseModel
-from typing import Optional
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from contextlib import asynccontextmanager
 from context.retriever import ContextRetriever
+from context.entities import EntityIndex
+from context.compaction import CompactionJob
+from context.events import subscribe
+from context.ingest import BulkIngester
+from context.outcome_queue import OutcomeQueue
+from context.stages import timed
+from context.vector_store import get_vector_store
 from reasoning.engine import ReasoningEngine
-from supabase import create_client
-import os, re
+from audit.logs import decode_cursor, fetch_page, iter_pages, parse_fields
+from audit.references import EntityStateVersions, compact_context, reconstruct
+from audit.writer import InteractionLogWriter
+import clients
+import metrics
+import asyncio, json, os, re, time
 from dotenv import load_dotenv
 
 load_dotenv()
 
-app = FastAPI(title="GeniOS Brain Prototype")
-
 retriever = ContextRetriever()
 engine = ReasoningEngine()
-supabase = create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
+
+
+# Per-org Aho-Corasick matchers over known entity names and aliases
+entity_index = EntityIndex(clients.supabase)
+subscribe(entity_index.on_context_changed)
+
+# Audit rows are written in the background, off the request path
+log_writer = InteractionLogWriter.from_env(clients.supabase)
+# Logs reference entity states by hash; each distinct state is stored once
+state_versions = EntityStateVersions(
+    InteractionLogWriter.from_env(clients.supabase, table="entity_state_version")
+)
+
+# Webhook outcomes are embedded and stored in batches by a background worker
+_ingester = None
+
+
+def get_ingester() -> BulkIngester:
+    global _ingester
+    if _ingester is None:
+        _ingester = BulkIngester.from_env()
+    return _ingester
+
+
+outcome_queue = OutcomeQueue.from_env(get_ingester)
+
+# Near-duplicate learned decisions are merged periodically
+compaction = CompactionJob.from_env(get_vector_store)
+subscribe(compaction.on_context_changed)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await log_writer.start()
+    await state_versions.writer.start()
+    await outcome_queue.start()
+    await compaction.start()
+    # Pin the default org's profile/policies before the first request
+    if os.getenv("ORG_ID"):
+        try:
+            await retriever.snapshots.get(os.getenv("ORG_ID"))
+        except Exception as e:
+            print(f"[WARN] Failed to preload context snapshot: {e}")
+    yield
+    # Flush queued outcomes and audit rows before the workers exit
+    await compaction.stop()
+    await outcome_queue.stop()
+    await log_writer.stop()
+    await state_versions.writer.stop()
+    await clients.close()
+
+
+app = FastAPI(title="GeniOS Brain Prototype", lifespan=lifespan)
+
+
+@app.middleware("http")
+async def count_requests(request: Request, call_next):
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    except Exception:
+        status = 500
+        raise
+    finally:
+        # Route templates, not raw paths, keep org IDs out of the labels
+        route = request.scope.get("route")
+        metrics.http_requests.inc(
+            route=route.path if route else "unmatched",
+            method=request.method,
+            status=status,
+        )
+    return response
+
+
+async def log_interaction(
+    org_id: str,
+    intent: str,
+    context: dict,
+    result: dict,
+    usage: dict = None,
+    entity_name: str = None,
+):
+    """
+    Queue an audit row; batched inserts happen in the background. The row
+    stores references to the context (see audit/references.py), not a copy.
+    """
+    if usage:
+        # Prompt size is recorded with the context it was built from
+        context = {**context, "prompt_usage": usage}
+    await state_versions.record(org_id, entity_name, context.get("entity_state"))
+    await log_writer.submit(
+        {
+            "org_id": org_id,
+            "intent": intent,
+            "context_used": compact_context(context, entity_name),
+            "enriched_output": result.get("enriched_brief"),
+            "verdict": result.get("verdict"),
+            "confidence": result.get("confidence", 0.0),
+        }
+    )
 
 
 class EnrichRequest(BaseModel):
@@ -22,48 +132,222 @@ class EnrichRequest(BaseModel):
     entity_name: Optional[str] = None
 
 
-def extract_entity_name(message: str) -> str:
-    """Simple entity extraction - looks for capitalized names"""
-    # Common investor names to check
-    known_entities = ["Rahul", "Priya", "Amit"]
-    message_lower = message.lower()
-    for entity in known_entities:
-        if entity.lower() in message_lower:
-            return entity
-    return None
+async def extract_entities(org_id: str, message: str) -> list:
+    """Every known entity mentioned in the message, with its span"""
+    try:
+        return await entity_index.extract(org_id, message)
+    except Exception as e:
+        print(f"[WARN] Entity extraction failed: {e}")
+        metrics.errors.inc(stage="entities")
+        return []
+
+
+async def prepare_enrich(request: EnrichRequest, timings: dict = None):
+    """Resolve the entity, retrieve context and the intent embedding"""
+    # Extract entities; the first mention is the focus unless one is given
+    mentions = await timed(
+        "entities", extract_entities(request.org_id, request.raw_message), timings
+    )
+    entity = request.entity_name or (mentions[0]["entity"] if mentions else None)
+
+    # Fetch structured context; the query vector is kept for semantic
+    # verdict-cache hits
+    embedding = {}
+    try:
+        context = await timed(
+            "retrieval",
+            retriever.get_context(
+                intent=request.raw_message,
+                org_id=request.org_id,
+                entity_name=entity,
+                timings=timings,
+                embedding=embedding,
+            ),
+            timings,
+        )
+    except Exception:
+        metrics.errors.inc(stage="retrieval")
+        raise
+    context["mentioned_entities"] = mentions
+
+    return entity, context, embedding.get("vector")
+
+
+def _elapsed_ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 2)
 
 
 @app.post("/v1/enrich")
-async def enrich(request: EnrichRequest):
-    # Extract entity if not provided
-    entity = request.entity_name or extract_entity_name(request.raw_message)
+async def enrich(request: EnrichRequest, response: Response):
+    start = time.perf_counter()
+    timings = {}
+    entity, context, intent_vector = await prepare_enrich(request, timings)
 
-    # Fetch structured context
-    context = retriever.get_context(
-        intent=request.raw_message, org_id=request.org_id, entity_name=entity
+    # Reason and enrich
+    usage = {}
+    result = await engine.enrich(
+        intent=request.raw_message,
+        context=context,
+        entity_name=entity,
+        org_id=request.org_id,
+        intent_vector=intent_vector,
+        usage=usage,
+        timings=timings,
     )
 
-    # Reason and enrich
-    result = engine.enrich(
-        intent=request.raw_message, context=context, entity_name=entity
+    await timed(
+        "log",
+        log_interaction(
+            request.org_id, request.raw_message, context, result, usage, entity
+        ),
+        timings,
+    )
+
+    total_ms = _elapsed_ms(start)
+    metrics.observe("enrich", request.org_id, timings, total_ms)
+    response.headers["Server-Timing"] = metrics.server_timing(timings, total_ms)
+    return result
+
+
+@app.post("/v1/enrich/stream")
+async def enrich_stream(request: EnrichRequest):
+    """
+    Server-Sent Events variant of /v1/enrich.
+
+    Emits one event per verdict field as soon as it is generated (`verdict`
+    first, then `flags`, `enriched_brief`, ...), followed by a `done` event
+    carrying the full result. Server-Timing covers the stages before the
+    first byte; generation stages are recorded in /metrics only.
+    """
+    start = time.perf_counter()
+    timings = {}
+    entity, context, intent_vector = await prepare_enrich(request, timings)
+    headers = {"Server-Timing": metrics.server_timing(timings)}
+
+    async def events():
+        usage = {}
+        async for field, value in engine.enrich_stream(
+            intent=request.raw_message,
+            context=context,
+            entity_name=entity,
+            org_id=request.org_id,
+            intent_vector=intent_vector,
+            usage=usage,
+            timings=timings,
+        ):
+            data = value if field == "done" else {field: value}
+            yield f"event: {field}\ndata: {json.dumps(data)}\n\n"
+            if field == "done":
+                await timed(
+                    "log",
+                    log_interaction(
+                        request.org_id, request.raw_message, context, value, usage, entity
+                    ),
+                    timings,
+                )
+                metrics.observe(
+                    "enrich_stream", request.org_id, timings, _elapsed_ms(start)
+                )
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=headers)
+
+
+class BatchEnrichRequest(BaseModel):
+    requests: List[EnrichRequest] = Field(
+        ..., min_length=1, max_length=int(os.getenv("ENRICH_BATCH_MAX_ITEMS", "100"))
     )
 
-    # Log interaction
+
+# Caps in-flight Gemini calls per batch so one batch can't exhaust the quota
+BATCH_LLM_CONCURRENCY = int(os.getenv("ENRICH_BATCH_CONCURRENCY", "8"))
+
+
+@app.post("/v1/enrich/batch")
+async def enrich_batch(batch: BatchEnrichRequest, response: Response):
+    """
+    Enrich many intents at once; results come back in request order.
+    Server-Timing holds the batch-wide stages; per-item reasoning stages
+    are recorded in /metrics.
+    """
+    start = time.perf_counter()
+    timings = {}
+    mentions = await timed(
+        "entities",
+        asyncio.gather(
+            *(extract_entities(r.org_id, r.raw_message) for r in batch.requests)
+        ),
+        timings,
+    )
+    items = [
+        (r.raw_message, r.org_id, r.entity_name or (m[0]["entity"] if m else None))
+        for r, m in zip(batch.requests, mentions)
+    ]
+
     try:
-        supabase.table("interaction_log").insert(
-            {
-                "org_id": request.org_id,
-                "intent": request.raw_message,
-                "context_used": context,
-                "enriched_output": result.get("enriched_brief"),
-                "verdict": result.get("verdict"),
-                "confidence": result.get("confidence", 0.0),
-            }
-        ).execute()
+        embedding = {}
+        contexts = await timed(
+            "retrieval",
+            retriever.get_context_batch(items, timings, embedding),
+            timings,
+        )
+        for context, m in zip(contexts, mentions):
+            context["mentioned_entities"] = m
+        vectors = embedding["vectors"]
     except Exception as e:
-        print(f"[WARN] Failed to log interaction: {e}")
+        metrics.errors.inc(stage="retrieval")
+        return {
+            "results": [
+                {"index": i, "error": f"retrieval failed: {e}"}
+                for i in range(len(items))
+            ],
+            "count": len(items),
+            "wall_ms": round((time.perf_counter() - start) * 1000, 1),
+        }
 
-    return result
+    semaphore = asyncio.Semaphore(BATCH_LLM_CONCURRENCY)
+
+    async def run_one(index, item, context, vector):
+        intent, org_id, entity = item
+        usage, item_timings = {}, {}
+        try:
+            async with semaphore:
+                result = await engine.enrich(
+                    intent=intent,
+                    context=context,
+                    entity_name=entity,
+                    org_id=org_id,
+                    intent_vector=vector,
+                    usage=usage,
+                    timings=item_timings,
+                )
+        except Exception as e:
+            return {"index": index, "error": str(e)}
+
+        await log_interaction(org_id, intent, context, result, usage, entity)
+        metrics.observe("enrich_batch_item", org_id, item_timings)
+        return {"index": index, "result": result}
+
+    results = await timed(
+        "reasoning",
+        asyncio.gather(
+            *(
+                run_one(i, item, ctx, vec)
+                for i, (item, ctx, vec) in enumerate(zip(items, contexts, vectors))
+            )
+        ),
+        timings,
+    )
+    total_ms = _elapsed_ms(start)
+    orgs = {item[1] for item in items}
+    metrics.observe(
+        "enrich_batch", orgs.pop() if len(orgs) == 1 else "mixed", timings, total_ms
+    )
+    response.headers["Server-Timing"] = metrics.server_timing(timings, total_ms)
+    return {
+        "results": results,
+        "count": len(results),
+        "wall_ms": round(total_ms, 1),
+    }
 
 
 @app.get("/health")
@@ -71,21 +355,212 @@ async def health():
     return {"status": "alive", "service": "GeniOS Brain Prototype"}
 
 
+def pipeline_stats() -> dict:
+    return {
+        "embedding_cache": (
+            retriever.embed_cache.stats() if retriever.embed_cache else None
+        ),
+        "verdict_cache": (
+            engine.verdict_cache.stats() if engine.verdict_cache else None
+        ),
+        "interaction_log_writer": log_writer.stats(),
+        "entity_state_version_writer": state_versions.writer.stats(),
+        "webhook_queue": outcome_queue.stats(),
+        "decision_compaction": compaction.stats(),
+        "snapshots": retriever.snapshots.stats(),
+        "entity_state_cache": retriever.entity_states.stats(),
+        "prompt": engine.prompt_stats,
+        "verdict_parsing": engine.parse_stats,
+        "prompt_prefix_cache": (
+            engine.prefix_cache.stats() if engine.prefix_cache else None
+        ),
+        "vector_store": (
+            retriever.vectors.stats() if hasattr(retriever.vectors, "stats") else None
+        ),
+        "clients": clients.stats(),
+    }
+
+
+@app.get("/v1/stats")
+async def stats():
+    """Cache counters for the enrich pipeline"""
+    return pipeline_stats()
+
+
+# Per-org sections (snapshots, vector store, last compaction) would turn
+# org IDs into metric names, so only the process-wide ones are exported
+METRIC_STATS_SECTIONS = (
+    "embedding_cache",
+    "verdict_cache",
+    "entity_state_cache",
+    "prompt",
+    "verdict_parsing",
+    "prompt_prefix_cache",
+    "interaction_log_writer",
+    "entity_state_version_writer",
+    "webhook_queue",
+    "clients",
+)
+
+
+def _stats_gauges() -> list:
+    current = pipeline_stats()
+    gauges = []
+    for section in METRIC_STATS_SECTIONS:
+        gauges += metrics.gauges_from_stats(f"genios_{section}", current.get(section))
+    compaction_stats = current["decision_compaction"]
+    gauges += metrics.gauges_from_stats(
+        "genios_decision_compaction",
+        {k: v for k, v in compaction_stats.items() if k != "last"},
+    )
+    return gauges
+
+
+metrics.register_collector(_stats_gauges)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Prometheus text exposition of latency, error and cache metrics"""
+    return PlainTextResponse(
+        metrics.render(), media_type="text/plain; version=0.0.4"
+    )
+
+
+# Bounds on /v1/logs pages and export chunks
+LOGS_MAX_LIMIT = int(os.getenv("LOGS_MAX_LIMIT", "500"))
+LOGS_EXPORT_CHUNK = int(os.getenv("LOGS_EXPORT_CHUNK_SIZE", "500"))
+
+
 @app.get("/v1/logs/{org_id}")
-async def get_logs(org_id: str, limit: int = 20):
-    """Get recent interaction logs for an organization"""
+async def get_logs(
+    org_id: str,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+):
+    """
+    Get recent interaction logs for an organization, newest first.
+
+    Pass the returned `next_cursor` as `cursor` for the next page; `fields`
+    (comma-separated) limits the columns returned. Unknown fields or a
+    malformed cursor answer 400, as on the export endpoint.
+    """
+    try:
+        columns = parse_fields(fields)
+        if cursor:
+            decode_cursor(cursor)
+    except ValueError as e:
+        return JSONResponse({"error": str(e), "org_id": org_id}, status_code=400)
+
+    try:
+        db = await clients.supabase()
+        rows, next_cursor = await fetch_page(
+            db,
+            org_id,
+            columns,
+            max(1, min(limit, LOGS_MAX_LIMIT)),
+            cursor,
+            since,
+            until,
+        )
+        return {
+            "org_id": org_id,
+            "logs": rows,
+            "count": len(rows),
+            "next_cursor": next_cursor,
+        }
+    except Exception as e:
+        return {"error": str(e), "org_id": org_id, "logs": []}
+
+
+@app.get("/v1/logs/{org_id}/export")
+async def export_logs(
+    org_id: str,
+    fields: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+):
+    """
+    Stream an org's logs as NDJSON, oldest first, optionally within
+    [since, until). Rows are fetched page by page as the client reads, so
+    only one chunk is ever held in memory.
+    """
     try:
-        result = (
-            supabase.table("interaction_log")
+        columns = parse_fields(fields)
+    except ValueError as e:
+        return JSONResponse({"error": str(e), "org_id": org_id}, status_code=400)
+
+    async def lines():
+        db = await clients.supabase()
+        try:
+            async for rows in iter_pages(
+                db, org_id, columns, LOGS_EXPORT_CHUNK, since, until
+            ):
+                yield "".join(json.dumps(row, default=str) + "\n" for row in rows)
+        except Exception as e:
+            # Headers are already sent; the last line reports the failure
+            print(f"[WARN] Log export for {org_id} failed: {e}")
+            yield json.dumps({"error": str(e)}) + "\n"
+
+    return StreamingResponse(
+        lines(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{org_id}-logs.ndjson"'},
+    )
+
+
+@app.get("/v1/audit/{org_id}/{log_id}")
+async def audit_log(org_id: str, log_id: str):
+    """One interaction_log row with its full context rebuilt from references"""
+    try:
+        db = await clients.supabase()
+        result = await (
+            db.table("interaction_log")
             .select("*")
             .eq("org_id", org_id)
-            .order("created_at", desc=True)
-            .limit(limit)
+            .eq("id", log_id)
+            .limit(1)
             .execute()
         )
-        return {"org_id": org_id, "logs": result.data, "count": len(result.data)}
+        if not result.data:
+            return JSONResponse(
+                {"error": "log not found", "org_id": org_id, "id": log_id},
+                status_code=404,
+            )
+        row = result.data[0]
+        row["context"] = await reconstruct(row, get_vector_store(), db)
+        return row
     except Exception as e:
-        return {"error": str(e), "org_id": org_id, "logs": []}
+        return {"error": str(e), "org_id": org_id, "id": log_id}
+
+
+class IngestItem(BaseModel):
+    context_type: Optional[str] = None
+    content: Optional[str] = None
+    entity_name: Optional[str] = None
+    entity_type: Optional[str] = None
+    entity_state: Optional[dict] = None
+    metadata: Optional[dict] = None
+
+
+class IngestRequest(BaseModel):
+    org_id: str
+    items: List[IngestItem] = Field(
+        ..., min_length=1, max_length=int(os.getenv("INGEST_MAX_ITEMS", "5000"))
+    )
+
+
+@app.post("/v1/ingest")
+async def ingest(request: IngestRequest):
+    """Bulk-load context items (see context/ingest.py); safe to re-send"""
+    try:
+        items = [i.model_dump(exclude_none=True) for i in request.items]
+        return await get_ingester().ingest(request.org_id, items)
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
 
 
 class WebhookPayload(BaseModel):
@@ -93,20 +568,34 @@ class WebhookPayload(BaseModel):
     result: str
     entities: Optional[list] = []
     org_id: str = "genios_internal"
+    # Fields to merge into the first entity's current state
+    entity_state: Optional[dict] = None
 
 
-@app.post("/v1/openclaw-webhook")
+@app.post("/v1/openclaw-webhook", status_code=202)
 async def openclaw_webhook(payload: WebhookPayload):
-    """Capture OpenClaw task outcomes and store as new context for learning"""
-    try:
-        from context.store import store_context
-
-        # Store outcome as decision context
-        content = f"Task: {payload.task_description}. Result: {payload.result}"
-        entity = payload.entities[0] if payload.entities else None
+    """
+    Capture OpenClaw task outcomes and store as new context for learning.
 
-        store_context(payload.org_id, "decision", content, entity)
+    Outcomes are queued and written in batches in the background; the
+    response only confirms they were accepted. A full queue answers 503 so
+    OpenClaw retries later.
+    """
+    entity = payload.entities[0] if payload.entities else None
+    item = {
+        "context_type": "decision",
+        "content": f"Task: {payload.task_description}. Result: {payload.result}",
+        "entity_name": entity,
+    }
+    if entity and payload.entity_state:
+        item["entity_state"] = payload.entity_state
 
-        return {"status": "logged", "task": payload.task_description}
-    except Exception as e:
-        return {"status": "error", "message": str(e)}
+    status = await outcome_queue.submit(payload.org_id, item)
+    if status == "rejected":
+        metrics.errors.inc(stage="webhook_queue_full")
+        return JSONResponse(
+            {"status": "busy", "message": "Outcome queue is full, retry later"},
+            status_code=503,
+            headers={"Retry-After": "1"},
+        )
+    return {"status": status, "task": payload.task_description}
@@ -0,0 +1,177 @@
+"""
+In-process Prometheus metrics.
+
+Request paths record per-stage latency and errors as they run; counters
+the components already keep (cache hits, token totals, queue depths) are
+read at scrape time through registered collectors. `render()` produces the
+text exposition format served at /metrics, and `server_timing()` the
+`Server-Timing` header for one request's stage timings.
+"""
+
+import math
+import os
+import re
+
+# Seconds; covers cache hits (~ms) through slow Gemini generations
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Orgs beyond this many get the label "other", bounding series count
+ORG_LABEL_LIMIT = int(os.getenv("METRICS_ORG_LABEL_LIMIT", "100"))
+
+_orgs = set()
+_metrics = []
+_collectors = []
+
+
+def org_label(org_id) -> str:
+    if not org_id:
+        return "none"
+    if org_id in _orgs or len(_orgs) < ORG_LABEL_LIMIT:
+        _orgs.add(org_id)
+        return org_id
+    return "other"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=None) -> str:
+    pairs = list(zip(names, values)) + (extra or [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _number(value) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        _metrics.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, key)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames=(), buckets=BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self.values = {}  # labels -> [bucket counts..., sum, count]
+        _metrics.append(self)
+
+    def observe(self, seconds: float, **labels):
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        series = self.values.get(key)
+        if series is None:
+            series = self.values[key] = [0] * len(self.buckets) + [0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                series[i] += 1
+        series[-2] += seconds
+        series[-1] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, series in sorted(self.values.items()):
+            for bound, count in zip(self.buckets + (math.inf,), series[:-2] + [series[-1]]):
+                le = [("le", _number(bound))]
+                lines.append(
+                    f"{self.name}_bucket{_labels(self.labelnames, key, le)} {count}"
+                )
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {series[-2]!r}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {series[-1]}")
+        return lines
+
+
+stage_seconds = Histogram(
+    "genios_stage_duration_seconds",
+    "Latency of one pipeline stage of a request",
+    ("route", "stage", "org"),
+)
+request_seconds = Histogram(
+    "genios_request_duration_seconds",
+    "End-to-end latency of API requests",
+    ("route", "org"),
+)
+errors = Counter("genios_errors_total", "Errors by pipeline stage", ("stage",))
+http_requests = Counter(
+    "genios_http_requests_total",
+    "HTTP requests by route and status code",
+    ("route", "method", "status"),
+)
+verdicts = Counter(
+    "genios_verdicts_total",
+    "Verdicts returned, by verdict and by what produced them",
+    ("verdict", "source"),
+)
+
+
+def observe(route: str, org_id, timings: dict, total_ms: float = None):
+    """Record one request's stage timings (ms, as filled in by `timed`)"""
+    org = org_label(org_id)
+    for stage, ms in timings.items():
+        stage_seconds.observe(ms / 1000, route=route, stage=stage, org=org)
+    if total_ms is not None:
+        request_seconds.observe(total_ms / 1000, route=route, org=org)
+
+
+def server_timing(timings: dict, total_ms: float = None) -> str:
+    parts = [
+        f"{re.sub(r'[^A-Za-z0-9_-]', '_', stage)};dur={ms:.1f}"
+        for stage, ms in timings.items()
+    ]
+    if total_ms is not None:
+        parts.append(f"total;dur={total_ms:.1f}")
+    return ", ".join(parts)
+
+
+def register_collector(collect):
+    """`collect()` returns (name, help, value) gauges read at scrape time"""
+    _collectors.append(collect)
+
+
+def gauges_from_stats(prefix: str, stats) -> list:
+    """Numeric leaves of a nested stats dict as (name, help, value) gauges"""
+    if not isinstance(stats, dict):
+        return []
+    gauges = []
+    for key, value in stats.items():
+        name = f"{prefix}_{re.sub(r'[^a-zA-Z0-9_]', '_', str(key))}"
+        if isinstance(value, dict):
+            gauges += gauges_from_stats(name, value)
+        elif isinstance(value, (bool, int, float)):
+            gauges.append((name, f"{key} (see /v1/stats)", float(value)))
+    return gauges
+
+
+def render() -> str:
+    lines = []
+    for metric in _metrics:
+        lines += metric.render()
+    for collect in _collectors:
+        try:
+            gauges = collect()
+        except Exception as e:
+            print(f"[WARN] Metrics collector failed: {e}")
+            continue
+        for name, help, value in gauges:
+            lines += [f"# HELP {name} {help}", f"# TYPE {name} gauge", f"{name} {value!r}"]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,110 @@
+from context.cache import TTLCache
+from context.events import org_version
+import copy
+import hashlib
+import json
+import numpy as np
+
+
+def _normalize(text) -> str:
+    return " ".join(str(text or "").lower().split())
+
+
+def context_fingerprint(org_id: str, context: dict) -> str:
+    """
+    Hash of the context content an answer was derived from.
+
+    Retrieval scores and ordering are ignored so that near-identical intents
+    resolving to the same facts share a fingerprint; the org's context
+    version makes any write to that org change it.
+    """
+    facts = {
+        "version": org_version(org_id),
+        "profile": context.get("profile"),
+        "entity_state": context.get("entity_state"),
+        "policies": sorted(p["content"] for p in context.get("policies", [])),
+        "relationships": sorted(
+            r["content"] for r in context.get("relationships", [])
+        ),
+        "decisions": sorted(d["content"] for d in context.get("decisions", [])),
+    }
+    raw = json.dumps(facts, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class VerdictCache:
+    """
+    Two-tier cache of ReasoningEngine verdicts.
+
+    Tier 1 is an exact hit on (org, intent, entity, context fingerprint).
+    Tier 2 is a semantic hit: same org, entity and fingerprint, and the
+    cosine similarity of the intent embeddings is at least `threshold`.
+    """
+
+    def __init__(self, maxsize=1024, ttl=900.0, threshold=0.95):
+        self.entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.threshold = threshold
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.saved_llm_ms = 0.0
+
+    def get(self, org_id, intent, entity_name, fingerprint, intent_vector=None):
+        key = (org_id, _normalize(intent), _normalize(entity_name), fingerprint)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.exact_hits += 1
+            return self._hit(entry)
+
+        if intent_vector is not None:
+            # Not in place: the vector may be the embed cache's own array
+            query = np.asarray(intent_vector, dtype=np.float32)
+            query = query / (np.linalg.norm(query) or 1.0)
+            best, best_score = None, self.threshold
+            for other in self.entries.keys():
+                if other[0] != org_id or other[2:] != key[2:]:
+                    continue
+                candidate = self.entries.peek(other)
+                if candidate is None or candidate["vector"] is None:
+                    continue
+                score = float(candidate["vector"] @ query)
+                if score >= best_score:
+                    best, best_score = candidate, score
+            if best is not None:
+                self.semantic_hits += 1
+                return self._hit(best)
+
+        self.misses += 1
+        return None
+
+    def _hit(self, entry):
+        self.saved_llm_ms += entry["llm_ms"]
+        return copy.deepcopy(entry["result"])
+
+    def set(self, org_id, intent, entity_name, fingerprint, result, llm_ms, intent_vector=None):
+        vector = None
+        if intent_vector is not None:
+            vector = np.asarray(intent_vector, dtype=np.float32)
+            vector = vector / (np.linalg.norm(vector) or 1.0)
+        key = (org_id, _normalize(intent), _normalize(entity_name), fingerprint)
+        self.entries.set(
+            key, {"result": copy.deepcopy(result), "llm_ms": llm_ms, "vector": vector}
+        )
+
+    def invalidate_org(self, org_id, context_type=None, entity_name=None):
+        """Drop every cached verdict for an org whose context changed"""
+        for key in self.entries.keys():
+            if key[0] == org_id:
+                self.entries.pop(key)
+
+    def stats(self) -> dict:
+        lookups = self.exact_hits + self.semantic_hits + self.misses
+        hits = self.exact_hits + self.semantic_hits
+        return {
+            "size": len(self.entries),
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "saved_llm_ms": round(self.saved_llm_ms, 1),
+        }
@@ -1,13 +1,73 @@
-import google.generativeai as genai
+from google.genai import types
+from context.events import subscribe
+from context.stages import stage
+from reasoning.cache import VerdictCache, context_fingerprint
+from reasoning.prefix_cache import PrefixCache
+from reasoning.prompt import PromptBuilder
+from reasoning.schema import EnrichVerdict
+from reasoning import rules
+from reasoning.stream_parser import IncrementalJSONParser
+import clients
+import metrics
 import os
 import json
 import re
+import time
+
+# Models that don't support `response_schema`
+LEGACY_MODEL_PREFIXES = ("gemini-1.0", "gemini-pro")
+
+
+async def _chain(first, rest):
+    """A stream whose first chunk was already fetched"""
+    if first is not None:
+        yield first
+    async for chunk in rest:
+        yield chunk
 
 
 class ReasoningEngine:
-    def __init__(self):
-        genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-        self.model = genai.GenerativeModel(model_name="gemini-2.5-flash")
+    def __init__(self, client=None):
+        self.client = client or clients.gemini()
+        self.model_name = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+
+        # Schema-constrained JSON output; legacy models without response
+        # schema support fall back to the _extract_json strategies
+        self.structured_output = os.getenv("STRUCTURED_OUTPUT", "1") != "0" and (
+            not self.model_name.startswith(LEGACY_MODEL_PREFIXES)
+        )
+        self.parse_stats = {"parses": 0, "failures": 0, "parse_ms_total": 0.0}
+
+        # Prompts are assembled under a token budget; sizes are aggregated here
+        self.prompt_builder = PromptBuilder.from_env()
+        self.prompt_stats = {
+            "prompts": 0,
+            "estimated_tokens_total": 0,
+            "estimated_tokens_max": 0,
+            "actual_tokens_total": 0,
+            "cached_tokens_total": 0,
+            "items_dropped": 0,
+            "items_deduped": 0,
+        }
+
+        # The static prompt prefix is registered as a Gemini cached context
+        self.prefix_cache = None
+        if os.getenv("PROMPT_CACHE_ENABLED", "1") != "0":
+            self.prefix_cache = PrefixCache.from_env(self.model_name)
+
+        # Clear-cut rules are decided from structured data without the LLM
+        self.rules_enabled = os.getenv("RULES_FAST_PATH_ENABLED", "1") != "0"
+
+        # Identical or near-identical intents against unchanged context
+        # return the same verdict, so skip the LLM for them
+        self.verdict_cache = None
+        if os.getenv("VERDICT_CACHE_ENABLED", "1") != "0":
+            self.verdict_cache = VerdictCache(
+                maxsize=int(os.getenv("VERDICT_CACHE_SIZE", "1024")),
+                ttl=float(os.getenv("VERDICT_CACHE_TTL_SECONDS", "900")),
+                threshold=float(os.getenv("VERDICT_CACHE_SIMILARITY", "0.95")),
+            )
+            subscribe(self.verdict_cache.invalidate_org)
 
     def _extract_json(self, text: str) -> dict:
         """
@@ -45,117 +105,318 @@ class ReasoningEngine:
         last_error = None
         for strategy_name, json_candidate in strategies:
             try:
-                result = json.loads(json_candidate)
-                print(f"[SUCCESS] JSON extraction successful using: {strategy_name}")
-                return result
+                return json.loads(json_candidate)
             except json.JSONDecodeError as e:
-                last_error = (strategy_name, str(e), json_candidate[:100])
+                last_error = (strategy_name, str(e))
                 continue
 
         # All strategies failed
         error_msg = (
             f"All JSON extraction strategies failed. Last attempt: {last_error[0]}"
         )
-        print(f"[ERROR] {error_msg} - {last_error[1]}")
-        print(f"[DEBUG] Last candidate text (first 100 chars): {last_error[2]}")
+        # Model output can carry user data, so only its size is logged
+        print(f"[WARN] {error_msg} - {last_error[1]} ({len(text)} chars of output)")
 
         raise json.JSONDecodeError(error_msg, text, 0)
 
-    def enrich(self, intent: str, context: dict, entity_name: str = None):
-        """Enhanced reasoning with policy evaluation and structured output"""
+    def _parse(self, text: str) -> dict:
+        """
+        Parse a model response into a verdict dict, timing it.
 
-        # Build context sections
-        policies_text = "\n".join(
-            [f"- {p['content']}" for p in context.get("policies", [])]
+        Structured output is validated against EnrichVerdict in one pass;
+        legacy models go through _extract_json. Raises ValueError.
+        """
+        start = time.perf_counter()
+        try:
+            if self.structured_output:
+                return EnrichVerdict.model_validate_json(text).model_dump()
+            result = self._extract_json(text)
+            # Ensure all required fields exist
+            result.setdefault("flags", [])
+            result.setdefault("key_context_used", [])
+            return result
+        except ValueError:
+            self.parse_stats["failures"] += 1
+            raise
+        finally:
+            self.parse_stats["parses"] += 1
+            self.parse_stats["parse_ms_total"] += (time.perf_counter() - start) * 1000
+
+    def _output_config(self) -> dict:
+        if not self.structured_output:
+            return {}
+        return {
+            "response_mime_type": "application/json",
+            "response_schema": EnrichVerdict,
+        }
+
+    def _build_prompt(self, intent: str, context: dict, usage: dict = None):
+        """(static prefix, per-request prompt)"""
+        prefix, prompt, built = self.prompt_builder.build(intent, context)
+        stats = self.prompt_stats
+        stats["prompts"] += 1
+        stats["estimated_tokens_total"] += built["prompt_tokens"]
+        stats["estimated_tokens_max"] = max(
+            stats["estimated_tokens_max"], built["prompt_tokens"]
         )
-        relationships_text = "\n".join(
-            [f"- {r['content'][:200]}" for r in context.get("relationships", [])]
+        stats["items_dropped"] += built["items_dropped"]
+        stats["items_deduped"] += built["items_deduped"]
+        if usage is not None:
+            usage.update(built)
+        return prefix, prompt
+
+    async def _call_model(self, prefix: str, prompt: str, stream: bool = False):
+        """generate_content(_stream) with the prefix from the context cache when possible"""
+        models = self.client.aio.models
+        call = models.generate_content_stream if stream else models.generate_content
+        name = None
+        if self.prefix_cache is not None:
+            name = await self.prefix_cache.get(self.client, prefix)
+        if name:
+            try:
+                response = await call(
+                    model=self.model_name,
+                    contents=prompt,
+                    config=types.GenerateContentConfig(
+                        cached_content=name, **self._output_config()
+                    ),
+                )
+                if not stream:
+                    return response
+                # A rejected cache surfaces on the first chunk of a stream,
+                # so fetch it here where the fallback can still apply
+                chunks = response.__aiter__()
+                try:
+                    first = await chunks.__anext__()
+                except StopAsyncIteration:
+                    return _chain(None, chunks)
+                return _chain(first, chunks)
+            except Exception as e:
+                print(f"[WARN] Cached prompt prefix rejected, sending inline: {e}")
+                self.prefix_cache.invalidate(prefix)
+        return await call(
+            model=self.model_name,
+            contents=prompt,
+            config=types.GenerateContentConfig(
+                system_instruction=prefix, **self._output_config()
+            ),
         )
-        profile_text = context.get("profile", "No profile available")
-        entity_state_text = str(context.get("entity_state", "No entity state found"))
-
-        prompt = f"""
-You are GeniOS Brain - the cognitive decision layer for AI agents.
-
-Your job: Analyze the user's intent against organizational context and policies, then return a structured decision.
-
-=== USER INTENT ===
-{intent}
-
-=== ORGANIZATION PROFILE ===
-{profile_text}
-
-=== ACTIVE POLICIES ===
-{policies_text if policies_text else "No policies retrieved"}
-
-=== RELEVANT RELATIONSHIPS ===
-{relationships_text if relationships_text else "No relationships found"}
-
-=== ENTITY STATE (if applicable) ===
-{entity_state_text}
-
-=== DECISION RULES (in priority order) ===
-1. Information requests (asking "what is", "tell me about", policy questions) → PROCEED with the requested information.
-2. Internal communications (to "team", "staff", internal updates, "cc team", notifying team) → ALWAYS PROCEED, never escalate.
-3. If entity is TRULY vague (e.g., "someone", "a person", no context) AND action requires specific person → CLARIFY who specifically.
-4. Sharing financial data/projections/internal metrics:
-   - If founder approval NOT mentioned → BLOCK and flag policy violation.
-   - If founder approval IS mentioned → ESCALATE to founder for final confirmation.
-5. If investor said no recently (cold status, said_no=true) → BLOCK from contacting.
-6. If INVESTOR initiates meeting/demo request AND we are RESPONDING → ESCALATE to founder for meeting coordination.
-7. Routine investor communications (follow-ups, thank you emails, product updates to warm/engaged investors) → PROCEED with personalization.
-8. Automated/template emails without personalization → ESCALATE for manual personalization review.
-9. If policy explicitly restricts this action → ESCALATE with policy reference.
-10. Otherwise → PROCEED with enriched context.
-
-IMPORTANT CLARIFICATIONS:
-- "Draft email to investor about updates" = routine communication → PROCEED
-- "Investor requested meeting" = escalation trigger → ESCALATE
-- "Thank you after demo" = routine follow-up → PROCEED  
-- "Email team about investor" = internal → ALWAYS PROCEED
-- "Automated mass email" = no personalization → ESCALATE
-
-=== REQUIRED OUTPUT ===
-Return ONLY valid JSON (no markdown, no code blocks):
-
-{{
-  "verdict": "PROCEED | ESCALATE | BLOCK | CLARIFY",
-  "enriched_brief": "3-5 sentences explaining the context, what the agent should know, and personalized guidance",
-  "recommended_action": "Specific next step the agent should take",
-  "flags": ["list", "of", "policy violations or concerns if any"],
-  "key_context_used": ["fact 1", "fact 2", "fact 3"],
-  "confidence": 0.85
-}}
-"""
-
-        response = self.model.generate_content(prompt)
 
+    def _record_usage(self, response, usage: dict = None):
+        """Exact prompt token count from the response, when Gemini reports it"""
+        metadata = getattr(response, "usage_metadata", None)
+        tokens = getattr(metadata, "prompt_token_count", None)
+        if tokens:
+            self.prompt_stats["actual_tokens_total"] += tokens
+            if usage is not None:
+                usage["prompt_tokens_actual"] = tokens
+        cached = getattr(metadata, "cached_content_token_count", None)
+        if cached:
+            self.prompt_stats["cached_tokens_total"] += cached
+            if usage is not None:
+                usage["cached_tokens"] = cached
+
+    def _cache_lookup(self, intent, context, entity_name, org_id, intent_vector):
+        """Return (fingerprint, cached verdict or None)"""
+        if self.verdict_cache is None or not org_id:
+            return None, None
+        fingerprint = context_fingerprint(org_id, context)
+        cached = self.verdict_cache.get(
+            org_id, intent, entity_name, fingerprint, intent_vector
+        )
+        return fingerprint, cached
+
+    @staticmethod
+    def _counted(result: dict, source: str) -> dict:
+        metrics.verdicts.inc(verdict=result.get("verdict"), source=source)
+        return result
+
+    def _error_result(self, message: str, flag: str) -> dict:
+        return {
+            "verdict": "ERROR",
+            "enriched_brief": message,
+            "recommended_action": "Manual review required",
+            "flags": [flag],
+            "key_context_used": [],
+            "confidence": 0.0,
+        }
+
+    async def enrich(
+        self,
+        intent: str,
+        context: dict,
+        entity_name: str = None,
+        org_id: str = None,
+        intent_vector=None,
+        usage: dict = None,
+        timings: dict = None,
+    ):
+        """
+        Enhanced reasoning with policy evaluation and structured output.
+
+        Clear-cut cases are answered by the deterministic rules in
+        reasoning/rules.py (`rule_fired` names the rule). When `org_id` is
+        given, verdicts are served from the verdict cache; `intent_vector`
+        (the retrieval embedding) enables semantic hits. Pass a dict as
+        `usage` to receive the prompt size of this request, and as `timings`
+        to receive per-stage latency in milliseconds.
+        """
+        if self.rules_enabled:
+            with stage("rules", timings):
+                result = rules.evaluate(intent, context, entity_name)
+            if result is not None:
+                return self._counted(result, "rules")
+
+        with stage("verdict_cache", timings):
+            fingerprint, cached = self._cache_lookup(
+                intent, context, entity_name, org_id, intent_vector
+            )
+        if cached is not None:
+            return self._counted(cached, "cache")
+
+        with stage("prompt_build", timings):
+            prefix, prompt = self._build_prompt(intent, context, usage)
+
+        llm_start = time.perf_counter()
         try:
-            result = self._extract_json(response.text)
-            # Ensure all required fields exist
-            if "flags" not in result:
-                result["flags"] = []
-            if "key_context_used" not in result:
-                result["key_context_used"] = []
-            return result
-        except json.JSONDecodeError as e:
-            print(f"[ERROR] JSON parsing failed: {str(e)}")
-            print(f"[DEBUG] Full model response:\n{response.text}")
-            return {
-                "verdict": "ERROR",
-                "enriched_brief": f"Failed to parse model response. Error: {str(e)[:100]}",
-                "recommended_action": "Manual review required",
-                "flags": ["json_parse_error"],
-                "key_context_used": [],
-                "confidence": 0.0,
-            }
+            response = await self._call_model(prefix, prompt)
+        except Exception:
+            metrics.errors.inc(stage="generate")
+            raise
+        llm_ms = (time.perf_counter() - llm_start) * 1000
+        if timings is not None:
+            timings["generate"] = round(llm_ms, 2)
+        self._record_usage(response, usage)
+
+        try:
+            with stage("parse", timings):
+                result = self._parse(response.text)
+        except ValueError as e:
+            print(
+                f"[WARN] Verdict parsing failed ({type(e).__name__}, "
+                f"{len(response.text or '')} chars of output)"
+            )
+            metrics.errors.inc(stage="parse")
+            return self._counted(
+                self._error_result(
+                    f"Failed to parse model response. Error: {str(e)[:100]}",
+                    "json_parse_error",
+                ),
+                "error",
+            )
         except Exception as e:
             print(f"[ERROR] Unexpected error: {str(e)}")
-            return {
-                "verdict": "ERROR",
-                "enriched_brief": f"Unexpected error: {str(e)[:100]}",
-                "recommended_action": "Manual review required",
-                "flags": ["unexpected_error"],
-                "key_context_used": [],
-                "confidence": 0.0,
-            }
+            metrics.errors.inc(stage="parse")
+            return self._counted(
+                self._error_result(
+                    f"Unexpected error: {str(e)[:100]}", "unexpected_error"
+                ),
+                "error",
+            )
+
+        if fingerprint is not None:
+            self.verdict_cache.set(
+                org_id, intent, entity_name, fingerprint, result, llm_ms,
+                intent_vector,
+            )
+        return self._counted(result, "llm")
+
+    async def enrich_stream(
+        self,
+        intent: str,
+        context: dict,
+        entity_name: str = None,
+        org_id: str = None,
+        intent_vector=None,
+        usage: dict = None,
+        timings: dict = None,
+    ):
+        """
+        Streaming variant of `enrich`.
+
+        Yields (field, value) pairs as soon as each top-level field of the
+        verdict object has been generated, so `verdict` arrives at
+        time-to-first-field. The final pair is ("done", full_result).
+        `timings` additionally gets "first_field", the time from the model
+        call to the first field event.
+        """
+        ready, source, fingerprint = None, None, None
+        if self.rules_enabled:
+            with stage("rules", timings):
+                ready = rules.evaluate(intent, context, entity_name)
+            source = "rules"
+        if ready is None:
+            with stage("verdict_cache", timings):
+                fingerprint, ready = self._cache_lookup(
+                    intent, context, entity_name, org_id, intent_vector
+                )
+            source = "cache"
+        if ready is not None:
+            for field, value in ready.items():
+                yield field, value
+            yield "done", self._counted(ready, source)
+            return
+
+        with stage("prompt_build", timings):
+            prefix, prompt = self._build_prompt(intent, context, usage)
+        parser = IncrementalJSONParser()
+        text = ""
+
+        llm_start = time.perf_counter()
+        try:
+            stream = await self._call_model(prefix, prompt, stream=True)
+            chunk = None
+            async for chunk in stream:
+                text += chunk.text or ""
+                try:
+                    for field, value in parser.feed(chunk.text or ""):
+                        if timings is not None and "first_field" not in timings:
+                            timings["first_field"] = round(
+                                (time.perf_counter() - llm_start) * 1000, 2
+                            )
+                        yield field, value
+                except json.JSONDecodeError:
+                    # Malformed partial output; recover from the full text below
+                    parser.done = True
+        except Exception as e:
+            print(f"[ERROR] Streaming generation failed: {str(e)}")
+            metrics.errors.inc(stage="generate")
+            yield "done", self._counted(
+                self._error_result(
+                    f"Unexpected error: {str(e)[:100]}", "unexpected_error"
+                ),
+                "error",
+            )
+            return
+        llm_ms = (time.perf_counter() - llm_start) * 1000
+        if timings is not None:
+            timings["generate"] = round(llm_ms, 2)
+        # Usage metadata is complete on the final chunk
+        self._record_usage(chunk, usage)
+
+        # One validating parse of the full text; the incremental parser
+        # only serves early field events
+        try:
+            with stage("parse", timings):
+                result = self._parse(text)
+        except ValueError as e:
+            metrics.errors.inc(stage="parse")
+            yield "done", self._counted(
+                self._error_result(
+                    f"Failed to parse model response. Error: {str(e)[:100]}",
+                    "json_parse_error",
+                ),
+                "error",
+            )
+            return
+        # Emit whatever the incremental parser missed (including defaults)
+        for field, value in result.items():
+            if field not in parser.fields:
+                yield field, value
+
+        if fingerprint is not None:
+            self.verdict_cache.set(
+                org_id, intent, entity_name, fingerprint, result, llm_ms,
+                intent_vector,
+            )
+        yield "done", self._counted(result, "llm")
@@ -0,0 +1,118 @@
+"""
+Gemini context caching for the static prompt prefix.
+
+The prefix (role, org profile, org policies, decision rules, output schema)
+is the same for every request of an org, so it is registered once with
+`client.aio.caches.create` and referenced by name from each call instead of
+being re-sent and re-processed. Entries are keyed by a hash of the prefix
+text -- a profile change yields a new prefix and a new cache -- and are
+recreated shortly before they expire. Gemini rejects caches below a
+model-specific minimum size, so smaller prefixes are never registered
+(with a one-time warning);
+creation failures back off for `retry_seconds`, and callers fall back to
+sending the prefix as a plain system instruction.
+"""
+
+from google.genai import types
+from reasoning.prompt import estimate_tokens
+import asyncio
+import hashlib
+import os
+import time
+
+
+class PrefixCache:
+    def __init__(
+        self,
+        model: str,
+        ttl_seconds: int = 3600,
+        min_tokens: int = 1024,
+        retry_seconds: float = 300.0,
+        refresh_margin: float = 60.0,
+    ):
+        self.model = model
+        self.ttl_seconds = ttl_seconds
+        self.min_tokens = min_tokens
+        self.retry_seconds = retry_seconds
+        self.refresh_margin = refresh_margin
+        self.entries = {}  # digest -> (cache name, monotonic expiry)
+        self._failed_until = {}
+        self._locks = {}
+        self.hits = 0
+        self.creates = 0
+        self.failures = 0
+        self.skipped = 0
+        self._warned_small = False
+
+    def _digest(self, prefix: str) -> str:
+        return hashlib.sha256(f"{self.model}\n{prefix}".encode()).hexdigest()
+
+    def _fresh(self, digest: str):
+        entry = self.entries.get(digest)
+        if entry and entry[1] - self.refresh_margin > time.monotonic():
+            return entry[0]
+        return None
+
+    @classmethod
+    def from_env(cls, model: str):
+        return cls(
+            model,
+            ttl_seconds=int(os.getenv("PROMPT_CACHE_TTL_SECONDS", "3600")),
+            min_tokens=int(os.getenv("PROMPT_CACHE_MIN_TOKENS", "1024")),
+        )
+
+    async def get(self, client, prefix: str):
+        """Name of a live cache holding `prefix`, or None to send it inline"""
+        tokens = estimate_tokens(prefix)
+        if tokens < self.min_tokens:
+            self.skipped += 1
+            if not self._warned_small:
+                self._warned_small = True
+                print(
+                    f"[WARN] Prompt prefix is ~{tokens} tokens, below the "
+                    f"{self.min_tokens}-token caching minimum; sending it inline"
+                )
+            return None
+        digest = self._digest(prefix)
+        name = self._fresh(digest)
+        if name:
+            self.hits += 1
+            return name
+        if self._failed_until.get(digest, 0) > time.monotonic():
+            return None
+
+        async with self._locks.setdefault(digest, asyncio.Lock()):
+            name = self._fresh(digest)
+            if name:
+                self.hits += 1
+                return name
+            try:
+                cache = await client.aio.caches.create(
+                    model=self.model,
+                    config=types.CreateCachedContentConfig(
+                        system_instruction=prefix,
+                        display_name=f"genios-prefix-{digest[:16]}",
+                        ttl=f"{self.ttl_seconds}s",
+                    ),
+                )
+            except Exception as e:
+                self.failures += 1
+                self._failed_until[digest] = time.monotonic() + self.retry_seconds
+                print(f"[WARN] Prompt prefix caching failed, sending inline: {e}")
+                return None
+            self.creates += 1
+            self.entries[digest] = (cache.name, time.monotonic() + self.ttl_seconds)
+            return cache.name
+
+    def invalidate(self, prefix: str):
+        """Forget a cache the API no longer accepts (expired or deleted)"""
+        self.entries.pop(self._digest(prefix), None)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "creates": self.creates,
+            "failures": self.failures,
+            "skipped_below_min_tokens": self.skipped,
+        }
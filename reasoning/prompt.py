@@ -0,0 +1,200 @@
+"""
+Prompt assembly for ReasoningEngine under a token budget.
+
+The prompt is split into a static prefix (role, org profile, the org's full
+policy set, decision rules, output schema), sent as the system instruction
+and cacheable per org, and the per-request context. Policies are pinned per
+org (context/snapshot.py), so they belong with the profile in the prefix;
+the per-request part only carries their checks against this entity's
+state. The prefix, intent, policy checks and entity state are always
+included. Retrieved relationships and past outcomes are
+deduplicated (webhook outcomes repeat), ranked by retrieval score and
+added until the budget is spent. Token counts are estimated at ~4 characters per token,
+which is close enough for Gemini to budget with; the exact count comes back
+in the response's usage metadata.
+"""
+
+import json
+import math
+import os
+
+# Identical for every request of an org, so Gemini can cache it
+PREFIX_TEMPLATE = """
+You are GeniOS Brain - the cognitive decision layer for AI agents.
+
+Your job: Analyze the user's intent against organizational context and policies, then return a structured decision.
+
+=== ORGANIZATION PROFILE ===
+{profile}
+
+=== ORGANIZATION POLICIES ===
+{policies}
+
+=== DECISION RULES (in priority order) ===
+1. Information requests (asking "what is", "tell me about", policy questions) → PROCEED with the requested information.
+2. Internal communications (to "team", "staff", internal updates, "cc team", notifying team) → ALWAYS PROCEED, never escalate.
+3. If entity is TRULY vague (e.g., "someone", "a person", no context) AND action requires specific person → CLARIFY who specifically.
+4. Sharing financial data/projections/internal metrics:
+   - If founder approval NOT mentioned → BLOCK and flag policy violation.
+   - If founder approval IS mentioned → ESCALATE to founder for final confirmation.
+5. If investor said no recently (cold status, said_no=true) → BLOCK from contacting.
+6. If INVESTOR initiates meeting/demo request AND we are RESPONDING → ESCALATE to founder for meeting coordination.
+7. Routine investor communications (follow-ups, thank you emails, product updates to warm/engaged investors) → PROCEED with personalization.
+8. Automated/template emails without personalization → ESCALATE for manual personalization review.
+9. If policy explicitly restricts this action → ESCALATE with policy reference.
+10. Otherwise → PROCEED with enriched context.
+
+IMPORTANT CLARIFICATIONS:
+- "Draft email to investor about updates" = routine communication → PROCEED
+- "Investor requested meeting" = escalation trigger → ESCALATE
+- "Thank you after demo" = routine follow-up → PROCEED
+- "Email team about investor" = internal → ALWAYS PROCEED
+- "Automated mass email" = no personalization → ESCALATE
+
+=== REQUIRED OUTPUT ===
+Return ONLY valid JSON (no markdown, no code blocks):
+
+{{
+  "verdict": "PROCEED | ESCALATE | BLOCK | CLARIFY",
+  "flags": ["list", "of", "policy violations or concerns if any"],
+  "enriched_brief": "3-5 sentences explaining the context, what the agent should know, and personalized guidance",
+  "recommended_action": "Specific next step the agent should take",
+  "key_context_used": ["fact 1", "fact 2", "fact 3"],
+  "confidence": 0.85
+}}
+"""
+
+# The per-request part: intent and retrieved context
+CONTEXT_TEMPLATE = """
+=== USER INTENT ===
+{intent}
+
+=== POLICIES ALREADY SATISFIED (checked against entity state, do not re-apply) ===
+{satisfied}
+
+=== POLICY VIOLATIONS (pre-checked against entity state) ===
+{violations}
+
+=== RELEVANT RELATIONSHIPS ===
+{relationships}
+
+=== RECENT OUTCOMES (learned from past agent tasks) ===
+{decisions}
+
+=== ENTITY STATE (if applicable) ===
+{entity_state}
+"""
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / 4)
+
+
+def compact_json(value) -> str:
+    return json.dumps(value, separators=(",", ":"), sort_keys=True, default=str)
+
+
+def _truncate(text: str, max_chars: int) -> str:
+    """Collapse whitespace and cut at a word boundary"""
+    text = " ".join(text.split())
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars].rsplit(" ", 1)[0] + "…"
+
+
+class PromptBuilder:
+    def __init__(self, budget_tokens: int = 3000, item_max_chars: int = 400):
+        self.budget_tokens = budget_tokens
+        self.item_max_chars = item_max_chars
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            budget_tokens=int(os.getenv("PROMPT_TOKEN_BUDGET", "3000")),
+            item_max_chars=int(os.getenv("PROMPT_ITEM_MAX_CHARS", "400")),
+        )
+
+    def _ranked_items(self, context: dict):
+        """Relationships and decisions, deduplicated and best-scoring first"""
+        items = {}
+        for section in ("relationships", "decisions"):
+            for item in context.get(section, []):
+                key = " ".join(item["content"].lower().split())
+                seen = items.get(key)
+                if seen is None:
+                    items[key] = {
+                        "section": section,
+                        "content": item["content"],
+                        "score": item.get("confidence", 0.0),
+                        "count": item.get("count", 1),
+                    }
+                else:
+                    seen["count"] += item.get("count", 1)
+                    seen["score"] = max(seen["score"], item.get("confidence", 0.0))
+        return sorted(items.values(), key=lambda i: -i["score"])
+
+    def build(self, intent: str, context: dict):
+        """
+        Returns (prefix, prompt, usage) where usage has `prompt_tokens`
+        (estimated, both parts), `items_included`, `items_dropped` and
+        `items_deduped`.
+        """
+        # Compiled policies already checked against the entity state are
+        # summarised instead of re-interpreted
+        policies = [f"- {p['content']}" for p in context.get("policies", [])]
+        satisfied = [
+            f"- {p['content']}"
+            for p in context.get("policies", [])
+            if p.get("check") == "satisfied"
+        ]
+        violations = [
+            f"- {v['content']} (→ {v['effect']}, flag: {v['flag']})"
+            for v in context.get("policy_violations", [])
+        ]
+        entity_state = context.get("entity_state")
+        prefix = PREFIX_TEMPLATE.format(
+            profile=context.get("profile") or "No profile available",
+            policies="\n".join(policies) or "No policies on file",
+        )
+        fields = {
+            "intent": intent,
+            "satisfied": "\n".join(satisfied) or "None",
+            "violations": "\n".join(violations) or "None",
+            "entity_state": (
+                compact_json(entity_state)
+                if entity_state is not None
+                else "No entity state found"
+            ),
+        }
+
+        ranked = self._ranked_items(context)
+        lines = {"relationships": [], "decisions": []}
+        remaining = self.budget_tokens - estimate_tokens(
+            prefix + CONTEXT_TEMPLATE.format(relationships="", decisions="", **fields)
+        )
+        dropped = 0
+        for item in ranked:
+            line = f"- {_truncate(item['content'], self.item_max_chars)}"
+            if item["count"] > 1:
+                line += f" (seen {item['count']}x)"
+            cost = estimate_tokens(line) + 1
+            if cost > remaining:
+                dropped += 1
+                continue
+            lines[item["section"]].append(line)
+            remaining -= cost
+
+        prompt = CONTEXT_TEMPLATE.format(
+            relationships="\n".join(lines["relationships"]) or "No relationships found",
+            decisions="\n".join(lines["decisions"]) or "No recent outcomes",
+            **fields,
+        )
+        deduped = sum(
+            len(context.get(s, [])) for s in ("relationships", "decisions")
+        ) - len(ranked)
+        return prefix, prompt, {
+            "prompt_tokens": estimate_tokens(prefix + prompt),
+            "items_included": len(ranked) - dropped,
+            "items_dropped": dropped,
+            "items_deduped": deduped,
+        }
@@ -0,0 +1,208 @@
+"""
+Deterministic fast path for clear-cut decision rules.
+
+A few of the DECISION RULES in the reasoning prompt can be decided from the
+intent text and structured entity state alone. `evaluate` checks them in
+the prompt's priority order and returns a complete verdict (naming the rule
+in `rule_fired`) when one applies, or None to fall through to the LLM.
+Policies compiled into predicates (context/policies.py) that the entity
+state violates are enforced here too. Anything ambiguous -- information
+requests, internal messages that touch financial data, unknown entity
+state -- is left to the model.
+"""
+
+from context.policies import CONTACT_ACTION
+import re
+
+INFO_REQUEST = re.compile(
+    r"^\s*(what|who|when|where|which|why|how|is|are|does|do|can)\b"
+    r"|\b(tell me about|explain|summari[sz]e|look up|what is|what are)\b"
+)
+TEAM_MENTION = re.compile(r"\b(team|staff|co-?founders?|internal)\b")
+INTERNAL_AUDIENCE = re.compile(
+    r"\b(to|with|notify|inform|update|tell|ping|message|email|slack|send|share)\s+"
+    r"(the\s+|our\s+|my\s+)?(internal\s+)?(team|staff|co-?founders?|engineering team)\b"
+    r"|\binternal (update|memo|note|announcement)\b"
+)
+CC_INTERNAL = re.compile(r"\bcc\b")
+# A contact verb or preposition aimed at a named recipient other than the
+# team ("Email Amit ...", "... reach out to Amit"); matched case-sensitively
+# on the original intent so only capitalised names count
+EXTERNAL_RECIPIENT = re.compile(
+    r"\b(?i:reach out to|contact|e-?mail|message|ping|call|write to|follow[- ]?up with"
+    r"|reconnect with|check in with|nudge|pitch|introduce|meet with|to|with)\s+"
+    r"(?!(?i:the|our|my|internal|team|staff|co-?founders?)\b)[A-Z]"
+)
+FINANCIAL_DATA = re.compile(
+    r"\b(financial projections?|projections|financials|financial (data|model|statements?)"
+    r"|revenue (numbers|figures|data)|burn rate|runway|internal metrics|p&l|cap table)\b"
+)
+SHARE_ACTION = re.compile(r"\b(share|send|forward|email|attach|give|pass|show)\b")
+FOUNDER_APPROVAL = re.compile(
+    r"\b(founder|ceo)('s)?\s+(has\s+)?(approv\w*|sign(ed)?[- ]off|ok(ay)?(ed)?|green[- ]?lit)"
+    r"|\b(approv\w*|sign(ed)?[- ]off)\s+(from|by)\s+(the\s+)?(founder|ceo)\b"
+)
+# A negation cue up to three words before an approval mention, or a
+# "yet"/"pending" right after it, means approval has not been given
+NEGATED_BEFORE = re.compile(
+    r"\b(without|no|not|never|before|pending|awaiting|until|unless|lacking|\w+n't)\b"
+    r"(\s+\S+){0,3}\s*$"
+)
+NEGATED_AFTER = re.compile(r"^\W*(yet|pending|outstanding)\b")
+
+
+def _policy(context: dict, *keywords) -> list:
+    """Contents of policies mentioning any of `keywords`"""
+    return [
+        p["content"]
+        for p in context.get("policies", [])
+        if any(k in p["content"].lower() for k in keywords)
+    ]
+
+
+def _result(rule, verdict, brief, action, flags, facts, confidence=0.95) -> dict:
+    return {
+        "verdict": verdict,
+        "flags": flags,
+        "enriched_brief": brief,
+        "recommended_action": action,
+        "key_context_used": facts,
+        "confidence": confidence,
+        "rule_fired": rule,
+    }
+
+
+def _team_only(intent: str, context: dict, entity_name) -> bool:
+    """True if the team is the message's only audience"""
+    if entity_name or context.get("mentioned_entities"):
+        return False
+    return not EXTERNAL_RECIPIENT.search(intent)
+
+
+def _internal_communication(intent, context, entity_name):
+    """Rule 2: messages to the internal team always proceed"""
+    if not INTERNAL_AUDIENCE.search(intent) or CC_INTERNAL.search(intent):
+        return None
+    if FINANCIAL_DATA.search(intent):
+        return None  # internal vs. financial precedence is a judgment call
+    return _result(
+        "rule_2_internal_communication",
+        "PROCEED",
+        "This is an internal communication to the team, which does not need "
+        "escalation or external-outreach checks.",
+        "Send the internal update.",
+        [],
+        ["Internal communications always proceed"],
+    )
+
+
+def _has_founder_approval(intent: str) -> bool:
+    """True only if some mention of founder approval is not negated"""
+    for match in FOUNDER_APPROVAL.finditer(intent):
+        if NEGATED_BEFORE.search(intent[: match.start()]):
+            continue
+        if NEGATED_AFTER.search(intent[match.end() :]):
+            continue
+        return True
+    return False
+
+
+def _financial_data(intent, context, entity_name):
+    """Rule 4: sharing financial data needs founder approval"""
+    if not (FINANCIAL_DATA.search(intent) and SHARE_ACTION.search(intent)):
+        return None
+    facts = _policy(context, "financial")
+    if _has_founder_approval(intent):
+        return _result(
+            "rule_4_financial_data_escalate",
+            "ESCALATE",
+            "The request shares financial data and mentions founder approval. "
+            "Financial projections still go to the founder for final "
+            "confirmation before they leave the company.",
+            "Confirm with the founder before sending the financial data.",
+            ["financial_data_requires_founder_confirmation"],
+            facts,
+            confidence=0.9,
+        )
+    return _result(
+        "rule_4_financial_data_block",
+        "BLOCK",
+        "The request shares financial data without founder approval, which "
+        "policy forbids. Do not send projections, financials or internal "
+        "metrics until the founder has approved it.",
+        "Do not share the financial data; request founder approval first.",
+        ["policy_violation: financial data shared without founder approval"],
+        facts,
+    )
+
+
+def _declined_investor(intent, context, entity_name):
+    """Rule 5: don't contact investors who said no or went cold"""
+    state = context.get("entity_state")
+    if not isinstance(state, dict) or not CONTACT_ACTION.search(intent):
+        return None
+    said_no = state.get("said_no") is True
+    cold = str(state.get("status", "")).lower() == "cold"
+    if not (said_no or cold):
+        return None
+
+    name = entity_name or "This investor"
+    facts = [f"{name}: status {state.get('status', 'unknown')}"]
+    if said_no:
+        facts.append(f"{name} said no")
+    if state.get("last_contact_days_ago") is not None:
+        facts.append(f"Last contact {state['last_contact_days_ago']} days ago")
+    facts += _policy(context, "said no")
+    next_action = state.get("next_action")
+    return _result(
+        "rule_5_investor_declined",
+        "BLOCK",
+        f"{name} has {'explicitly said no' if said_no else 'gone cold'} "
+        "and should not be contacted right now. Reaching out again risks "
+        "the relationship and violates the outreach policy.",
+        f"Do not contact {name}; {next_action}." if next_action
+        else f"Do not contact {name}.",
+        ["investor_declined" if said_no else "investor_cold"],
+        facts,
+    )
+
+
+def _compiled_policy(intent, context, entity_name):
+    """Rule 9: a compiled policy the entity state violates"""
+    violations = context.get("policy_violations") or []
+    for effect in ("BLOCK", "ESCALATE"):
+        matched = [v for v in violations if v["effect"] == effect]
+        if not matched:
+            continue
+        return _result(
+            f"policy_{matched[0]['flag']}",
+            effect,
+            f"This request violates org policy: {matched[0]['content']} "
+            "The entity's current state was checked against the policy.",
+            "Do not proceed." if effect == "BLOCK"
+            else "Escalate to the founder with the policy reference before proceeding.",
+            [v["flag"] for v in matched],
+            [v["content"] for v in matched],
+            confidence=0.9,
+        )
+    return None
+
+
+def evaluate(intent: str, context: dict, entity_name: str = None):
+    """A complete verdict if a deterministic rule applies, else None"""
+    text = intent.lower()
+    # Rule 1 (information requests) needs the model to write the answer
+    if INFO_REQUEST.search(text):
+        return None
+    # Rule 2 outranks the rest when the team is the only audience: it either
+    # fires or leaves the decision to the model
+    team = TEAM_MENTION.search(text)
+    if team and _team_only(intent, context, entity_name):
+        return _internal_communication(text, context, entity_name)
+    for rule in (_financial_data, _declined_investor, _compiled_policy):
+        result = rule(text, context, entity_name)
+        if result is not None:
+            return result
+    # Internal and external audiences mixed, and nothing blocks it: the
+    # model weighs them
+    return None
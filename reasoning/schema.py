@@ -0,0 +1,19 @@
+from pydantic import BaseModel, Field
+from typing import List, Literal
+
+
+class EnrichVerdict(BaseModel):
+    """
+    The verdict object returned by /v1/enrich.
+
+    Passed to Gemini as `response_schema`, so the model's output is
+    constrained to this shape and parsed with one validation call. Field
+    order is the generation order; `verdict` comes first for streaming.
+    """
+
+    verdict: Literal["PROCEED", "ESCALATE", "BLOCK", "CLARIFY"]
+    flags: List[str] = Field(default_factory=list)
+    enriched_brief: str
+    recommended_action: str
+    key_context_used: List[str] = Field(default_factory=list)
+    confidence: float
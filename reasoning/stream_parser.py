@@ -0,0 +1,70 @@
+import json
+
+
+class IncrementalJSONParser:
+    """
+    Incremental parser for a single top-level JSON object.
+
+    Feed it text chunks as they stream in; `feed` returns the (key, value)
+    pairs of top-level fields completed by that chunk, so callers can act
+    on early fields before the rest of the object has arrived. Any text
+    before the opening brace (e.g. a markdown fence) is skipped.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.pos = 0
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.key_start = None
+        self.key = None
+        self.value_start = None
+        self.fields = {}
+        self.done = False
+
+    def feed(self, chunk: str) -> list:
+        self.buffer += chunk
+        completed = []
+        while self.pos < len(self.buffer) and not self.done:
+            char = self.buffer[self.pos]
+
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif char == "\\":
+                    self.escape = True
+                elif char == '"':
+                    self.in_string = False
+                    if self.depth == 1 and self.key_start is not None:
+                        self.key = json.loads(self.buffer[self.key_start : self.pos + 1])
+                        self.key_start = None
+            elif self.depth == 0:
+                if char == "{":
+                    self.depth = 1
+            elif char == '"':
+                self.in_string = True
+                if self.depth == 1 and self.key is None and self.value_start is None:
+                    self.key_start = self.pos
+            elif char in "{[":
+                self.depth += 1
+            elif char in "}]":
+                self.depth -= 1
+                if self.depth == 0:
+                    self._complete_field(completed)
+                    self.done = True
+            elif char == ":" and self.depth == 1 and self.key is not None:
+                self.value_start = self.pos + 1
+            elif char == "," and self.depth == 1:
+                self._complete_field(completed)
+
+            self.pos += 1
+        return completed
+
+    def _complete_field(self, completed: list):
+        if self.key is not None and self.value_start is not None:
+            value = json.loads(self.buffer[self.value_start : self.pos].strip())
+            self.fields[self.key] = value
+            completed.append((self.key, value))
+        self.key = None
+        self.value_start = None
@@ -4,14 +4,18 @@ from qdrant_client import QdrantClient
 from qdrant_client.models import Distance, VectorParams
 import os
 from dotenv import load_dotenv
+from context.embedder import collection_for, get_embedder
 
 load_dotenv()
 
+# One collection per embedding model so vectors are never mixed
+embedder = get_embedder()
+
 client = QdrantClient(url=os.getenv("QDRANT_URL"), api_key=os.getenv("QDRANT_API_KEY"))
 
 client.create_collection(
-    collection_name="genios_context",
-    vectors_config=VectorParams(size=384, distance=Distance.COSINE),
+    collection_name=collection_for(embedder),
+    vectors_config=VectorParams(size=embedder.dim, distance=Distance.COSINE),
 )
 
-print("Collection created")
+print(f"Collection {collection_for(embedder)} created for {embedder.model_id}")
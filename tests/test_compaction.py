@@ -0,0 +1,95 @@
+import asyncio
+
+import numpy as np
+
+from benchmarks.fakes import FakeGemini, FakeSupabase, fake_qdrant
+from context.compaction import CompactionJob, cluster, compact_decisions, outcome_result
+from context.embedder import GeminiEmbedder
+from context.ingest import BulkIngester
+from context.vector_store import make_vector_store
+
+ORG = "org_compact"
+
+
+def decision(entity, content):
+    return {"context_type": "decision", "entity_name": entity, "content": content}
+
+
+async def seeded(items):
+    db = FakeSupabase({"org_context": [], "entity_state": []}, latency_ms=0)
+
+    async def get_supabase():
+        return db
+
+    vectors = make_vector_store(await fake_qdrant(0), "genios_context", 384)
+    ingester = BulkIngester(
+        GeminiEmbedder(FakeGemini(embed_ms=0, generate_ms=0)), vectors, get_supabase
+    )
+    await ingester.ingest(ORG, items)
+    return db, vectors, get_supabase
+
+
+def test_cluster_groups_by_leader_similarity():
+    vectors = np.array([[1, 0], [0.99, 0.1], [0, 1], [0.1, 0.99]], dtype=np.float32)
+    assert cluster(vectors, 0.95) == [[0, 1], [2, 3]]
+
+
+def test_outcome_result_is_normalized():
+    assert outcome_result("Task: email Rahul. Result: Meeting  Booked.") == "meeting booked"
+    assert outcome_result("free text") == ""
+
+
+def test_outcomes_with_different_results_are_not_merged():
+    items = [
+        decision("Rahul", "Task: email Rahul the update. Result: Bounced"),
+        decision("Rahul", "Task: email Rahul the product update. Result: Bounced"),
+        decision("Rahul", "Task: email Rahul the update. Result: Meeting booked"),
+    ]
+
+    async def run():
+        db, vectors, get_supabase = await seeded(items)
+        result = await compact_decisions(ORG, vectors, get_supabase, threshold=0.5)
+        points = await vectors.scroll(ORG, ["decision"])
+        return result, db, points
+
+    result, db, points = asyncio.run(run())
+    assert result["clusters_merged"] == 1
+    assert result["decisions_after"] == 2
+    counts = {outcome_result(p.payload["content"]): p.payload.get("count", 1) for p in points}
+    assert counts == {"bounced": 2, "meeting booked": 1}
+    assert len(db.tables["org_context"]) == 2
+
+
+def test_rows_with_the_same_text_for_other_entities_survive():
+    items = [
+        decision("Rahul", "Task: send deck. Result: Sent"),
+        decision("Rahul", "Task: send the deck. Result: Sent"),
+        decision("Priya", "Task: send deck. Result: Sent"),
+    ]
+
+    async def run():
+        db, vectors, get_supabase = await seeded(items)
+        await compact_decisions(ORG, vectors, get_supabase, threshold=0.5)
+        return db
+
+    rows = asyncio.run(run()).tables["org_context"]
+    assert sorted(r["entity_name"] for r in rows) == ["Priya", "Rahul"]
+
+
+def test_decisions_written_during_a_pass_keep_the_org_dirty():
+    async def run():
+        db, vectors, get_supabase = await seeded(
+            [decision("Rahul", "Task: call. Result: Sent")]
+        )
+        job = CompactionJob(lambda: vectors, interval=0)
+
+        async def scroll(org_id, types, with_vectors=False):
+            job.on_context_changed(ORG, "decision")  # another writer
+            return []
+
+        vectors.scroll = scroll
+        job.dirty.add(ORG)
+        await job.run_once()
+        return job.dirty
+
+    assert asyncio.run(run()) == {ORG}
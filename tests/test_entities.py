@@ -0,0 +1,117 @@
+import asyncio
+
+from benchmarks.fakes import FakeSupabase
+from context.entities import EntityIndex, EntityMatcher
+
+
+def entities(matcher, message):
+    return [m["entity"] for m in matcher.find_all(message)]
+
+
+def make_matcher(*names):
+    matcher = EntityMatcher()
+    for name in names:
+        matcher.add(name)
+    return matcher
+
+
+def test_matches_are_case_insensitive_with_spans():
+    matcher = make_matcher("Rahul", "Priya")
+    mentions = matcher.find_all("Ping PRIYA, then rahul")
+    assert [(m["entity"], m["alias"], m["start"], m["end"]) for m in mentions] == [
+        ("Priya", "PRIYA", 5, 10),
+        ("Rahul", "rahul", 17, 22),
+    ]
+
+
+
+def test_spans_survive_characters_that_grow_when_lowercased():
+    matcher = make_matcher("Rahul")
+    message = "İİ email Rahul"
+    [mention] = matcher.find_all(message)
+    assert mention["alias"] == "Rahul"
+    assert message[mention["start"] : mention["end"]] == "Rahul"
+
+
+def test_whitespace_runs_match_single_spaced_aliases():
+    matcher = make_matcher("Priya Shah")
+    message = "Email Priya \t Shah\nand  PRIYA  SHAH"
+    mentions = matcher.find_all(message)
+    assert [m["entity"] for m in mentions] == ["Priya Shah", "Priya Shah"]
+    assert [m["alias"] for m in mentions] == ["Priya \t Shah", "PRIYA  SHAH"]
+    assert all(message[m["start"] : m["end"]] == m["alias"] for m in mentions)
+
+
+def test_matches_respect_word_boundaries():
+    matcher = make_matcher("Amit")
+    assert entities(matcher, "Email Amitabh") == []
+    assert entities(matcher, "Email Amit's partner") == ["Amit"]
+
+
+def test_longest_overlapping_match_wins():
+    matcher = make_matcher("Priya", "Priya Shah", "Shah Capital")
+    assert entities(matcher, "Call Priya Shah today") == ["Priya Shah"]
+
+
+def test_shared_suffixes_use_failure_links():
+    matcher = make_matcher("ann", "joanna", "nna")
+    assert sorted(entities(matcher, "joanna")) == ["joanna"]
+    assert entities(matcher, "nna") == ["nna"]
+
+
+def test_aliases_resolve_to_the_entity():
+    matcher = make_matcher("Robert Chen")
+    matcher.add("Bob", "Robert Chen")
+    assert entities(matcher, "Follow up with bob") == ["Robert Chen"]
+
+
+def test_incremental_add_after_a_scan():
+    matcher = make_matcher("Rahul")
+    assert entities(matcher, "Email Rahul and Zed") == ["Rahul"]
+    matcher.add("Zed")
+    assert entities(matcher, "Email Rahul and Zed") == ["Rahul", "Zed"]
+
+
+def test_re_adding_a_known_name_does_not_force_a_rebuild():
+    matcher = make_matcher("Rahul", "Priya")
+    matcher.find_all("warm up")
+    matcher.add("rahul", "Rahul")
+    matcher.add("Priya")
+    assert not matcher._dirty
+
+
+def test_index_loads_every_page_and_dedupes_context_names():
+    states = [
+        {"id": i, "org_id": "o", "entity_name": f"Person{i}", "current_state": {}}
+        for i in range(1, 8)
+    ]
+    states[0]["current_state"] = {"aliases": ["P One"]}
+    contexts = [
+        {"id": 100 + i, "org_id": "o", "entity_name": name, "content": "x"}
+        for i, name in enumerate(["Acme", "Acme", "Acme", "Beta", None, "Gamma"])
+    ]
+    db = FakeSupabase({"entity_state": states, "org_context": contexts}, latency_ms=0)
+
+    async def get_supabase():
+        return db
+
+    index = EntityIndex(get_supabase, page_size=2)
+    matcher = asyncio.run(index.matcher("o"))
+    assert matcher.names == {f"Person{i}" for i in range(1, 8)} | {"Acme", "Beta", "Gamma"}
+    assert entities(matcher, "ask p one about Gamma") == ["Person1", "Gamma"]
+
+
+def test_index_adds_entities_from_context_events():
+    db = FakeSupabase({"entity_state": [], "org_context": []}, latency_ms=0)
+
+    async def get_supabase():
+        return db
+
+    async def run():
+        index = EntityIndex(get_supabase)
+        await index.extract("o", "warm up")
+        index.on_context_changed("o", "decision", "Newperson")
+        index.on_context_changed("o", "entity_state", ["Zed", "Quinn"])
+        return await index.extract("o", "Newperson, Zed and Quinn")
+
+    assert [m["entity"] for m in asyncio.run(run())] == ["Newperson", "Zed", "Quinn"]
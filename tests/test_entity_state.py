@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+
+import context.cache
+from benchmarks.fakes import FakeSupabase
+from context.entity_state import EntityStateCache
+
+ORG = "org_test"
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(context.cache.time, "monotonic", clock)
+    return clock
+
+
+def make_cache(rows=()):
+    db = FakeSupabase(
+        {"entity_state": [{"org_id": ORG, **row} for row in rows]}, latency_ms=0
+    )
+
+    async def get_supabase():
+        return db
+
+    return EntityStateCache(get_supabase, ttl=600, negative_ttl=60), db
+
+
+def test_found_state_is_cached_until_ttl(clock):
+    cache, db = make_cache([{"entity_name": "Rahul", "current_state": {"status": "warm"}}])
+    assert asyncio.run(cache.get(ORG, "Rahul")) == {"status": "warm"}
+    db.tables["entity_state"][0]["current_state"] = {"status": "cold"}
+    assert asyncio.run(cache.get(ORG, "  rahul ")) == {"status": "warm"}
+    assert cache.db_reads == 1
+
+    clock.now += 601
+    assert asyncio.run(cache.get(ORG, "Rahul")) == {"status": "cold"}
+    assert cache.db_reads == 2
+
+
+def test_unknown_name_is_cached_for_negative_ttl(clock):
+    cache, db = make_cache()
+    assert asyncio.run(cache.get(ORG, "Zed")) is None
+    db.tables["entity_state"].append(
+        {"org_id": ORG, "entity_name": "Zed", "current_state": {"said_no": True}}
+    )
+    assert asyncio.run(cache.get(ORG, "Zed")) is None
+    assert cache.db_reads == 1
+
+    clock.now += 61
+    assert asyncio.run(cache.get(ORG, "Zed")) == {"said_no": True}
+    assert cache.db_reads == 2
+
+
+def test_put_replaces_a_cached_negative(clock):
+    cache, _ = make_cache()
+    assert asyncio.run(cache.get(ORG, "Zed")) is None
+    cache.put(ORG, "ZED", {"status": "new"})
+    assert asyncio.run(cache.get(ORG, "zed")) == {"status": "new"}
+    assert cache.db_reads == 1
+    # The written state outlives the negative TTL
+    clock.now += 61
+    assert asyncio.run(cache.get(ORG, "Zed")) == {"status": "new"}
+    assert cache.db_reads == 1
+
+
+def test_get_many_resolves_casing_misses_one_by_one(clock):
+    cache, _ = make_cache(
+        [
+            {"entity_name": "Rahul", "current_state": {"status": "warm"}},
+            {"entity_name": "Priya Shah", "current_state": {"status": "cold"}},
+        ]
+    )
+    cache.put(ORG, "Amit", {"said_no": True})
+    found = asyncio.run(cache.get_many(ORG, ["Rahul", "priya shah", "Amit", "Zed"]))
+    assert found == {
+        "Rahul": {"status": "warm"},
+        "priya shah": {"status": "cold"},  # missed by the case-sensitive in_
+        "Amit": {"said_no": True},
+        "Zed": None,
+    }
+    # One in_ query, then one ilike each for the two names it missed
+    assert cache.db_reads == 3
+
+    again = asyncio.run(cache.get_many(ORG, ["RAHUL", "Priya Shah", "Zed"]))
+    assert again == {
+        "RAHUL": {"status": "warm"},
+        "Priya Shah": {"status": "cold"},
+        "Zed": None,
+    }
+    assert cache.db_reads == 3
@@ -0,0 +1,81 @@
+import asyncio
+
+from benchmarks.fakes import FakeGemini, FakeSupabase, fake_qdrant
+from context.embedder import GeminiEmbedder
+from context.entities import EntityIndex
+from context.events import subscribe
+from context.ingest import BulkIngester, context_id
+from context.vector_store import make_vector_store
+
+ORG = "org_test"
+
+
+async def make_ingester(db):
+    qdrant = await fake_qdrant(0)
+    vectors = make_vector_store(qdrant, "genios_context", 384)
+    embedder = GeminiEmbedder(FakeGemini(embed_ms=0, generate_ms=0))
+
+    async def get_supabase():
+        return db
+
+    return BulkIngester(embedder, vectors, get_supabase, max_retries=2)
+
+
+def test_ingested_entities_reach_a_loaded_entity_index():
+    async def run():
+        db = FakeSupabase({"entity_state": [], "org_context": []}, latency_ms=0)
+        ingester = await make_ingester(db)
+
+        async def get_supabase():
+            return db
+
+        index = EntityIndex(get_supabase)
+        subscribe(index.on_context_changed)
+        assert await index.extract(ORG, "Email Zed") == []
+
+        await ingester.ingest(
+            ORG,
+            [
+                {"entity_name": "Zed", "entity_state": {"said_no": True}},
+                {
+                    "context_type": "relationship",
+                    "entity_name": "Quinn",
+                    "content": "Investor Quinn at Acme Ventures.",
+                },
+            ],
+        )
+        found = await index.extract(ORG, "Email Zed and Quinn")
+        return [m["entity"] for m in found]
+
+    assert asyncio.run(run()) == ["Zed", "Quinn"]
+
+
+def test_retry_after_partial_failure_counts_repeats_once():
+    async def run():
+        db = FakeSupabase({"entity_state": [], "org_context": []}, latency_ms=0)
+        ingester = await make_ingester(db)
+        write_states = ingester._write_entity_states
+        calls = []
+
+        async def flaky(org_id, items):
+            calls.append(1)
+            if len(calls) == 1:
+                raise RuntimeError("entity_state write failed")
+            await write_states(org_id, items)
+
+        ingester._write_entity_states = flaky
+        item = {
+            "context_type": "decision",
+            "entity_name": "Rahul",
+            "content": "Task: email Rahul. Result: sent",
+            "entity_state": {"last_contact_days_ago": 0},
+        }
+        result = await ingester.ingest(ORG, [item], count_repeats=True)
+        point_id = context_id(ORG, "decision", item["content"], "Rahul")
+        points = await ingester.vectors.retrieve([point_id])
+        return result, points[0].payload["count"], len(calls)
+
+    result, count, calls = asyncio.run(run())
+    assert result["batches_failed"] == []
+    assert calls == 2
+    assert count == 1
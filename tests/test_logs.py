@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+from audit.logs import LOG_COLUMNS, decode_cursor, encode_cursor, fetch_page, iter_pages, parse_fields
+from benchmarks.fakes import FakeSupabase
+
+ORG = "o"
+
+
+def make_db(n=7):
+    # Several rows share a timestamp, so ties must be broken by id
+    rows = [
+        {
+            "id": i,
+            "org_id": ORG,
+            "intent": f"intent {i}",
+            "verdict": "PROCEED",
+            "created_at": f"2026-01-01T00:00:0{i // 3}+00:00",
+        }
+        for i in range(1, n + 1)
+    ]
+    rows.append({"id": 99, "org_id": "other", "intent": "x", "created_at": rows[0]["created_at"]})
+    return FakeSupabase({"interaction_log": rows}, latency_ms=0)
+
+
+@pytest.mark.parametrize(
+    "row",
+    [
+        {"created_at": "2026-01-01T00:00:00.123+00:00", "id": 42},
+        {"created_at": "2026-01-01T00:00:00+00:00", "id": "5f0c-uuid,with:odd\"chars"},
+    ],
+)
+def test_cursor_round_trip(row):
+    cursor = encode_cursor(row)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (row["created_at"], row["id"])
+
+
+@pytest.mark.parametrize("cursor", ["not-base64!!", "bm90IGpzb24", "WzFd"])
+def test_malformed_cursor_is_a_value_error(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_parse_fields_adds_key_columns_and_rejects_unknown():
+    assert parse_fields(None) == list(LOG_COLUMNS)
+    assert parse_fields("verdict, intent") == ["verdict", "intent", "created_at", "id"]
+    with pytest.raises(ValueError):
+        parse_fields("verdict,password")
+
+
+def collect(descending, limit=3):
+    async def run():
+        db = make_db()
+        seen, cursor = [], None
+        while True:
+            rows, cursor = await fetch_page(
+                db, ORG, ["id", "created_at"], limit, cursor, descending=descending
+            )
+            seen += [r["id"] for r in rows]
+            if cursor is None:
+                return seen
+
+    return asyncio.run(run())
+
+
+def test_keyset_pages_cover_every_row_once_newest_first():
+    assert collect(descending=True) == [7, 6, 5, 4, 3, 2, 1]
+
+
+def test_keyset_pages_cover_every_row_once_oldest_first():
+    assert collect(descending=False, limit=2) == [1, 2, 3, 4, 5, 6, 7]
+
+
+def test_iter_pages_respects_since_and_until():
+    async def run():
+        pages = iter_pages(
+            make_db(),
+            ORG,
+            parse_fields("id"),
+            chunk_size=2,
+            since="2026-01-01T00:00:01+00:00",
+            until="2026-01-01T00:00:02+00:00",
+        )
+        return [r["id"] for rows in [p async for p in pages] for r in rows]
+
+    assert asyncio.run(run()) == [3, 4, 5]
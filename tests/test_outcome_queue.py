@@ -0,0 +1,63 @@
+import asyncio
+
+from benchmarks.fakes import FakeGemini, FakeSupabase, fake_qdrant
+from context.embedder import GeminiEmbedder
+from context.entities import EntityIndex
+from context.events import subscribe
+from context.ingest import BulkIngester
+from context.outcome_queue import OutcomeQueue
+from context.vector_store import make_vector_store
+
+ORG = "org_webhook"
+
+
+def outcome(entity, result="Sent"):
+    return {
+        "context_type": "decision",
+        "content": f"Task: email {entity}. Result: {result}",
+        "entity_name": entity,
+        "entity_state": {"last_contact_days_ago": 0},
+    }
+
+
+async def setup():
+    db = FakeSupabase({"entity_state": [], "org_context": []}, latency_ms=0)
+
+    async def get_supabase():
+        return db
+
+    vectors = make_vector_store(await fake_qdrant(0), "genios_context", 384)
+    ingester = BulkIngester(
+        GeminiEmbedder(FakeGemini(embed_ms=0, generate_ms=0)), vectors, get_supabase
+    )
+    queue = OutcomeQueue(lambda: ingester, flush_interval=0.01)
+    index = EntityIndex(get_supabase)
+    subscribe(index.on_context_changed)
+    return queue, index
+
+
+def test_webhook_entities_reach_the_entity_index():
+    async def run():
+        queue, index = await setup()
+        assert await index.extract(ORG, "follow up with Newperson") == []
+        await queue.start()
+        assert await queue.submit(ORG, outcome("Newperson")) == "queued"
+        await queue.stop()
+        return await index.extract(ORG, "follow up with Newperson")
+
+    mentions = asyncio.run(run())
+    assert [m["entity"] for m in mentions] == ["Newperson"]
+
+
+def test_duplicate_outcomes_are_dropped():
+    async def run():
+        queue, _ = await setup()
+        await queue.start()
+        first = await queue.submit(ORG, outcome("Rahul"))
+        second = await queue.submit(ORG, outcome("Rahul"))
+        await queue.stop()
+        return first, second, queue.stats()
+
+    first, second, stats = asyncio.run(run())
+    assert (first, second) == ("queued", "duplicate")
+    assert stats["written"] == 1
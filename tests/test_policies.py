@@ -0,0 +1,112 @@
+import numpy as np
+
+from context.policies import PolicySet, compile_policy
+
+FREQUENCY = "Follow up with investors maximum once every 5 days unless they responded."
+SAID_NO = "Never contact an investor who said no in the last 90 days."
+FREE_TEXT = "Always be polite and concise."
+
+
+def policy_set():
+    return PolicySet(
+        [
+            {"id": 1, "content": FREQUENCY, "predicate": compile_policy(FREQUENCY)},
+            {"id": 2, "content": SAID_NO, "predicate": compile_policy(SAID_NO)},
+            {"id": 3, "content": FREE_TEXT, "predicate": compile_policy(FREE_TEXT)},
+        ]
+    )
+
+
+def test_compile_frequency_policy():
+    assert compile_policy(FREQUENCY) == {
+        "action": "contact",
+        "when": [["last_contact_days_ago", "<", 5]],
+        "unless": [["responded", "==", True]],
+        "effect": "ESCALATE",
+        "flag": "follow_up_frequency_exceeded",
+    }
+    without_unless = compile_policy("Email leads at most once every 7 days.")
+    assert without_unless["when"] == [["last_contact_days_ago", "<", 7]]
+    assert without_unless["unless"] == []
+
+
+def test_compile_said_no_policy():
+    predicate = compile_policy(SAID_NO)
+    assert predicate["effect"] == "BLOCK"
+    assert predicate["when"] == [["said_no", "==", True], ["last_contact_days_ago", "<=", 90]]
+    assert compile_policy("Don't email anyone who SAID NO.")["when"] == [["said_no", "==", True]]
+
+
+def test_unrecognised_policy_stays_free_text():
+    assert compile_policy(FREE_TEXT) is None
+    assert len(policy_set()) == 2
+
+
+def test_evaluate_many_matches_per_state_rules():
+    states = [
+        {"last_contact_days_ago": 2, "responded": False, "said_no": False},
+        {"last_contact_days_ago": 2, "responded": True, "said_no": False},
+        {"last_contact_days_ago": 10, "responded": False, "said_no": True},
+        {"last_contact_days_ago": 200, "said_no": True},
+        {"last_contact_days_ago": 2},
+        {},
+        None,
+    ]
+    violated, satisfied = policy_set().evaluate_many(states)
+    assert violated.shape == satisfied.shape == (len(states), 2)
+    assert violated.tolist() == [
+        [True, False],
+        [False, False],
+        [False, True],
+        [False, False],
+        # responded unknown: can't tell whether the exemption applies
+        [False, False],
+        [False, False],
+        [False, False],
+    ]
+    assert satisfied.tolist() == [
+        [False, True],
+        [True, True],
+        [True, False],
+        [True, True],
+        [False, False],
+        [False, False],
+        [False, False],
+    ]
+    assert not (violated & satisfied).any()
+
+
+def test_non_numeric_fields_count_as_missing():
+    violated, satisfied = policy_set().evaluate_many(
+        [{"last_contact_days_ago": "recently", "responded": False, "said_no": "maybe"}]
+    )
+    assert not violated.any()
+    assert not satisfied.any()
+
+
+def test_evaluate_many_without_states():
+    violated, satisfied = policy_set().evaluate_many([])
+    assert violated.shape == (0, 2)
+    assert satisfied.dtype == np.bool_
+
+
+def test_check_statuses():
+    checks = policy_set().check(
+        "Send a follow-up email to Rahul",
+        {"last_contact_days_ago": 2, "responded": False, "said_no": False},
+    )
+    assert [(c["id"], c["status"], c["effect"]) for c in checks] == [
+        (1, "violated", "ESCALATE"),
+        (2, "satisfied", "BLOCK"),
+    ]
+    assert checks[0]["flag"] == "follow_up_frequency_exceeded"
+
+
+def test_check_action_and_missing_state():
+    policies = policy_set()
+    state = {"last_contact_days_ago": 2, "responded": False, "said_no": True}
+    assert {c["status"] for c in policies.check("Review the Q3 deck", state)} == {
+        "not_applicable"
+    }
+    assert {c["status"] for c in policies.check("Email Rahul", None)} == {"unknown"}
+    assert PolicySet([]).check("Email Rahul", state) == []
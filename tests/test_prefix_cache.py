@@ -0,0 +1,101 @@
+import asyncio
+from types import SimpleNamespace
+
+from reasoning.engine import ReasoningEngine
+from reasoning.prefix_cache import PrefixCache
+from reasoning.prompt import PromptBuilder, estimate_tokens
+
+
+class StubCache:
+    def __init__(self):
+        self.invalidated = []
+
+    async def get(self, client, prefix):
+        return "cachedContents/abc"
+
+    def invalidate(self, prefix):
+        self.invalidated.append(prefix)
+
+
+class StreamClient:
+    """generate_content_stream whose cached variant fails on the first chunk"""
+
+    def __init__(self):
+        self.configs = []
+        self.aio = SimpleNamespace(models=self)
+
+    async def generate_content_stream(self, model, contents, config):
+        self.configs.append(config)
+        cached = config.cached_content is not None
+
+        async def chunks():
+            if cached:
+                raise RuntimeError("400 CachedContent not found")
+            yield SimpleNamespace(text='{"verdict": ')
+            yield SimpleNamespace(text='"PROCEED"}')
+
+        return chunks()
+
+
+async def stream_texts(engine):
+    stream = await engine._call_model("PREFIX", "PROMPT", stream=True)
+    return [chunk.text async for chunk in stream]
+
+
+def test_stream_falls_back_inline_when_cache_fails_on_first_chunk():
+    client = StreamClient()
+    engine = ReasoningEngine(client=client)
+    engine.prefix_cache = StubCache()
+    assert asyncio.run(stream_texts(engine)) == ['{"verdict": ', '"PROCEED"}']
+    assert client.configs[0].cached_content == "cachedContents/abc"
+    assert client.configs[1].system_instruction == "PREFIX"
+    assert engine.prefix_cache.invalidated == ["PREFIX"]
+
+
+def test_stream_from_cache_keeps_every_chunk():
+    class Client(StreamClient):
+        async def generate_content_stream(self, model, contents, config):
+            self.configs.append(config)
+
+            async def chunks():
+                for text in ("a", "b", "c"):
+                    yield SimpleNamespace(text=text)
+
+            return chunks()
+
+    client = Client()
+    engine = ReasoningEngine(client=client)
+    engine.prefix_cache = StubCache()
+    assert asyncio.run(stream_texts(engine)) == ["a", "b", "c"]
+    assert len(client.configs) == 1
+    assert engine.prefix_cache.invalidated == []
+
+
+def test_policies_live_in_the_prefix():
+    context = {
+        "profile": "Acme builds robots.",
+        "policies": [
+            {"content": "Never share financials before a signed NDA.", "check": "violated"},
+            {"content": "Reply to investors within 2 days.", "check": "satisfied"},
+        ],
+    }
+    prefix, prompt, _ = PromptBuilder().build("Email Rahul", context)
+    assert "Never share financials" in prefix
+    assert "Reply to investors within 2 days." in prefix
+    # Only the satisfied check is per request
+    assert "Reply to investors within 2 days." in prompt
+    assert "Never share financials" not in prompt.split("POLICY VIOLATIONS")[0]
+    other, _, _ = PromptBuilder().build("Call Priya", {**context, "policies": [
+        {**p, "check": None} for p in context["policies"]
+    ]})
+    assert other == prefix
+
+
+def test_small_prefix_is_skipped_with_one_warning(capsys):
+    cache = PrefixCache("gemini-2.5-flash", min_tokens=1024)
+    prefix = "short prefix"
+    assert estimate_tokens(prefix) < 1024
+    assert asyncio.run(cache.get(None, prefix)) is None
+    assert asyncio.run(cache.get(None, prefix)) is None
+    assert cache.skipped == 2
+    assert capsys.readouterr().out.count("[WARN]") == 1
@@ -0,0 +1,137 @@
+import pytest
+
+from reasoning import rules
+
+FINANCIAL_POLICY = {
+    "content": "Never share financial projections without founder approval first."
+}
+CONTEXT = {"policies": [FINANCIAL_POLICY]}
+
+
+def fired(intent, context=CONTEXT, entity_name=None):
+    result = rules.evaluate(intent, context, entity_name)
+    return result and result["rule_fired"]
+
+
+@pytest.mark.parametrize(
+    "intent",
+    [
+        "Share financial projections with Priya, founder approved",
+        "Send the financial projections to Rahul with approval from the founder",
+        "Share financials with Rahul - CEO signed off",
+        "Forward the burn rate to Priya after founder approval",
+    ],
+)
+def test_financial_data_with_founder_approval_escalates(intent):
+    assert fired(intent) == "rule_4_financial_data_escalate"
+
+
+@pytest.mark.parametrize(
+    "intent",
+    [
+        "Share financial projections with Priya",
+        "Share financial projections with Priya without founder approval",
+        "Share financial projections with Priya, no founder approval yet",
+        "Share financial projections with Priya before the founder approves",
+        "Send projections to Rahul, not approved by the founder",
+        "Send projections to Rahul, the founder hasn't approved",
+        "Send projections to Rahul, founder approval pending",
+        "Send projections to Rahul while awaiting founder approval",
+    ],
+)
+def test_financial_data_without_founder_approval_blocks(intent):
+    result = rules.evaluate(intent, CONTEXT)
+    assert result["rule_fired"] == "rule_4_financial_data_block"
+    assert result["verdict"] == "BLOCK"
+    assert result["key_context_used"] == [FINANCIAL_POLICY["content"]]
+
+
+def test_internal_update_proceeds():
+    result = rules.evaluate("Send a product update to the team", CONTEXT)
+    assert result["verdict"] == "PROCEED"
+    assert result["rule_fired"] == "rule_2_internal_communication"
+
+
+def test_internal_financial_message_is_left_to_the_model():
+    assert fired("Share the financial projections with the team") is None
+
+
+def test_information_request_is_left_to_the_model():
+    assert fired("What is our policy on sharing financial projections?") is None
+
+
+def test_declined_investor_is_blocked():
+    context = {"entity_state": {"status": "cold", "said_no": True}}
+    result = rules.evaluate("Reach out to Amit", context, "Amit")
+    assert result["rule_fired"] == "rule_5_investor_declined"
+    assert result["flags"] == ["investor_declined"]
+
+
+def test_warm_investor_falls_through():
+    context = {"entity_state": {"status": "warm"}}
+    assert fired("Follow up with Rahul about our prototype", context, "Rahul") is None
+
+
+def test_compiled_policy_violation_blocks_before_escalations():
+    context = {
+        "policy_violations": [
+            {"effect": "ESCALATE", "flag": "follow_up_frequency_exceeded", "content": "a"},
+            {"effect": "BLOCK", "flag": "investor_said_no", "content": "b"},
+        ]
+    }
+    result = rules.evaluate("Email Amit", context, "Amit")
+    assert result["verdict"] == "BLOCK"
+    assert result["rule_fired"] == "policy_investor_said_no"
+
+
+DECLINED = {"entity_state": {"status": "cold", "said_no": True}}
+
+
+@pytest.mark.parametrize(
+    "intent",
+    [
+        "Reach out to Amit and update the team",
+        "Email Amit the pitch deck and send a copy to the team",
+    ],
+)
+def test_external_contact_copying_the_team_is_still_checked(intent):
+    result = rules.evaluate(intent, DECLINED, "Amit")
+    assert result["rule_fired"] == "rule_5_investor_declined"
+    assert result["verdict"] == "BLOCK"
+
+
+def test_mentioned_entity_blocks_the_internal_shortcut():
+    context = {
+        "policy_violations": [
+            {"effect": "BLOCK", "flag": "investor_said_no", "content": "b"}
+        ],
+        "mentioned_entities": [{"entity": "Amit"}],
+    }
+    result = rules.evaluate("Send Amit's feedback to the team", context)
+    assert result["rule_fired"] == "policy_investor_said_no"
+
+
+@pytest.mark.parametrize(
+    "intent",
+    [
+        "Email Rahul and update the team",
+        "Update the team, then follow up with Priya",
+    ],
+)
+def test_mixed_audience_without_a_blocking_rule_goes_to_the_model(intent):
+    assert fired(intent, {"entity_state": {"status": "warm"}}) is None
+
+
+def test_financial_data_to_an_outsider_copying_the_team_blocks():
+    assert (
+        fired("Send the financial projections to Rahul and the team")
+        == "rule_4_financial_data_block"
+    )
+
+
+@pytest.mark.parametrize(
+    "intent",
+    ["Tell the team about the launch", "Share the Q3 plan with our team"],
+)
+def test_team_only_messages_still_proceed(intent):
+    assert fired(intent, {}) == "rule_2_internal_communication"
@@ -0,0 +1,58 @@
+import asyncio
+from types import SimpleNamespace
+
+from context.snapshot import SnapshotStore
+
+
+class Vectors:
+    def __init__(self):
+        self.policies = ["Never share financial projections without founder approval."]
+        self.scrolls = 0
+
+    async def scroll(self, org_id, context_types=None):
+        self.scrolls += 1
+        return [
+            SimpleNamespace(id=i, payload={"context_type": "policy", "content": c})
+            for i, c in enumerate(self.policies)
+        ]
+
+
+def test_snapshot_is_pinned_until_it_expires():
+    async def run():
+        vectors = Vectors()
+        store = SnapshotStore(vectors, refresh_seconds=60)
+        first = await store.get("o")
+        vectors.policies.append("Escalate positive investor replies.")
+        second = await store.get("o")
+        return first, second, vectors.scrolls
+
+    first, second, scrolls = asyncio.run(run())
+    assert second is first and scrolls == 1
+
+
+def test_expired_snapshot_picks_up_writes_from_other_processes():
+    async def run():
+        vectors = Vectors()
+        store = SnapshotStore(vectors, refresh_seconds=0)
+        first = await store.get("o")
+        unchanged = await store.get("o")
+        vectors.policies.append("Escalate positive investor replies.")
+        changed = await store.get("o")
+        return first, unchanged, changed
+
+    first, unchanged, changed = asyncio.run(run())
+    assert unchanged.version == first.version
+    assert len(changed.policies) == 2
+    assert changed.version == first.version + 1
+
+
+def test_policy_write_in_this_process_drops_the_snapshot():
+    async def run():
+        vectors = Vectors()
+        store = SnapshotStore(vectors, refresh_seconds=60)
+        await store.get("o")
+        vectors.policies.append("Escalate positive investor replies.")
+        store.on_context_changed("o", "policy")
+        return await store.get("o")
+
+    assert len(asyncio.run(run()).policies) == 2
@@ -0,0 +1,75 @@
+import json
+
+import pytest
+
+from reasoning.engine import ReasoningEngine
+from reasoning.stream_parser import IncrementalJSONParser
+
+VERDICT = {
+    "verdict": "CLARIFY",
+    "confidence": 0.72,
+    "reasoning": "Needs an NDA first, \"strictly\" {not} [yet] signed",
+    "flags": ["nda_missing", "financial_data"],
+    "key_context_used": [{"type": "policy", "content": "NDA, always"}],
+    "suggested_action": None,
+}
+TEXT = json.dumps(VERDICT)
+
+
+def feed_all(parser, chunks):
+    events = []
+    for chunk in chunks:
+        events.extend(parser.feed(chunk))
+    return events
+
+
+@pytest.mark.parametrize("size", [1, 2, 7, 64, len(TEXT)])
+def test_fields_complete_regardless_of_chunking(size):
+    parser = IncrementalJSONParser()
+    events = feed_all(parser, [TEXT[i : i + size] for i in range(0, len(TEXT), size)])
+    assert events == list(VERDICT.items())
+    assert parser.fields == VERDICT
+    assert parser.done
+
+
+def test_field_is_emitted_as_soon_as_it_completes():
+    parser = IncrementalJSONParser()
+    assert parser.feed('{"verdict": "PROCEED", "confid') == [("verdict", "PROCEED")]
+    assert parser.feed("ence\": 0.9") == []
+    assert parser.feed("}") == [("confidence", 0.9)]
+    assert parser.done
+
+
+def test_text_around_the_object_is_ignored():
+    parser = IncrementalJSONParser()
+    events = feed_all(parser, ["```json\n", TEXT, "\n```\n{\"extra\": 1}"])
+    assert dict(events) == VERDICT
+    assert "extra" not in parser.fields
+
+
+def test_incomplete_stream_is_not_done():
+    parser = IncrementalJSONParser()
+    parser.feed('{"verdict": "BLOCK", "flags": ["a",')
+    assert not parser.done
+    assert parser.fields == {"verdict": "BLOCK"}
+
+
+def test_malformed_value_raises():
+    parser = IncrementalJSONParser()
+    with pytest.raises(json.JSONDecodeError):
+        parser.feed('{"verdict": PROCEED, ')
+
+
+class Client:
+    aio = None
+
+
+def test_extract_json_strategies_and_quiet_failure(capsys):
+    engine = ReasoningEngine(client=Client())
+    assert engine._extract_json(f"```json\n{TEXT}\n```") == VERDICT
+    assert engine._extract_json(f"Sure! Here it is: {TEXT} Hope that helps") == VERDICT
+    with pytest.raises(json.JSONDecodeError):
+        engine._extract_json('secret customer note {"verdict": ')
+    out = capsys.readouterr().out
+    assert "[WARN]" in out
+    assert "secret customer note" not in out
@@ -0,0 +1,121 @@
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+
+from context.vector_store import LocalVectorStore, _OrgIndex
+
+DIM = 8
+
+
+def record(point_id, vector, context_type="policy", entity_name=None):
+    return SimpleNamespace(
+        id=point_id,
+        vector=list(vector),
+        payload={"org_id": "o1", "context_type": context_type, "entity_name": entity_name},
+    )
+
+
+class Source:
+    """Stand-in for QdrantVectorStore; scroll can be held open"""
+
+    def __init__(self, records):
+        self.records = {r.id: r for r in records}
+        self.scrolls = 0
+        self.gate = None
+
+    async def scroll(self, org_id, context_types=None, with_vectors=False):
+        self.scrolls += 1
+        snapshot = list(self.records.values())
+        if self.gate is not None:
+            await self.gate.wait()
+        return snapshot
+
+    async def upsert(self, points):
+        for p in points:
+            self.records[p.id] = p
+
+    async def delete(self, org_id, ids):
+        for i in ids:
+            self.records.pop(i, None)
+
+
+def random_records(n, seed=0):
+    rng = np.random.default_rng(seed)
+    types = ["policy", "decision", "relationship"]
+    return [
+        record(i, rng.standard_normal(DIM), types[i % 3], f"E{i % 5}") for i in range(n)
+    ]
+
+
+def test_bulk_build_matches_point_by_point():
+    records = random_records(300)
+    bulk = _OrgIndex.from_records(DIM, 10**9, records + [records[0]])
+    incremental = _OrgIndex(DIM, 10**9)
+    for r in records:
+        incremental.upsert(r.id, r.vector, r.payload)
+    assert bulk.size == incremental.size == 300
+    query = np.ones(DIM)
+    for kwargs in ({}, {"context_types": ["decision"]}, {"entity_name": "E3"}):
+        a = bulk.search(query, 5, **kwargs)
+        b = incremental.search(query, 5, **kwargs)
+        assert [h.id for h in a] == [h.id for h in b]
+        assert np.allclose([h.score for h in a], [h.score for h in b], atol=1e-5)
+
+
+def test_bulk_build_uses_hnsw_past_threshold():
+    records = random_records(200)
+    index = _OrgIndex.from_records(DIM, 100, records)
+    assert index.hnsw is not None
+    hits = index.search(records[7].vector, 1)
+    assert hits[0].id == 7
+
+
+def test_stale_index_keeps_serving_while_reload_runs():
+    async def run():
+        source = Source(random_records(50))
+        store = LocalVectorStore(source, DIM, refresh_seconds=60)
+        first = await store._org("o1")
+        first.loaded_at -= 120
+
+        source.gate = asyncio.Event()
+        assert await store._org("o1") is first  # served stale, reload started
+        assert await store._org("o1") is first  # no second reload
+        await asyncio.sleep(0)
+        assert source.scrolls == 2
+
+        # A write and a delete land while the reload's scroll is in flight
+        new = record(999, np.ones(DIM))
+        await store.upsert([SimpleNamespace(id=new.id, vector=new.vector, payload=new.payload)])
+        await store.delete("o1", [3])
+        source.gate.set()
+        while store._refreshes:
+            await asyncio.sleep(0.01)
+
+        second = await store._org("o1")
+        assert second is not first
+        assert 999 in second.positions and 3 not in second.positions
+        assert second.search(np.ones(DIM), 1)[0].id == 999
+
+    asyncio.run(run())
+
+
+def test_failed_reload_keeps_the_old_index(capsys):
+    async def run():
+        source = Source(random_records(10))
+        store = LocalVectorStore(source, DIM, refresh_seconds=60)
+        first = await store._org("o1")
+        first.loaded_at -= 120
+
+        async def broken(*args, **kwargs):
+            raise RuntimeError("qdrant down")
+
+        source.scroll = broken
+        await store._org("o1")
+        while store._refreshes:
+            await asyncio.sleep(0.01)
+        assert store.orgs["o1"] is first
+        assert not store._pending
+        assert "[WARN]" in capsys.readouterr().out
+
+    asyncio.run(run())
@@ -0,0 +1,78 @@
+import asyncio
+
+from benchmarks.fakes import ORG_ID, FakeGemini, FakeSupabase, fake_qdrant, seed_points, seed_tables
+from context.events import notify_context_changed, subscribe
+from context.retriever import ContextRetriever
+from reasoning.cache import VerdictCache, context_fingerprint
+
+CONTEXT = {"profile": "Acme", "policies": [{"content": "Be nice."}], "entity_state": None}
+VERDICT = {"verdict": "PROCEED", "flags": []}
+
+
+def test_exact_hit_returns_a_copy():
+    cache = VerdictCache()
+    fp = context_fingerprint("o1", CONTEXT)
+    cache.set("o1", "Email Rahul", "Rahul", fp, VERDICT, llm_ms=900)
+    hit = cache.get("o1", "  email   RAHUL ", "rahul", fp)
+    assert hit == VERDICT
+    hit["flags"].append("mutated")
+    assert cache.get("o1", "Email Rahul", "Rahul", fp) == VERDICT
+    assert cache.stats()["exact_hits"] == 2
+    assert cache.stats()["saved_llm_ms"] == 1800
+
+
+def test_semantic_hit_needs_similar_vector_and_same_entity():
+    cache = VerdictCache(threshold=0.9)
+    fp = context_fingerprint("o2", CONTEXT)
+    cache.set("o2", "Email Rahul", "Rahul", fp, VERDICT, 500, intent_vector=[1.0, 0.0])
+    assert cache.get("o2", "Send Rahul an email", "Rahul", fp, [0.99, 0.05]) == VERDICT
+    assert cache.get("o2", "Call Rahul", "Rahul", fp, [0.0, 1.0]) is None
+    assert cache.get("o2", "Send Priya an email", "Priya", fp, [0.99, 0.05]) is None
+    assert cache.stats()["semantic_hits"] == 1
+
+
+def test_semantic_lookup_leaves_the_callers_vector_alone():
+    import numpy as np
+
+    cache = VerdictCache()
+    vector = np.array([3.0, 4.0], dtype=np.float32)
+    cache.set("o3", "a", None, "fp", VERDICT, 1, vector)
+    cache.get("o3", "b", None, "fp", vector)
+    assert vector.tolist() == [3.0, 4.0]
+
+
+def test_context_write_changes_the_fingerprint():
+    before = context_fingerprint("o4", CONTEXT)
+    notify_context_changed("o4", "decision")
+    assert context_fingerprint("o4", CONTEXT) != before
+
+
+def test_invalidate_org_drops_only_that_org():
+    cache = VerdictCache()
+    subscribe(cache.invalidate_org)
+    for org in ("o5", "o6"):
+        cache.set(org, "Email Rahul", None, "fp", VERDICT, 1)
+    notify_context_changed("o5", "policy")
+    assert cache.get("o5", "Email Rahul", None, "fp") is None
+    assert cache.get("o6", "Email Rahul", None, "fp") == VERDICT
+
+
+def test_retrieval_hands_back_its_query_vector_without_a_second_lookup():
+    async def run():
+        retriever = ContextRetriever(
+            qdrant=await fake_qdrant(0, points=seed_points()),
+            supabase=FakeSupabase(seed_tables(), latency_ms=0),
+            client=FakeGemini(embed_ms=0, generate_ms=0),
+        )
+        embedding = {}
+        await retriever.get_context("follow up with Rahul", ORG_ID, "Rahul", embedding=embedding)
+        batch = {}
+        await retriever.get_context_batch(
+            [("ping Priya", ORG_ID, "Priya"), ("ping Amit", ORG_ID, None)], embedding=batch
+        )
+        return embedding, batch, retriever.embed_cache.stats()
+
+    embedding, batch, stats = asyncio.run(run())
+    assert len(embedding["vector"]) == 384
+    assert len(batch["vectors"]) == 2
+    assert (stats["hits"], stats["misses"]) == (0, 3)
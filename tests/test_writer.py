@@ -0,0 +1,59 @@
+import asyncio
+import json
+import os
+import time
+
+from audit.writer import InteractionLogWriter
+from benchmarks.fakes import FakeSupabase
+
+
+def writer_for(db, spill_dir, **kwargs):
+    async def get_client():
+        return db
+
+    return InteractionLogWriter(get_client, flush_interval=0.01, spill_dir=str(spill_dir), **kwargs)
+
+
+def test_corrupt_spill_segment_is_quarantined_and_writing_continues(tmp_path):
+    (tmp_path / "segment-1.jsonl").write_text(
+        json.dumps({"org_id": "o", "intent": "spilled"}) + "\n" + '{"org_id": "o", "int'
+    )
+    db = FakeSupabase({"interaction_log": []}, latency_ms=0)
+
+    async def run():
+        writer = writer_for(db, tmp_path)
+        await writer.start()
+        await writer.submit({"org_id": "o", "intent": "new"})
+        await writer.stop()
+        return writer.stats()
+
+    stats = asyncio.run(run())
+    intents = sorted(r["intent"] for r in db.tables["interaction_log"])
+    assert intents == ["new", "spilled"]
+    assert stats["quarantined"] == 1
+    assert stats["spill_segments"] == 0
+    assert os.path.exists(tmp_path / "segment-1.jsonl.corrupt")
+
+
+class Down:
+    def table(self, name):
+        raise ConnectionError("supabase unreachable")
+
+
+def test_failed_batch_spills_without_sleeping_after_the_last_attempt(tmp_path):
+    async def get_client():
+        return Down()
+
+    async def run():
+        writer = InteractionLogWriter(
+            get_client, flush_interval=0.01, max_retries=1, spill_dir=str(tmp_path)
+        )
+        await writer.start()
+        start = time.perf_counter()
+        await writer.submit({"org_id": "o", "intent": "lost?"})
+        await writer.stop()
+        return writer.stats(), time.perf_counter() - start
+
+    stats, elapsed = asyncio.run(run())
+    assert stats["spilled"] == 1 and stats["spill_segments"] == 1
+    assert elapsed < 0.15